@@ -99,6 +99,17 @@ def build():
         "--hidden-import", "onnxruntime",
         "--hidden-import", "scripts",
         "--hidden-import", "scripts.lcu_connector",
+        "--hidden-import", "scripts.augment_db",
+        "--hidden-import", "scripts.augment_match",
+        "--hidden-import", "scripts.capture",
+        "--hidden-import", "scripts.augment_watch",
+        "--hidden-import", "scripts.perf",
+        "--hidden-import", "scripts.ocr_cache",
+        "--hidden-import", "scripts.ocr_pipeline",
+        "--hidden-import", "scripts.ocr_calibration",
+        "--hidden-import", "scripts.ocr_quantize",
+        "--hidden-import", "scripts.ocr_vocab",
+        "--hidden-import", "scripts.ocr_workers",
         "--hidden-import", "scripts.hero_scraper",
         "--hidden-import", "scripts.updater",
         "--hidden-import", "scripts.utils",
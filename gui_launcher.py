@@ -4,6 +4,7 @@ ARAM 海克斯助手 - GUI 启动器
 """
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
+import multiprocessing
 import threading
 import queue
 import os
@@ -88,18 +89,51 @@ class GUIController(threading.Thread):
         self.lcu = lcu_connector
         self.current_hero = None
         self.running = True
+        self._stopped = threading.Event()  # stop() 时唤醒等待中的轮询/事件
         self._last_f6 = 0
         self._last_f7 = 0
         self._last_f8 = 0
+        self._last_f9 = 0
+        # 监视模式: 检测到海克斯选择界面时自动分析 (GUI 勾选 / data/watch.json)
+        from scripts.augment_watch import AugmentWatcher, load_watch_settings
+        self.watcher = AugmentWatcher(analyzer.regions, settings=load_watch_settings())
+        # LCU 事件推送的英雄变化 (英雄, 来源); 未订阅 (无 websocket-client) 时退回轮询
+        self.hero_events = queue.Queue()
+        self.lcu_events = self.lcu.subscribe(self._on_lcu_champion) if self.lcu else None
 
     def run(self):
         """主循环: 自动检测 → 监听"""
-        while self.running:
-            self._auto_detect_phase()
-            self._listening_phase()
+        try:
+            while self.running:
+                self._auto_detect_phase()
+                self._listening_phase()
+        finally:
+            self.watcher.close()  # 常驻 mss 句柄属于本线程
+            # OCR 进程池/线程池与 LCU 会话同样在本线程退出时释放: 此时不会再有分析在进行
+            self.analyzer.close()
+            if self.lcu:
+                self.lcu.close()
 
     def stop(self):
+        """请求停止 (资源在线程退出时释放, 调用方可 join 等待)"""
         self.running = False
+        self._stopped.set()
+        self.hero_events.put(None)  # 唤醒等待推送的 _next_hero_event
+
+    @staticmethod
+    def print_perf_summary():
+        """输出 F6 分析各阶段耗时统计 (stdout 已重定向到 GUI 日志)"""
+        from scripts.perf import monitor
+        print(monitor.format_summary())
+
+    def _analyze(self, auto=False):
+        """分析当前界面: 每张卡片完成即推送到悬浮窗, 全部完成后再标记最优推荐"""
+        from main import stream_analysis
+        self._gui(event="status", status="analyzing", hero=self.current_hero)
+        print(f"正在分析: {self.current_hero}...")
+        stream_analysis(self.analyzer, self.current_hero, self.overlay_queue, quiet=auto)
+        self._gui(event="status", status="analyzed", hero=self.current_hero)
+        print(f"分析完成: {self.current_hero}")
 
     def _gui(self, **kwargs):
         """发送消息到 GUI"""
@@ -126,7 +160,7 @@ class GUIController(threading.Thread):
                 else:
                     print("⚠ LCU 未连接 (客户端可能未启动或需要管理员权限)")
         
-        hero, source = self.lcu.get_champion_auto()
+        hero, source = self.lcu.get_champion_race()
         if verbose and not hero:
             phase = self.lcu.get_gameflow_phase() if self.lcu.is_connected() else None
             if phase:
@@ -142,10 +176,44 @@ class GUIController(threading.Thread):
                 print(f"⚠ 英雄 [{hero}] 不在数据库中")
         return None, source
 
+    def _on_lcu_champion(self, hero, source):
+        """LCU 事件线程回调: 只入队, 由引擎线程处理"""
+        self.hero_events.put((hero, source))
+
+    def _next_hero_event(self, timeout=0):
+        """取一个推送的英雄变化 (最多等待 timeout 秒)，返回 (英雄中文名|None, 来源)"""
+        try:
+            item = self.hero_events.get(timeout=timeout) if timeout > 0 else self.hero_events.get_nowait()
+        except queue.Empty:
+            return None, ""
+        if item is None:
+            return None, ""  # stop() 的唤醒
+        hero, source = item
+        validated = self._validate_hero(hero)
+        if not validated:
+            print(f"⚠ 英雄 [{hero}] 不在数据库中")
+        return validated, source
+
+    def _drain_hero_events(self):
+        """丢弃未处理的推送 (手动锁定英雄后, 之前的推送不应再覆盖)"""
+        while True:
+            try:
+                self.hero_events.get_nowait()
+            except queue.Empty:
+                return
+
+    def _switch_hero(self, hero, source):
+        old = self.current_hero
+        self.current_hero = hero
+        print(f"英雄已切换 ({source}): {old} → {hero}")
+        self._gui(event="hero_found", hero=hero, source=source)
+        self.overlay_queue.put({"cmd": "STATUS", "data": f"已切换: {hero}\n按 F6 分析"})
+
     def set_hero(self, hero_name):
         """手动设置英雄 (供 GUI 调用)"""
         validated = self._validate_hero(hero_name)
         if validated:
+            self._drain_hero_events()
             self.current_hero = validated
             print(f"✅ 已手动锁定英雄: {validated}")
             self._gui(event="hero_found", hero=validated, source="手动输入")
@@ -161,13 +229,12 @@ class GUIController(threading.Thread):
         self._gui(event="status", status="connecting")
         print("正在连接英雄联盟客户端...")
 
-        for attempt in range(15):  # 30秒轮询
+        # 最多30秒: 已订阅事件时等待推送, 否则每2秒轮询
+        hero, source = self._try_auto_detect(verbose=True)
+        for attempt in range(15):
             if not self.running:
                 return
 
-            # 第一次和每5次详细输出
-            verbose = (attempt == 0 or attempt % 5 == 0)
-            hero, source = self._try_auto_detect(verbose=verbose)
             if hero:
                 self.current_hero = hero
                 print(f"✅ 自动识别到英雄: [{hero}] (来源: {source})")
@@ -180,7 +247,12 @@ class GUIController(threading.Thread):
                 break
 
             self._gui(event="status", status="waiting", attempt=attempt)
-            time.sleep(2)
+            if self.lcu_events is not None:
+                hero, source = self._next_hero_event(2)
+            else:
+                self._stopped.wait(2)
+                # 每5次详细输出
+                hero, source = self._try_auto_detect(verbose=(attempt + 1) % 5 == 0)
 
         # 超时未检测到
         print("暂未检测到英雄，可在上方手动输入英雄名")
@@ -199,6 +271,11 @@ class GUIController(threading.Thread):
         while self.running:
             now = time.time()
 
+            # LCU 推送的英雄变化 (选人阶段随机 / 交换, 进入对局), 无需按 F7
+            hero, source = self._next_hero_event()
+            if hero and hero != self.current_hero:
+                self._switch_hero(hero, source)
+
             # F6 - 分析海克斯
             if keyboard.is_pressed('f6') and now - self._last_f6 > 1.0:
                 self._last_f6 = now
@@ -206,13 +283,14 @@ class GUIController(threading.Thread):
                     self.overlay_queue.put({"cmd": "STATUS", "data": "⚠ 尚未锁定英雄\n请按 F7 获取"})
                     self._gui(event="status", status="no_hero_warning")
                 else:
-                    self._gui(event="status", status="analyzing", hero=self.current_hero)
                     self.overlay_queue.put({"cmd": "STATUS", "data": f"🔎 分析 [{self.current_hero}]..."})
-                    print(f"正在分析: {self.current_hero}...")
-                    results = self.analyzer.analyze(self.current_hero)
-                    self.overlay_queue.put({"cmd": "UPDATE", "data": results})
-                    self._gui(event="status", status="analyzed", hero=self.current_hero)
-                    print(f"分析完成: {self.current_hero}")
+                    self._analyze()
+                    self.watcher.notify_analyzed()
+
+            # 监视模式 - 检测到海克斯选择界面时自动分析
+            elif self.current_hero and self.watcher.poll():
+                print("监视模式: 检测到海克斯选择界面")
+                self._analyze(auto=True)
 
             # F7 - 刷新英雄
             if keyboard.is_pressed('f7') and now - self._last_f7 > 1.0:
@@ -221,11 +299,7 @@ class GUIController(threading.Thread):
                 self.overlay_queue.put({"cmd": "STATUS", "data": "刷新英雄..."})
                 hero, source = self._try_auto_detect()
                 if hero and hero != self.current_hero:
-                    old = self.current_hero
-                    self.current_hero = hero
-                    print(f"英雄已切换 ({source}): {old} → {hero}")
-                    self._gui(event="hero_found", hero=hero, source=source)
-                    self.overlay_queue.put({"cmd": "STATUS", "data": f"已切换: {hero}\n按 F6 分析"})
+                    self._switch_hero(hero, source)
                 elif hero:
                     self._gui(event="hero_confirmed", hero=hero)
                     self.overlay_queue.put({"cmd": "STATUS", "data": f"当前: {hero}\n按 F6 分析"})
@@ -241,6 +315,11 @@ class GUIController(threading.Thread):
                 time.sleep(0.5)
                 return  # 退出 listening_phase, 回到 auto_detect
 
+            # F9 - 输出性能统计
+            if keyboard.is_pressed('f9') and now - self._last_f9 > 1.0:
+                self._last_f9 = now
+                self.print_perf_summary()
+
             time.sleep(0.05)
 
 
@@ -545,6 +624,8 @@ class LauncherApp:
     FONT_BTN    = ("Microsoft YaHei", 11, "bold")
     FONT_LOG    = ("Consolas", 9)
 
+    STOP_TIMEOUT = 5  # 停止引擎时等待控制线程结束的最长时间 (秒)
+
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("ARAM 海克斯助手")
@@ -724,8 +805,8 @@ class LauncherApp:
 
         # ---- 热键提示 ----
         hotkey_frame = tk.Frame(main, bg=self.BG)
-        hotkey_frame.pack(fill=tk.X, pady=(0, 12))
-        hotkeys = [("F6", "分析海克斯"), ("F7", "识别英雄"), ("F8", "重置")]
+        hotkey_frame.pack(fill=tk.X, pady=(0, 6))
+        hotkeys = [("F6", "分析海克斯"), ("F7", "识别英雄"), ("F8", "重置"), ("F9", "性能")]
         for key, desc in hotkeys:
             pill = tk.Frame(hotkey_frame, bg=self.BORDER, padx=1, pady=1)
             pill.pack(side=tk.LEFT, padx=(0, 10))
@@ -736,6 +817,15 @@ class LauncherApp:
             tk.Label(inner, text=desc, font=("Microsoft YaHei", 9),
                      fg=self.TEXT_DIM, bg=self.BG_CARD).pack(side=tk.LEFT)
 
+        # ---- 监视模式开关 ----
+        from scripts.augment_watch import load_watch_settings
+        self.watch_var = tk.BooleanVar(value=load_watch_settings()["enabled"])
+        tk.Checkbutton(main, text="自动检测海克斯界面 (无需按 F6)", variable=self.watch_var,
+                       command=self._toggle_watch, font=("Microsoft YaHei", 9),
+                       fg=self.TEXT_DIM, bg=self.BG, activebackground=self.BG,
+                       activeforeground=self.TEXT, selectcolor=self.BG_CARD,
+                       anchor="w").pack(fill=tk.X, pady=(0, 12))
+
         # ---- 按钮区域 ----
         btn_frame = tk.Frame(main, bg=self.BG)
         btn_frame.pack(fill=tk.X, pady=(0, 12))
@@ -755,10 +845,15 @@ class LauncherApp:
                                      command=self._show_update_dialog)
         self.update_btn.pack(fill=tk.X, pady=(0, 8))
 
-        # 托盘按钮
-        self.tray_btn = ttk.Button(btn_frame, text="最小化到系统托盘",
+        # 托盘按钮 / 性能统计
+        link_frame = tk.Frame(btn_frame, bg=self.BG)
+        link_frame.pack()
+        self.tray_btn = ttk.Button(link_frame, text="最小化到系统托盘",
                                     style='Link.TButton', command=self._minimize_to_tray)
-        self.tray_btn.pack()
+        self.tray_btn.pack(side=tk.LEFT)
+        self.perf_btn = ttk.Button(link_frame, text="性能统计",
+                                   style='Link.TButton', command=GUIController.print_perf_summary)
+        self.perf_btn.pack(side=tk.LEFT)
 
         # ---- 日志面板 ----
         log_header = tk.Frame(main, bg=self.BG)
@@ -826,9 +921,12 @@ class LauncherApp:
                 from main import GameAnalyzer, OverlayApp
                 from scripts.lcu_connector import LCUConnector
 
-                # 初始化分析器 (加载 OCR 模型)
+                # 初始化分析器 (加载 OCR 模型; 开启进程池时同时启动 OCR 工作进程)
                 self.analyzer = GameAnalyzer(self.dm)
-                self._log("✅ OCR 引擎就绪")
+                mode = f"{self.analyzer.ocr_mode} 模式"
+                if self.analyzer.pool is not None:
+                    mode += f", {self.analyzer.pool.workers} 个工作进程"
+                self._log(f"✅ OCR 引擎就绪 ({mode})")
 
                 # 初始化 LCU 连接器
                 champions_json = os.path.join(self.dm.data_dir, 'champions.json')
@@ -863,7 +961,7 @@ class LauncherApp:
 
             self.engine_running = True
             self._set_status("运行中", self.SUCCESS)
-            self._log("✅ 引擎已启动! F6=分析 | F7=识别 | F8=重置")
+            self._log("✅ 引擎已启动! F6=分析 | F7=识别 | F8=重置 | F9=性能统计")
             self._start_pulse()
 
             # 启动托盘
@@ -892,8 +990,21 @@ class LauncherApp:
         """清理引擎资源"""
         self.engine_running = False
         if self.controller:
+            # 分析器与 LCU 会话由控制线程退出时释放 (可能正在 analyze_iter 中, 不能在此关闭);
+            # 等它结束再返回, 避免重新开始时两个控制线程同时运行
             self.controller.stop()
+            self.controller.join(self.STOP_TIMEOUT)
+            if self.controller.is_alive():
+                self._log("⚠ 后台线程仍在结束当前分析, 完成后自动释放资源")
             self.controller = None
+        else:
+            # 控制线程尚未创建 (启动失败): 直接关闭
+            if self.analyzer:
+                self.analyzer.close()
+            if self.lcu:
+                self.lcu.close()
+        self.analyzer = None
+        self.lcu = None
         if self.overlay_window:
             try:
                 self.overlay_window.destroy()
@@ -1064,6 +1175,17 @@ class LauncherApp:
     # 手动英雄输入
     # ==========================================
 
+    def _toggle_watch(self):
+        """切换监视模式: 写入 data/watch.json, 引擎运行中时立即生效"""
+        from scripts.augment_watch import load_watch_settings, save_watch_settings
+        enabled = self.watch_var.get()
+        settings = load_watch_settings()
+        settings["enabled"] = enabled
+        save_watch_settings(settings)
+        if self.controller:
+            self.controller.watcher.set_enabled(enabled)
+        self._log("👁 已开启自动检测海克斯界面" if enabled else "已关闭自动检测, 按 F6 分析")
+
     def _on_entry_focus_in(self, event):
         if self.hero_entry.get() == "输入英雄名/拼音...":
             self.hero_entry.delete(0, tk.END)
@@ -1253,4 +1375,6 @@ def main():
 
 
 if __name__ == '__main__':
+    # OCR 进程池使用 spawn 启动子进程, 打包后的 EXE 需要 freeze_support
+    multiprocessing.freeze_support()
     main()
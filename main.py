@@ -1,36 +1,48 @@
 import time
 import json
-import csv
 import os
 import sys
+import multiprocessing
 import threading
 import queue
 import tkinter as tk
 import ctypes
-import msvcrt  # 用于清除输入缓冲区
+try:
+    import msvcrt  # 用于清除输入缓冲区
+except ImportError:
+    msvcrt = None  # 非 Windows (离线回放 / 基准测试) 无需清空输入缓冲区
 import numpy as np
-from PIL import Image
+import cv2
 import mss
 import keyboard
 from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor
-from thefuzz import process, fuzz
-from scripts.config import BASE_DIR, DATA_DIR
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from thefuzz import process
+from scripts.config import BASE_DIR, DATA_DIR, AUGMENT_DB_FILE
 from scripts.lcu_connector import LCUConnector
-from rapidocr_onnxruntime import RapidOCR
+from scripts.augment_db import load_snapshot, AugmentStore
+from scripts.augment_match import AugmentIndex
+from scripts.ocr_cache import OcrCache, region_key, thumb_distance
+from scripts.perf import monitor
+from scripts.capture import MssCapture, grab_regions
+from scripts.augment_watch import AugmentWatcher, load_watch_settings
+from scripts.ocr_calibration import load_or_calibrate
+from scripts.ocr_vocab import VocabDecoder, install_charset
+from scripts.ocr_workers import OcrWorkerPool, WorkerError
+from scripts.ocr_pipeline import OCR_MODES, RegionBuffers, compute_regions, create_engine, load_engine_settings, ocr_single, ocr_stitched, ocr_recognize
 
 # ================= 配置与常量 =================
 
 def get_regions():
     """根据当前屏幕分辨率动态计算海克斯文字截取区域 (以 2K 2560x1440 为基准等比缩放)"""
-    with mss.mss() as sct:
-        mon = sct.monitors[1]  # 主显示器
-        W, H = mon['width'], mon['height']
-    return {
-        "hex_1": {'top': int(H * 0.375),  'left': int(W * 0.2539), 'width': int(W * 0.125), 'height': int(H * 0.0417)},
-        "hex_2": {'top': int(H * 0.375),  'left': int(W * 0.4414), 'width': int(W * 0.125), 'height': int(H * 0.0417)},
-        "hex_3": {'top': int(H * 0.375),  'left': int(W * 0.625),  'width': int(W * 0.125), 'height': int(H * 0.0417)},
-    }
+    try:
+        with mss.mss() as sct:
+            mon = sct.monitors[1]  # 主显示器
+            W, H = mon['width'], mon['height']
+    except Exception:
+        # 无显示器环境 (离线回放): 按 2K 基准, 实际区域由截图后端的分辨率决定
+        W, H = 2560, 1440
+    return compute_regions(W, H)
 
 REGIONS = get_regions()
 
@@ -48,6 +60,8 @@ class DataManager:
     """负责加载和管理静态数据"""
     def __init__(self):
         self.hero_data = {}
+        self.store = None
+        self.augment_index = None
         # 拼音映射改为 defaultdict(list)，支持一个拼音对应多个英雄
         self.pinyin_map = defaultdict(list)
 
@@ -58,80 +72,23 @@ class DataManager:
     def _load_data(self):
         print("--- 正在加载数据资源 ---")
 
-
-
-        # 2. 加载英雄数据 (CSV)
+        # 2. 加载英雄数据 (CSV 编译快照, CSV 变化时自动重建)
         csv_path = os.path.join(self.data_dir, 'hero_augments.csv')
         if not os.path.exists(csv_path):
             print(f"❌ 错误: 找不到文件 {csv_path}")
             print(f"   请确认该文件位于: {self.data_dir}")
         else:
             try:
-                encoding = 'utf-8-sig'
-                
-                raw_hero_list = defaultdict(list)
-                with open(csv_path, 'r', encoding=encoding) as f:
-                    reader = csv.reader(f)
-                    header = next(reader, None) # 跳过表头
-                    is_new_format = header and "等级" in header
-                    has_overall_rank = header and "总排名" in header
-                    
-                    for row in reader:
-                        if not row: continue
-                        hero = row[0].strip()
-                        
-                        if has_overall_rank and len(row) >= 6:
-                            # 最新格式: 中文名,英文名,等级,总排名,等级内序号,海克斯名称
-                            tier = row[2].strip()
-                            try: overall_rank = int(row[3])
-                            except (ValueError, IndexError): overall_rank = 999
-                            try: t_rank = int(row[4])
-                            except (ValueError, IndexError): t_rank = 999
-                            name = row[5].strip()
-                            
-                            if hero not in self.hero_data: self.hero_data[hero] = {}
-                            self.hero_data[hero][name] = {
-                                "tier": tier,
-                                "overall_rank": overall_rank,
-                                "t_rank": t_rank
-                            }
-                        elif is_new_format and len(row) >= 5:
-                            # 旧新格式: 中文名,英文名,等级,等级内序号,海克斯名称 (无总排名)
-                            tier = row[2].strip()
-                            try: t_rank = int(row[3])
-                            except (ValueError, IndexError): t_rank = 999
-                            name = row[4].strip()
-                            
-                            if hero not in self.hero_data: self.hero_data[hero] = {}
-                            self.hero_data[hero][name] = {
-                                "tier": tier,
-                                "overall_rank": 999,
-                                "t_rank": t_rank
-                            }
-                        elif not is_new_format and len(row) >= 4:
-                            try: rank = int(row[2])
-                            except (ValueError, IndexError): rank = 999
-                            aug = row[3].strip()
-                            raw_hero_list[hero].append((rank, aug))
-                
-                # 如果存在旧格式的数据，走旧的合并逻辑
-                if raw_hero_list:
-                    for hero, aug_list in raw_hero_list.items():
-                        if hero in self.hero_data: continue # 跳过已被新格式处理的
-                        aug_list.sort(key=lambda x: x[0])
-                        counters = {"白银": 1, "黄金": 1, "棱彩": 1, "未知": 1}
-                        h_dict = {}
-                        for rank, name in aug_list:
-                            tier = "未知"
-                            h_dict[name] = {
-                                "tier": tier, 
-                                "overall_rank": 999,
-                                "t_rank": counters.get(tier, 1)
-                            }
-                            if tier in counters: counters[tier] += 1
-                        self.hero_data[hero] = h_dict
-                
-                print(f"✅ 英雄数据加载完毕: 共 {len(self.hero_data)} 个英雄")
+                t0 = time.perf_counter()
+                snapshot, rebuilt = load_snapshot(csv_path, AUGMENT_DB_FILE)
+                # 紧凑存储: hero_data[hero] 为只读视图, 不再逐行分配字典
+                self.store = AugmentStore(snapshot)
+                self.hero_data = self.store.heroes
+                # 海克斯匹配 (整帧 cdist; n-gram 倒排表仅在检索时按需构建)
+                self.augment_index = AugmentIndex(self.store)
+                elapsed = (time.perf_counter() - t0) * 1000
+                action = "重新编译" if rebuilt else "快照加载"
+                print(f"✅ 英雄数据加载完毕: 共 {len(self.hero_data)} 个英雄 ({action} {elapsed:.0f}ms)")
             except Exception as e:
                 print(f"❌ CSV 读取严重失败: {e}")
 
@@ -170,6 +127,16 @@ class DataManager:
 
         return [], False
 
+    def match_batch(self, hero, texts):
+        """
+        批量匹配一帧内所有卡片的 OCR 文本 (一次相似度矩阵计算)
+        返回: 与 texts 对应的匹配信息列表 (match/score/runner_up/margin/ambiguous)
+        """
+        view = self.hero_data.get(hero)
+        if not view or not self.augment_index:
+            return [None] * len(texts)
+        return self.augment_index.match_batch(texts, view)
+
     def validate_hero(self, name, threshold=80):
         """验证英雄名是否在数据库中，尝试模糊映射"""
         if name in self.hero_data:
@@ -186,13 +153,27 @@ class DataManager:
 class GameAnalyzer:
     """负责 OCR 和 图像处理"""
     TIER_PRIORITY = {"棱彩": 0, "黄金": 1, "白银": 2, "未知": 3}
+    # 帧差缓存: 区域缩略图尺寸 (宽, 高) 与判定为"未变化"的单格最大灰度差阈值
+    # (80x15 每格约半个字宽, 且整除常见分辨率下的区域尺寸, 缩放走快速路径;
+    #  只改一个字的海克斯名称单格差 >= 40, 截图噪声 <= 3)
+    FINGERPRINT_SIZE = (80, 15)
+    FRAME_DIFF_THRESHOLD = 16
 
-    def __init__(self, data_manager):
+    def __init__(self, data_manager, ocr_mode=None, capture=None, use_cache=True, vocab_decode=None, workers=None):
         self.dm = data_manager
-        # OCR 引擎: 降低 det_limit_side_len (默认736→480)
-        # 截取区域 2x 上采样后最大 640px, 480 足以覆盖, 减少检测模型不必要计算
+        # 截图后端 (默认 mss 实时截屏; 离线回放时替换为 ReplayCapture)
+        self.capture = capture or MssCapture()
+        self.regions = REGIONS
+        self._cpu_count = os.cpu_count() or 4
+        self.executor = ThreadPoolExecutor(max_workers=3)
+        # OCR 引擎: 降低 det_limit_side_len (默认736→480), data/ocr_engine.json 可调整会话选项与输入尺寸
+        # 未指定模式时按本机校准配置选择 OCR 模式与 onnxruntime 线程数 (首次启动自动校准)
+        self.engine_settings = load_engine_settings()
         try:
-            self.ocr = RapidOCR(use_angle_cls=False, det_limit_side_len=480)
+            if ocr_mode is None:
+                ocr_mode, self.ocr = self._load_ocr_profile()
+            else:
+                self.ocr = create_engine(settings=self.engine_settings)
         except (KeyError, TypeError, Exception) as e:
             py_ver = f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}"
             print(f"\n❌ OCR 引擎初始化失败: {e}")
@@ -202,135 +183,371 @@ class GameAnalyzer:
             else:
                 print(f"   请尝试: pip install rapidocr_onnxruntime<=1.4.4")
             raise
-        # 根据 CPU 逻辑核心数决定并发策略
-        self._cpu_count = os.cpu_count() or 4
-        self._use_parallel = self._cpu_count >= 12
-        self.executor = ThreadPoolExecutor(max_workers=3)
+        # stitched 为单次拼接推理, rec 为跳过检测的纯识别 (低置信度回退 det+rec)
+        if ocr_mode not in OCR_MODES:
+            raise ValueError(f"未知 OCR 模式: {ocr_mode} (可选: {', '.join(OCR_MODES)})")
+        self.ocr_mode = ocr_mode
+        # 词表约束解码: 识别输出限制在海克斯名称字符集内, rec 模式再按英雄词表做字典树束搜索
+        if vocab_decode is None:
+            vocab_decode = self.engine_settings.get("vocab_decode", False)
+        self.vocab = None
+        if vocab_decode and self.dm.store is not None:
+            install_charset(self.ocr, self.dm.store.names)
+            self.vocab = VocabDecoder(self.ocr, self.dm.store)
+        # 进程外 OCR: 常驻工作进程各持一份模型, 区域图像经共享内存传递 (进程内引擎保留作回退)
+        if workers is None:
+            workers = self.engine_settings.get("ocr_workers", 0)
+        self.pool = None
+        if workers:
+            try:
+                self.pool = OcrWorkerPool(workers, dict(self.engine_settings, vocab_decode=bool(self.vocab))).start()
+                print(f"✅ OCR 进程池就绪 ({workers} 个进程)")
+            except WorkerError as e:
+                print(f"⚠ OCR 进程池启动失败, 使用进程内 OCR: {e}")
+        # 帧差缓存: 区域 -> (缩略图指纹, OCR 文本)，同一界面重复按 F6 时跳过未变化卡片的 OCR
+        self._frame_cache = {}
+        self._frame_hits = 0
+        self._frame_misses = 0
+        # 每个区域预分配的预处理缓冲区 (截图 -> 灰度 -> 上采样 全程不逐帧分配)
+        self._buffers = RegionBuffers()
+        # 持久化 OCR 缓存: 感知哈希 -> 文本，跨会话复用 (已见过的卡片无需推理)
+        # use_cache=False 时关闭帧差缓存与 OCR 缓存 (基准测试需要每帧真实推理)
+        self.use_cache = use_cache
+        self.ocr_cache = OcrCache(max_diff=self.FRAME_DIFF_THRESHOLD) if use_cache else None
+        # 最近一次 analyze 各阶段耗时 (秒): capture / preprocess / cache / ocr / match
+        self.last_timings = {}
         # 预热 OCR 引擎 (消除首次推理的模型加载和内存分配延迟)
         self._warmup()
 
+    def _load_ocr_profile(self):
+        """
+        读取/校准本机 OCR 配置, 返回 (模式, 引擎)。
+        校准本身失败时退回按 CPU 核心数的经验规则 (>=12 线程并发, 否则串行)。
+        """
+        try:
+            profile, engine = load_or_calibrate(self.regions, self.executor, settings=self.engine_settings)
+        except Exception as e:
+            print(f"⚠ OCR 校准失败, 使用默认配置: {e}")
+            return ("parallel" if self._cpu_count >= 12 else "serial"), create_engine(settings=self.engine_settings)
+        if engine is None:
+            engine = create_engine(profile["intra_op_num_threads"], self.engine_settings)
+        return profile["mode"], engine
+
     def _warmup(self):
         """用小图预热 OCR 引擎, 消除首次 F6 的冷启动延迟"""
         try:
             dummy = np.zeros((48, 320), dtype=np.uint8)
             self.ocr(dummy)
-            print(f"OCR 引擎预热完成 (CPU: {self._cpu_count} 线程, {'并发' if self._use_parallel else '串行'}模式)")
+            print(f"OCR 引擎预热完成 (CPU: {self._cpu_count} 线程, {self.ocr_mode} 模式)")
         except Exception:
             pass
 
+    def _update_regions(self):
+        """截图后端提供分辨率时 (离线回放) 按其分辨率计算区域, 否则沿用当前屏幕区域"""
+        size = getattr(self.capture, "size", None)
+        if size and size != getattr(self, "_regions_size", None):
+            self.regions = compute_regions(*size)
+            self._regions_size = size
+
+    def _record(self, stage, seconds, **fields):
+        """记录阶段耗时 (last_timings + 全局性能统计)"""
+        self.last_timings[stage] = seconds
+        monitor.record(stage, seconds, **fields)
+
+    def _mark(self, stage, start, **fields):
+        """记录从 start 至今的阶段耗时, 返回当前时间作为下一阶段起点"""
+        now = time.perf_counter()
+        self._record(stage, now - start, **fields)
+        return now
+
     def capture_all_regions(self):
-        """批量截图: 复用单个 mss 上下文, 避免重复初始化开销"""
+        """单次截取覆盖三个区域的条带, 各卡片为条带缓冲区上的切片, 直接预处理到预分配缓冲区"""
         images = {}
+        t = time.perf_counter()
         try:
-            with mss.mss() as sct:
-                for key, region in REGIONS.items():
-                    monitor = {
-                        "top": int(region["top"]),
-                        "left": int(region["left"]),
-                        "width": int(region["width"]),
-                        "height": int(region["height"]),
-                        "mon": 0
-                    }
-                    raw = sct.grab(monitor)
-                    img = Image.frombytes("RGB", raw.size, raw.rgb)
-                    gray = img.convert("L")
-                    w, h = gray.size
-                    # 2倍上采样提高文字清晰度
-                    resized = gray.resize((w * 2, h * 2), Image.BICUBIC)
-                    images[key] = np.array(resized)
+            self._update_regions()
+            views = grab_regions(self.capture, self.regions)
+            t = self._mark("capture", t)
+            for key, view in views.items():
+                # 灰度 + 2倍上采样提高文字清晰度
+                images[key] = self._buffers.preprocess(key, view)
+            self._mark("preprocess", t)
         except Exception as e:
             print(f"批量截图失败: {e}")
         return images
 
-    def _ocr_and_match(self, key, img, hero_cn):
-        """对单张已截取的图片执行 OCR 识别 + 数据匹配"""
+    def _fingerprint(self, img):
+        """区域指纹: 面积插值缩放到小缩略图 (对抖动/噪声不敏感)"""
+        return cv2.resize(img, self.FINGERPRINT_SIZE, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def _lookup_frame_cache(self, key, fingerprint):
+        """区域像素与上次基本一致时返回上次的 OCR 文本, 否则返回 None"""
+        cached = self._frame_cache.get(key)
+        if cached is None or cached[0].shape != fingerprint.shape:
+            return None
+        # 取单格最大差而非平均差: 一个字的变化只影响少数格子, 平均后会被淹没
+        if thumb_distance(cached[0], fingerprint) > self.FRAME_DIFF_THRESHOLD:
+            return None
+        return cached[1]
+
+    def _ocr_text(self, key, img):
+        """对单张已截取的图片执行 OCR, 返回清洗后的文本 (失败返回 None)"""
+        if img is None:
+            return None
         try:
-            if img is None:
-                return {"key": key, "text": "截图错误", "error": True}
-
-            res_ocr, _ = self.ocr(img)
-            txt = "".join([line[1] for line in res_ocr]) if res_ocr else ""
-            txt = txt.replace(" ", "").replace(".", "")
-
-            res = {
-                "key": key, "valid": False, "rank": 999, 
-                "text": "", "highlight": False, "error": False
-            }
-
-            if not txt:
-                res["text"] = "❌ 无文字"
-                res["error"] = True
-                return res
-
-            hero_augments = self.dm.hero_data.get(hero_cn, {})
-            if not hero_augments:
-                res["text"] = "无数据"
-                res["error"] = True
-                return res
-
-            match_name = None
-            
-            # 1. 精确匹配 (O(1))
-            if txt in hero_augments:
-                match_name = txt
-            else:
-                # 2. 模糊匹配 (使用精确比例 fuzz.ratio，避免子串过分匹配)
-                match, score = process.extractOne(txt, list(hero_augments.keys()), scorer=fuzz.ratio)
-                if score > 60:
-                    match_name = match
-
-            if match_name:
-                info = hero_augments[match_name]
-                tier = info.get('tier', '?')
-                t_rank = info.get('t_rank', '?')
-                overall_rank = info.get('overall_rank', '?')
-                # 格式化显示内容: 方案A
-                res["text"] = f"【{match_name}】\n总No.{overall_rank} | {tier} No.{t_rank}"
-                res["valid"] = True
-                res["tier"] = tier
-                res["t_rank"] = info.get('t_rank', 999)
-                res["overall_rank"] = info.get('overall_rank', 999)
-            else:
-                res["text"] = "❌ 未识别"
-                res["error"] = True
-            
-            return res
-            
+            with monitor.stage("ocr_card", key=key, mode=self.ocr_mode):
+                return ocr_single(self.ocr, img)
         except Exception as e:
             print(f"处理异常 ({key}): {e}")
-            return {"key": key, "text": "Error", "error": True}
+            return None
 
-    def analyze(self, hero_cn):
-        if not hero_cn: return {}
-        print(f"正在分析: {hero_cn}...")
-        
-        # 阶段1: 批量截图 (复用 mss 上下文, 总耗时 ~18ms)
-        images = self.capture_all_regions()
-        
-        # 阶段2: OCR 识别 + 匹配 (自适应并发策略)
-        results = {}
-        valid_matches = []
-
-        if self._use_parallel:
-            # 高端 CPU (>=12 线程): 并发 OCR, 充分利用多核
-            futures = []
-            for key in images:
-                futures.append(self.executor.submit(self._ocr_and_match, key, images[key], hero_cn))
-            for f in futures:
+    def _ocr_stitched(self, images):
+        """拼接模式: 所有区域一次推理 (失败时各区域均返回 None)"""
+        valid = {key: img for key, img in images.items() if img is not None}
+        texts = dict.fromkeys(images)
+        if not valid:
+            return texts
+        try:
+            texts.update(ocr_stitched(self.ocr, valid))
+        except Exception as e:
+            print(f"拼接识别异常: {e}")
+        return texts
+
+    def _ocr_pool(self, images, hero_cn):
+        """
+        进程池识别; 工作进程异常时关闭进程池并返回 None,
+        由调用方改用进程内 OCR (本帧及之后)
+        """
+        valid = {key: img for key, img in images.items() if img is not None}
+        texts = dict.fromkeys(images)
+        if not valid:
+            return texts
+        pool = self.pool  # close() 可能在识别过程中把 self.pool 置空
+        try:
+            if pool is None:
+                raise WorkerError("进程池已关闭")
+            texts.update(pool.run(self.ocr_mode, valid, hero_cn))
+        except WorkerError as e:
+            print(f"⚠ OCR 进程池异常, 改用进程内 OCR: {e}")
+            if pool is not None:
+                pool.close()
+            self.pool = None
+            return None
+        return texts
+
+    def close(self):
+        """释放 OCR 进程池与线程池并写回 OCR 缓存 (停止引擎 / 程序退出时调用)"""
+        if self.ocr_cache is not None:
+            self.ocr_cache.close()
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+        self.executor.shutdown(wait=False)
+
+    def _ocr_recognize(self, images, hero_cn=None):
+        """纯识别模式: 跳过检测模型, 低置信度的卡片回退到 det+rec"""
+        valid = {key: img for key, img in images.items() if img is not None}
+        texts = dict.fromkeys(images)
+        if not valid:
+            return texts
+        try:
+            hero_view = self.dm.hero_data.get(hero_cn) if self.vocab else None
+            result, fallback = ocr_recognize(self.ocr, valid, vocab=self.vocab, hero_view=hero_view)
+            texts.update(result)
+            if fallback:
+                print(f"纯识别置信度不足, 已回退 det+rec: {', '.join(fallback)}")
+        except Exception as e:
+            print(f"纯识别异常: {e}")
+        return texts
+
+    def _build_result(self, key, txt, match, hero_augments):
+        """根据 OCR 文本与批量匹配结果生成单张卡片的显示数据"""
+        if txt is None:
+            return {"key": key, "text": "截图错误", "error": True}
+
+        res = {
+            "key": key, "valid": False, "rank": 999,
+            "text": "", "highlight": False, "error": False
+        }
+
+        if not txt:
+            res["text"] = "❌ 无文字"
+            res["error"] = True
+            return res
+
+        if not hero_augments:
+            res["text"] = "无数据"
+            res["error"] = True
+            return res
+
+        match_name = match["match"] if match else None
+        if match_name:
+            info = hero_augments[match_name]
+            tier = info.get('tier', '?')
+            t_rank = info.get('t_rank', '?')
+            overall_rank = info.get('overall_rank', '?')
+            # 格式化显示内容: 方案A
+            res["text"] = f"【{match_name}】\n总No.{overall_rank} | {tier} No.{t_rank}"
+            res["name"] = match_name
+            res["valid"] = True
+            res["tier"] = tier
+            res["t_rank"] = info.get('t_rank', 999)
+            res["overall_rank"] = info.get('overall_rank', 999)
+            res["score"] = match["score"]
+            res["runner_up"] = match["runner_up"]
+            res["ambiguous"] = match["ambiguous"]
+            if match["ambiguous"]:
+                print(f"⚠ {key} 识别存疑: {match_name}({match['score']:.0f}) / "
+                      f"{match['runner_up']}({match['runner_up_score']:.0f}) [OCR: {txt}]")
+        else:
+            res["text"] = "❌ 未识别"
+            res["error"] = True
+
+        return res
+
+    def _ocr_stream(self, pending, hero_cn):
+        """
+        按完成顺序产出 {key: OCR 文本}:
+        serial / parallel 模式逐张产出, rec / stitched / 进程池模式整批识别后一次产出
+        """
+        if self.pool is not None:
+            texts = self._ocr_pool(pending, hero_cn)
+            if texts is not None:
+                yield texts
+                return
+            # 进程池失效: 本帧按当前模式在进程内识别 (与未开启进程池时同一路径)
+        if self.ocr_mode == "rec":
+            # 纯识别模式: 跳过检测, 三张一批识别
+            yield self._ocr_recognize(pending, hero_cn)
+        elif self.ocr_mode == "stitched" and len(pending) > 1:
+            # 拼接模式: 1 次检测 + 1 批识别
+            yield self._ocr_stitched(pending)
+        elif self.ocr_mode == "parallel" and len(pending) > 1:
+            # 高端 CPU (>=12 线程): 并发 OCR, 先完成的卡片先产出
+            futures = {self.executor.submit(self._ocr_text, key, img): key for key, img in pending.items()}
+            for f in as_completed(futures):
                 try:
-                    data = f.result()
-                    results[data["key"]] = data
-                    if data.get("valid"): valid_matches.append(data)
+                    text = f.result()
                 except Exception as e:
                     print(f"并发任务异常: {e}")
+                    text = None
+                yield {futures[f]: text}
         else:
             # 低端 CPU (<12 线程): 串行 OCR, 避免缓存争抢和线程切换开销
-            for key, img in images.items():
-                data = self._ocr_and_match(key, img, hero_cn)
-                results[data["key"]] = data
-                if data.get("valid"): valid_matches.append(data)
+            for key, img in pending.items():
+                yield {key: self._ocr_text(key, img)}
+
+    def _ocr_batched(self, count):
+        """
+        count 张卡片的 OCR 是否整批执行 (与 _ocr_stream 的分派一致)。
+        整批时单卡耗时无法单独测量, 由 analyze_iter 按卡片数均摊记录;
+        逐张识别时 _ocr_text 已自行记录, 不能重复记录。
+        """
+        return (self.pool is not None or self.ocr_mode == "rec"
+                or (self.ocr_mode == "stitched" and count > 1))
+
+    def analyze_iter(self, hero_cn):
+        """
+        流式分析: 每张卡片匹配完成即产出, 不必等待最慢的卡片。
+
+        产出 ("card", 卡片结果) 若干次 (缓存命中的卡片最先产出, 其余按 OCR 完成顺序)，
+        最后产出 ("done", {key: 卡片结果}), 其中已标记最优推荐 (highlight)。
+        """
+        if not hero_cn:
+            yield "done", {}
+            return
+        print(f"正在分析: {hero_cn}...")
+        self.last_timings = {}
+        monitor.begin_frame()
+        t_start = time.perf_counter()
+
+        # 阶段1: 单次条带截图 + 预处理
+        images = self.capture_all_regions()
+        
+        # 阶段2: 帧差缓存 (未变化的卡片直接复用上次 OCR 结果)
+        #        未命中再查持久化感知哈希缓存 (历史对局见过的卡片, 帧差指纹兼作近似查找的缩略图)
+        t = time.perf_counter()
+        texts, pending, fingerprints, cache_keys = {}, {}, {}, {}
+        hits = phash_hits = 0
+        for key, img in images.items():
+            if img is None or not self.use_cache:
+                pending[key] = img
+                continue
+            fingerprints[key] = self._fingerprint(img)
+            cached = self._lookup_frame_cache(key, fingerprints[key])
+            if cached is not None:
+                texts[key] = cached
+                hits += 1
+                continue
+            cache_keys[key] = region_key(self.regions[key], img)
+            cached = self.ocr_cache.get(cache_keys[key], fingerprints[key])
+            if cached is not None:
+                texts[key] = cached
+                phash_hits += 1
+                self._frame_cache[key] = (fingerprints[key], cached)
+            else:
+                pending[key] = img
+        if self.use_cache:
+            self._frame_hits += hits
+            self._frame_misses += len(images) - hits
+            print(f"帧差缓存: 命中 {hits} / 未命中 {len(images) - hits} "
+                  f"(累计 命中 {self._frame_hits} / 未命中 {self._frame_misses}) | "
+                  f"OCR 缓存: 命中 {phash_hits} / 推理 {len(pending)} "
+                  f"(累计 命中 {self.ocr_cache.hits} / 未命中 {self.ocr_cache.misses})")
+        t = self._mark("cache", t)
+
+        # 阶段3+4: OCR 识别与匹配交替进行, 每批就绪的卡片立即匹配并产出
+        #          (serial / parallel / stitched / rec, 开启进程池时在工作进程中执行)
+        hero_augments = self.dm.hero_data.get(hero_cn, {})
+        results = {}
+        ocr_time = match_time = 0.0
+
+        def match(ready):
+            nonlocal match_time
+            t0 = time.perf_counter()
+            keys = list(ready)
+            matches = self.dm.match_batch(hero_cn, [ready[k] or "" for k in keys])
+            cards = [self._build_result(k, ready[k], m, hero_augments) for k, m in zip(keys, matches)]
+            results.update((card["key"], card) for card in cards)
+            match_time += time.perf_counter() - t0
+            return cards
+
+        from_cache = dict(texts) if texts else None  # 缓存命中的卡片不等待 OCR
+        stream = self._ocr_stream(pending, hero_cn) if pending else iter(())
+        while True:
+            if from_cache:
+                ready, from_cache = from_cache, None
+            else:
+                t = time.perf_counter()
+                ready = next(stream, None)
+                ocr_time += time.perf_counter() - t
+                if ready is None:
+                    break
+                texts.update(ready)
+            for card in match(ready):
+                if "first_card" not in self.last_timings:
+                    self._mark("first_card", t_start)
+                yield "card", card
+
+        if self._ocr_batched(len(pending)) and pending:
+            # 批量模式 / 进程池: 单卡耗时按卡片数均摊
+            for key in pending:
+                monitor.record("ocr_card", ocr_time / len(pending), key=key, mode=self.ocr_mode, batched=True)
+        self._record("ocr", ocr_time, cards=len(pending))
+        self._record("match", match_time)
+
+        if self.use_cache:
+            for key in pending:
+                if texts[key] is not None and key in fingerprints:
+                    self._frame_cache[key] = (fingerprints[key], texts[key])
+                    # 只持久化匹配成功的文本 (误识别/过渡帧不跨会话固化), 写盘在后台进行
+                    if results.get(key, {}).get("valid"):
+                        self.ocr_cache.put(cache_keys[key], texts[key], fingerprints[key])
 
         # 计算最优推荐：总排名优先（越小越好），总排名相同则按等级排序
+        t = time.perf_counter()
+        results = {key: results[key] for key in images if key in results}
+        valid_matches = [data for data in results.values() if data.get("valid")]
         if valid_matches:
             def sort_key(item):
                 o_rank = item.get('overall_rank', 999)
@@ -343,8 +560,17 @@ class GameAnalyzer:
             for item in valid_matches:
                 if sort_key(item) == best_key:
                     results[item['key']]["highlight"] = True
-        
-        return results
+
+        self._mark("recommend", t)
+        self._mark("analyze", t_start, hero=hero_cn)
+        yield "done", results
+
+    def analyze(self, hero_cn):
+        """一次性分析: 全部卡片完成后返回 {key: 卡片结果} (逐张产出见 analyze_iter)"""
+        for event, data in self.analyze_iter(hero_cn):
+            if event == "done":
+                return data
+        return {}
 
 # ================= 3. UI 界面 (View) =================
 
@@ -354,6 +580,8 @@ class OverlayApp:
         self.queue = queue
         self.labels = {}
         self.hide_timer = None
+        self._stream = None        # 正在逐张显示的分析 (以分析开始时间标识)
+        self._first_shown = None   # 已记录首次显示耗时的分析
         
         # 先隐藏窗口，避免配置透明前闪白框
         self.root.withdraw()
@@ -401,7 +629,15 @@ class OverlayApp:
                 data = msg.get("data")
                 
                 if cmd == "UPDATE":
-                    self.update_display(data)
+                    with monitor.stage("render"):
+                        self.update_display(data)
+                        self.root.update_idletasks()
+                    self._record_first_visible(msg.get("started"))
+                elif cmd == "CARD":
+                    with monitor.stage("render"):
+                        self.show_card(data, msg.get("started"))
+                        self.root.update_idletasks()
+                    self._record_first_visible(msg.get("started"))
                 elif cmd == "STATUS":
                     self.show_status(data)
                 elif cmd == "CLEAR":
@@ -426,36 +662,78 @@ class OverlayApp:
         # 状态提示2秒后消失
         self.hide_timer = self.root.after(2000, self.clear_display)
 
-    def update_display(self, results):
-        self.clear_display()
-        
+    def _record_first_visible(self, started):
+        """F6 到悬浮窗首次显示该次分析结果的耗时 (含分析、队列等待与渲染)"""
+        if started is None or started == self._first_shown:
+            return
+        self._first_shown = started
+        monitor.record("first_visible", time.perf_counter() - started)
+
+    def _place_card(self, key, info):
+        if not info.get("text"):
+            return
         # 强制对齐 Y 轴
         base_y_abs = REGIONS['hex_1']['top']
         fixed_rel_y = base_y_abs - self.offset_y - 120
 
-        for key, info in results.items():
-            if not info.get("text"): continue
-            
-            lbl = self.labels[key]
-            # 颜色逻辑
-            if info["error"]:
-                fg = COLORS["error"]
-            elif info["highlight"]:
-                fg = COLORS["best"]
-            else:
-                fg = COLORS["normal"]
-            
-            lbl.config(text=info["text"], fg=fg)
-            
-            r_left = REGIONS[key]['left'] - self.offset_x
-            lbl.place(x=r_left, y=fixed_rel_y, anchor="nw")
-            lbl.lift()
+        lbl = self.labels[key]
+        # 颜色逻辑
+        if info["error"]:
+            fg = COLORS["error"]
+        elif info.get("highlight"):
+            fg = COLORS["best"]
+        else:
+            fg = COLORS["normal"]
+
+        lbl.config(text=info["text"], fg=fg)
 
+        r_left = REGIONS[key]['left'] - self.offset_x
+        lbl.place(x=r_left, y=fixed_rel_y, anchor="nw")
+        lbl.lift()
+
+    def _restart_hide_timer(self):
         # 结果显示5秒后消失
+        if self.hide_timer:
+            self.root.after_cancel(self.hide_timer)
         self.hide_timer = self.root.after(5000, self.clear_display)
 
+    def show_card(self, info, started=None):
+        """流式显示单张卡片 (新一次分析的第一张卡片先清掉状态提示与上次结果)"""
+        if started is None or started != self._stream:
+            self.clear_display()
+            self._stream = started
+        self._place_card(info["key"], info)
+        self._restart_hide_timer()
+
+    def update_display(self, results):
+        """显示一次分析的全部卡片 (含最优推荐高亮)"""
+        self.clear_display()
+        for key, info in results.items():
+            self._place_card(key, info)
+        self._restart_hide_timer()
+
 # ================= 4. 控制逻辑 (Controller) =================
 
+def stream_analysis(analyzer, hero_cn, out_queue, quiet=False):
+    """
+    流式分析并推送到悬浮窗: 每张卡片完成即发送 CARD, 全部完成后发送带最优推荐高亮的 UPDATE。
+    消息中的 started (分析开始时间) 用于悬浮窗区分不同次分析并统计首次显示耗时。
+    quiet: 只显示识别成功的卡片, 一张都没有时不显示 (监视模式自动触发, 避免误判时弹出错误提示)
+    """
+    started = time.perf_counter()
+    results = {}
+    for event, data in analyzer.analyze_iter(hero_cn):
+        if event == "card":
+            if not (quiet and data.get("error")):
+                out_queue.put({"cmd": "CARD", "data": data, "started": started})
+        else:
+            results = data
+    shown = {key: info for key, info in results.items() if info.get("valid")} if quiet else results
+    if shown or not quiet:
+        out_queue.put({"cmd": "UPDATE", "data": shown, "started": started})
+    return results
+
+
 class InputController(threading.Thread):
     def __init__(self, app_queue, data_manager, analyzer, lcu_connector=None):
         super().__init__(daemon=True)
@@ -467,6 +745,12 @@ class InputController(threading.Thread):
         self._last_f6 = 0
         self._last_f7 = 0
         self._last_f8 = 0
+        self._last_f9 = 0
+        # 监视模式 (data/watch.json): 检测到海克斯选择界面时自动分析
+        self.watcher = AugmentWatcher(analyzer.regions, settings=load_watch_settings())
+        # LCU 事件推送的英雄变化 (英雄, 来源); 未订阅 (无 websocket-client) 时退回轮询
+        self.hero_events = queue.Queue()
+        self.lcu_events = self.lcu.subscribe(self._on_lcu_champion) if self.lcu else None
 
     def run(self):
         while True:
@@ -475,6 +759,8 @@ class InputController(threading.Thread):
 
     def flush_input(self):
         """强制清空标准输入缓冲区"""
+        if msvcrt is None:
+            return
         while msvcrt.kbhit():
             msvcrt.getch()
 
@@ -483,18 +769,45 @@ class InputController(threading.Thread):
         return self.dm.validate_hero(name)
 
     def _try_auto_detect(self):
-        """使用 LCU 统一接口自动获取英雄，返回 (英雄中文名|None, 来源)"""
+        """使用 LCU 统一接口 (并发查询) 自动获取英雄，返回 (英雄中文名|None, 来源)"""
         if not self.lcu:
             return None, ""
-        hero, source = self.lcu.get_champion_auto()
+        hero, source = self.lcu.get_champion_race()
         if hero:
             validated = self._validate_hero(hero)
             if validated:
                 return validated, source
         return None, source
 
+    def _on_lcu_champion(self, hero, source):
+        """LCU 事件线程回调: 只入队, 由本线程处理"""
+        self.hero_events.put((hero, source))
+
+    def _next_hero_event(self, timeout=0):
+        """取一个推送的英雄变化 (最多等待 timeout 秒)，返回 (英雄中文名|None, 来源)"""
+        try:
+            hero, source = self.hero_events.get(timeout=timeout) if timeout > 0 else self.hero_events.get_nowait()
+        except queue.Empty:
+            return None, ""
+        validated = self._validate_hero(hero)
+        return (validated, source) if validated else (None, source)
+
+    def _drain_hero_events(self):
+        """丢弃未处理的推送 (手动锁定英雄后, 之前的推送不应再覆盖)"""
+        while True:
+            try:
+                self.hero_events.get_nowait()
+            except queue.Empty:
+                return
+
+    def _switch_hero(self, hero, source):
+        old = self.current_hero
+        self.current_hero = hero
+        print(f">>> 英雄已切换 ({source}): {old} -> {hero}")
+        self.queue.put({"cmd": "STATUS", "data": f"已切换: {hero}\n按 F6 分析"})
+
     # ==========================================
-    # 阶段1: 选择英雄 (自动轮询 + 手动备用)
+    # 阶段1: 选择英雄 (自动检测 + 手动备用)
     # ==========================================
 
     def select_hero_phase(self):
@@ -508,12 +821,12 @@ class InputController(threading.Thread):
         print("=== ARAM Hextech Helper ===")
         print("    F6=分析 | F7=刷新英雄 | F8=手动输入\n")
 
-        # ====== 尝试自动检测 (轮询最多30秒) ======
+        # ====== 尝试自动检测 (最多30秒: 已订阅事件时等待推送, 否则每2秒轮询) ======
         if self.lcu:
             print("[Auto] 正在连接英雄联盟客户端...")
 
-            for attempt in range(15):  # 每2秒检测，共30秒
-                hero, source = self._try_auto_detect()
+            hero, source = self._try_auto_detect()
+            for attempt in range(15):
                 if hero:
                     self.current_hero = hero
                     print(f"\n>>> 自动识别到英雄: [{hero}] (数据源: {source})")
@@ -530,7 +843,11 @@ class InputController(threading.Thread):
 
                 dots = "." * ((attempt % 3) + 1)
                 print(f"\r[Auto] 等待选取英雄{dots}   ", end="", flush=True)
-                time.sleep(2)
+                if self.lcu_events is not None:
+                    hero, source = self._next_hero_event(2)
+                else:
+                    time.sleep(2)
+                    hero, source = self._try_auto_detect()
             else:
                 # 30秒后没搜到，不锁在死循环里，直接进入监听模式
                 print("\n[Auto] 暂未自动识别到英雄。将切入后台继续运行。")
@@ -592,6 +909,7 @@ class InputController(threading.Thread):
                     print(f"数据库暂无【{selected_name}】的数据")
                     continue
                 self.current_hero = validated
+                self._drain_hero_events()
                 print(f">>> 已锁定: {validated}")
                 print(f">>> F6=分析 | F7=刷新 | F8=手动")
                 self.queue.put({"cmd": "STATUS", "data": f"当前: {validated}\n按 F6 分析 | F7 刷新"})
@@ -604,11 +922,18 @@ class InputController(threading.Thread):
 
     def listening_phase(self):
         self.flush_input()
-        print(f"[监听中...] 当前英雄: {self.current_hero} | F6分析 / F7刷新 / F8手动")
+        print(f"[监听中...] 当前英雄: {self.current_hero} | F6分析 / F7刷新 / F8手动 / F9性能统计")
+        if self.watcher.enabled:
+            print("[监视模式] 检测到海克斯选择界面时自动分析")
 
         while True:
             now = time.time()
 
+            # LCU 推送的英雄变化 (选人阶段随机 / 交换, 进入对局), 无需按 F7
+            hero, source = self._next_hero_event()
+            if hero and hero != self.current_hero:
+                self._switch_hero(hero, source)
+
             if keyboard.is_pressed('f6') and now - self._last_f6 > 1.0:
                 self._last_f6 = now
                 if not self.current_hero:
@@ -616,8 +941,11 @@ class InputController(threading.Thread):
                     continue
                 
                 self.queue.put({"cmd": "STATUS", "data": f"🔎 正在分析 [{self.current_hero}]..."})
-                results = self.analyzer.analyze(self.current_hero)
-                self.queue.put({"cmd": "UPDATE", "data": results})
+                stream_analysis(self.analyzer, self.current_hero, self.queue)
+                self.watcher.notify_analyzed()
+            elif self.current_hero and self.watcher.poll():
+                print(f"[监视模式] 检测到海克斯选择界面, 自动分析: {self.current_hero}")
+                stream_analysis(self.analyzer, self.current_hero, self.queue, quiet=True)
 
             if keyboard.is_pressed('f7') and now - self._last_f7 > 1.0:
                 self._last_f7 = now
@@ -625,10 +953,7 @@ class InputController(threading.Thread):
                 self.queue.put({"cmd": "STATUS", "data": "刷新英雄..."})
                 hero, source = self._try_auto_detect()
                 if hero and hero != self.current_hero:
-                    old = self.current_hero
-                    self.current_hero = hero
-                    print(f">>> 英雄已切换 ({source}): {old} -> {hero}")
-                    self.queue.put({"cmd": "STATUS", "data": f"已切换: {hero}\n按 F6 分析"})
+                    self._switch_hero(hero, source)
                 elif hero:
                     self.queue.put({"cmd": "STATUS", "data": f"当前英雄: {hero}\n按 F6 分析"})
                 else:
@@ -639,6 +964,10 @@ class InputController(threading.Thread):
                 time.sleep(0.5)
                 return  # 退出监听，回到 select_hero_phase
 
+            if keyboard.is_pressed('f9') and now - self._last_f9 > 1.0:
+                self._last_f9 = now
+                print(monitor.format_summary())
+
             time.sleep(0.05)
 
 
@@ -700,7 +1029,13 @@ def main():
     try:
         root.mainloop()
     except KeyboardInterrupt:
+        analyzer.close()
+        lcu.close()
         os._exit(0)
+    analyzer.close()
+    lcu.close()
 
 if __name__ == "__main__":
+    # OCR 进程池使用 spawn 启动子进程, 打包后的 EXE 需要 freeze_support
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,435 @@
+"""
+海克斯数据库二进制快照 (编译缓存)
+运行: python -m scripts.augment_db
+
+hero_augments.csv 仍是唯一数据源；本模块把它编译成带版本号的二进制快照
+(字符串表 + 等级/总排名/等级内序号的定长数组 + 英雄偏移索引)，
+启动时通过 mmap 直接映射，免去每次逐行解析 CSV 和三种格式分支判断。
+
+CSV 的 大小/修改时间 变化时自动校验 SHA1，内容确有变化才重新编译。
+
+内存表示 (AugmentStore):
+  不再为每一行分配 {"tier", "overall_rank", "t_rank"} 字典，
+  海克斯名称全局驻留 (所有英雄共用一张名称表)，等级为小整数编码，
+  排名列直接是快照缓冲区上的定长数组，每个英雄只有一个轻量视图对象。
+"""
+import csv
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from collections import defaultdict
+from collections.abc import Mapping
+
+# 兼容直接运行和包导入
+try:
+    from scripts.config import CSV_FILE, AUGMENT_DB_FILE
+except ImportError:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    parent_dir = os.path.dirname(current_dir)
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+    from scripts.config import CSV_FILE, AUGMENT_DB_FILE
+
+
+MAGIC = b"HXDB"
+SNAPSHOT_VERSION = 2
+BYTE_ORDER_MARK = 0xFEFF  # 按本机字节序写入, 读出不一致即视为失效
+RANK_MISSING = 999
+RANK_MAX = 0xFFFF
+
+# 头部: 魔数, 版本, 字节序标记, CSV 大小, CSV mtime(ns), CSV SHA1,
+#       字符串数, 海克斯名称数, 行数, 英雄数, 等级数, 以及 10 个数据段偏移
+_HEADER = struct.Struct("=4sHHQq20sIIIII10Q")
+_SECTIONS = (
+    "str_offsets", "str_blob", "row_name", "row_tier",
+    "row_overall", "row_trank", "tier_names", "hero_names", "hero_start",
+    "name_row",
+)
+
+
+# ================= CSV 解析 (唯一数据源) =================
+
+def parse_csv(csv_path):
+    """
+    解析 hero_augments.csv (兼容三种历史格式)。
+
+    Returns:
+        dict: {英雄: [(海克斯名称, 等级, 总排名, 等级内序号), ...]}，保持 CSV 顺序
+    """
+    hero_rows = {}
+    raw_hero_list = defaultdict(list)
+    with open(csv_path, 'r', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)  # 跳过表头
+        is_new_format = header and "等级" in header
+        has_overall_rank = header and "总排名" in header
+
+        for row in reader:
+            if not row: continue
+            hero = row[0].strip()
+
+            if has_overall_rank and len(row) >= 6:
+                # 最新格式: 中文名,英文名,等级,总排名,等级内序号,海克斯名称
+                tier = row[2].strip()
+                try: overall_rank = int(row[3])
+                except (ValueError, IndexError): overall_rank = RANK_MISSING
+                try: t_rank = int(row[4])
+                except (ValueError, IndexError): t_rank = RANK_MISSING
+                name = row[5].strip()
+                hero_rows.setdefault(hero, {})[name] = (tier, overall_rank, t_rank)
+            elif is_new_format and len(row) >= 5:
+                # 旧新格式: 中文名,英文名,等级,等级内序号,海克斯名称 (无总排名)
+                tier = row[2].strip()
+                try: t_rank = int(row[3])
+                except (ValueError, IndexError): t_rank = RANK_MISSING
+                name = row[4].strip()
+                hero_rows.setdefault(hero, {})[name] = (tier, RANK_MISSING, t_rank)
+            elif not is_new_format and len(row) >= 4:
+                try: rank = int(row[2])
+                except (ValueError, IndexError): rank = RANK_MISSING
+                aug = row[3].strip()
+                raw_hero_list[hero].append((rank, aug))
+
+    # 如果存在旧格式的数据，走旧的合并逻辑
+    for hero, aug_list in raw_hero_list.items():
+        if hero in hero_rows: continue  # 跳过已被新格式处理的
+        aug_list.sort(key=lambda x: x[0])
+        counters = {"白银": 1, "黄金": 1, "棱彩": 1, "未知": 1}
+        h_dict = {}
+        for rank, name in aug_list:
+            tier = "未知"
+            h_dict[name] = (tier, RANK_MISSING, counters.get(tier, 1))
+            if tier in counters: counters[tier] += 1
+        hero_rows[hero] = h_dict
+
+    return {hero: [(name, *info) for name, info in rows.items()]
+            for hero, rows in hero_rows.items()}
+
+
+# ================= 编译 =================
+
+def _file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.digest()
+
+
+def _align(buf, n=8):
+    """将缓冲区补齐到 n 字节边界, 保证各数组段对齐"""
+    pad = (-len(buf)) % n
+    if pad:
+        buf.extend(b"\0" * pad)
+
+
+def compile_snapshot(csv_path):
+    """将 CSV 编译为快照字节串"""
+    hero_rows = parse_csv(csv_path)
+    st = os.stat(csv_path)
+    sha1 = _file_sha1(csv_path)
+
+    strings, string_ids = [], {}
+
+    def intern(s):
+        idx = string_ids.get(s)
+        if idx is None:
+            idx = string_ids[s] = len(strings)
+            strings.append(s)
+        return idx
+
+    # 海克斯名称最先驻留, 保证名称 ID 连续落在 [0, n_names)
+    for rows in hero_rows.values():
+        for row in rows:
+            intern(row[0])
+    n_names = len(strings)
+
+    tiers, tier_ids = [], {}
+    row_name, row_tier = array('I'), array('B')
+    row_overall, row_trank = array('H'), array('H')
+    hero_names, hero_start = array('I'), array('I', [0])
+    # 英雄 x 名称 的稠密查找表: 值为 英雄内行号 + 1, 0 表示该英雄没有此海克斯
+    name_row = array('H', bytes(2 * n_names * len(hero_rows)))
+
+    for hero, rows in hero_rows.items():
+        base = len(hero_names) * n_names
+        hero_names.append(intern(hero))
+        for local, (name, tier, overall_rank, t_rank) in enumerate(rows):
+            if tier not in tier_ids:
+                tier_ids[tier] = len(tiers)
+                tiers.append(tier)
+            row_name.append(intern(name))
+            name_row[base + string_ids[name]] = local + 1
+            row_tier.append(tier_ids[tier])
+            row_overall.append(min(max(overall_rank, 0), RANK_MAX))
+            row_trank.append(min(max(t_rank, 0), RANK_MAX))
+        hero_start.append(len(row_name))
+
+    tier_names = array('I', [intern(t) for t in tiers])
+    encoded = [s.encode('utf-8') for s in strings]
+    str_offsets = array('I', [0])
+    for b in encoded:
+        str_offsets.append(str_offsets[-1] + len(b))
+
+    sections = {
+        "str_offsets": str_offsets.tobytes(),
+        "str_blob": b"".join(encoded),
+        "row_name": row_name.tobytes(),
+        "row_tier": row_tier.tobytes(),
+        "row_overall": row_overall.tobytes(),
+        "row_trank": row_trank.tobytes(),
+        "tier_names": tier_names.tobytes(),
+        "hero_names": hero_names.tobytes(),
+        "hero_start": hero_start.tobytes(),
+        "name_row": name_row.tobytes(),
+    }
+
+    buf = bytearray(_HEADER.size)
+    _align(buf)
+    offsets = []
+    for key in _SECTIONS:
+        offsets.append(len(buf))
+        buf.extend(sections[key])
+        _align(buf)
+
+    _HEADER.pack_into(buf, 0, MAGIC, SNAPSHOT_VERSION, BYTE_ORDER_MARK,
+                      st.st_size, st.st_mtime_ns, sha1,
+                      len(strings), n_names, len(row_name), len(hero_names), len(tiers),
+                      *offsets)
+    return bytes(buf)
+
+
+# ================= 加载 =================
+
+class AugmentSnapshot:
+    """只读快照视图: 所有数组段均为底层缓冲区 (mmap / bytes) 上的 memoryview"""
+
+    def __init__(self, buffer, source=""):
+        self._buffer = buffer
+        self.source = source  # "mmap" | "memory"
+        mv = memoryview(buffer)
+        (magic, version, bom, self.csv_size, self.csv_mtime_ns, self.csv_sha1,
+         n_strings, n_names, n_rows, n_heroes, n_tiers, *offsets) = _HEADER.unpack_from(mv, 0)
+        if magic != MAGIC or version != SNAPSHOT_VERSION or bom != BYTE_ORDER_MARK:
+            raise ValueError("快照格式不匹配")
+
+        off = dict(zip(_SECTIONS, offsets))
+
+        def section(key, fmt, count):
+            size = struct.calcsize(fmt) * count
+            return mv[off[key]:off[key] + size].cast(fmt)
+
+        str_offsets = section("str_offsets", 'I', n_strings + 1)
+        blob = mv[off["str_blob"]:off["str_blob"] + str_offsets[-1]]
+        self.strings = [sys.intern(str(blob[str_offsets[i]:str_offsets[i + 1]], 'utf-8'))
+                        for i in range(n_strings)]
+        self.n_names = n_names
+
+        self.row_name = section("row_name", 'I', n_rows)
+        self.row_tier = section("row_tier", 'B', n_rows)
+        self.row_overall = section("row_overall", 'H', n_rows)
+        self.row_trank = section("row_trank", 'H', n_rows)
+        self.tiers = [self.strings[i] for i in section("tier_names", 'I', n_tiers)]
+        self.hero_names = [self.strings[i] for i in section("hero_names", 'I', n_heroes)]
+        self.hero_start = section("hero_start", 'I', n_heroes + 1)
+        self.name_row = section("name_row", 'H', n_heroes * n_names)
+
+    def __len__(self):
+        return len(self.row_name)
+
+    def hero_range(self, hero_idx):
+        """返回英雄在行数组中的 [start, end) 区间"""
+        return self.hero_start[hero_idx], self.hero_start[hero_idx + 1]
+
+    def iter_rows(self, hero_idx):
+        """逐行产出 (海克斯名称, 等级, 总排名, 等级内序号)"""
+        strings, tiers = self.strings, self.tiers
+        start, end = self.hero_range(hero_idx)
+        for i in range(start, end):
+            yield (strings[self.row_name[i]], tiers[self.row_tier[i]],
+                   self.row_overall[i], self.row_trank[i])
+
+
+# ================= 紧凑内存表示 =================
+
+class HeroAugments(Mapping):
+    """
+    单个英雄的海克斯视图 (只读 Mapping): 名称 -> {"tier", "overall_rank", "t_rank"}
+    行数据留在快照数组中, 仅在取值时组装字典, 用法与旧版 hero_data[hero] 一致。
+    """
+    __slots__ = ("_store", "hero", "hero_idx", "_start", "_end", "_lookup", "_names")
+
+    def __init__(self, store, hero, hero_idx):
+        snap = store.snapshot
+        self._store = store
+        self.hero = hero
+        self.hero_idx = hero_idx
+        self._start, self._end = snap.hero_range(hero_idx)
+        n = snap.n_names
+        self._lookup = snap.name_row[hero_idx * n:(hero_idx + 1) * n]
+        self._names = None
+
+    def row(self, name):
+        """返回名称在快照中的全局行号, 不存在返回 -1 (O(1))"""
+        nid = self._store.name_ids.get(name)
+        if nid is None:
+            return -1
+        local = self._lookup[nid]
+        return self._start + local - 1 if local else -1
+
+    @property
+    def lookup(self):
+        """名称 ID -> 英雄内行号 + 1 的查找表 (0 表示没有此海克斯)"""
+        return self._lookup
+
+    @property
+    def names(self):
+        """海克斯名称元组 (CSV 顺序), 首次访问时构建并缓存"""
+        if self._names is None:
+            strings, row_name = self._store.snapshot.strings, self._store.snapshot.row_name
+            self._names = tuple(strings[row_name[i]] for i in range(self._start, self._end))
+        return self._names
+
+    def __contains__(self, name):
+        return self.row(name) >= 0
+
+    def __getitem__(self, name):
+        row = self.row(name)
+        if row < 0:
+            raise KeyError(name)
+        return self._store.row_info(row)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return self._end - self._start
+
+    def __repr__(self):
+        return f"<HeroAugments {self.hero}: {len(self)} 个海克斯>"
+
+
+class AugmentStore:
+    """
+    全局紧凑存储: 驻留名称表 + 小整数等级编码 + 快照上的定长排名列。
+    heroes 为 {英雄: HeroAugments}，可直接作为 DataManager.hero_data 使用。
+    """
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.names = snapshot.strings[:snapshot.n_names]
+        self.name_ids = {name: i for i, name in enumerate(self.names)}
+        self.tiers = snapshot.tiers
+        self.heroes = {hero: HeroAugments(self, hero, idx)
+                       for idx, hero in enumerate(snapshot.hero_names)}
+
+    def row_info(self, row):
+        snap = self.snapshot
+        return {
+            "tier": self.tiers[snap.row_tier[row]],
+            "overall_rank": snap.row_overall[row],
+            "t_rank": snap.row_trank[row],
+        }
+
+
+def _read_header(path):
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read(_HEADER.size)
+        if len(raw) < _HEADER.size:
+            return None
+        header = _HEADER.unpack(raw)
+    except OSError:
+        return None
+    if header[0] != MAGIC or header[1] != SNAPSHOT_VERSION or header[2] != BYTE_ORDER_MARK:
+        return None
+    return header
+
+
+def _is_fresh(db_path, csv_path):
+    """快照是否与 CSV 一致: 先比较 大小/mtime, 不一致再比较 SHA1"""
+    header = _read_header(db_path)
+    if header is None:
+        return False
+    _, _, _, size, mtime_ns, sha1 = header[:6]
+    st = os.stat(csv_path)
+    if st.st_size == size and st.st_mtime_ns == mtime_ns:
+        return True
+    if st.st_size != size or _file_sha1(csv_path) != sha1:
+        return False
+    # 内容未变 (仅被重新写入/复制), 刷新头部时间戳, 下次启动直接走快速路径
+    try:
+        with open(db_path, 'r+b') as f:
+            stamped = _HEADER.pack(*header[:4], st.st_mtime_ns, *header[5:])
+            f.write(stamped)
+    except OSError:
+        pass
+    return True
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return True
+    except OSError:
+        # 目录只读 / Windows 下旧快照仍被映射占用
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return False
+
+
+def _map_file(path):
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def load_snapshot(csv_path=CSV_FILE, db_path=AUGMENT_DB_FILE):
+    """
+    加载 (必要时重新编译) 海克斯数据库快照。
+
+    Returns:
+        (AugmentSnapshot, bool): 快照, 本次是否重新编译
+    """
+    if os.path.exists(db_path) and _is_fresh(db_path, csv_path):
+        try:
+            return AugmentSnapshot(_map_file(db_path), "mmap"), False
+        except (OSError, ValueError):
+            pass
+
+    data = compile_snapshot(csv_path)
+    if _write_atomic(db_path, data):
+        try:
+            return AugmentSnapshot(_map_file(db_path), "mmap"), True
+        except (OSError, ValueError):
+            pass
+    return AugmentSnapshot(data, "memory"), True
+
+
+def main():
+    """强制重新编译快照并输出加载耗时"""
+    t0 = time.perf_counter()
+    data = compile_snapshot(CSV_FILE)
+    t1 = time.perf_counter()
+    if not _write_atomic(AUGMENT_DB_FILE, data):
+        print(f"❌ 快照写入失败: {AUGMENT_DB_FILE}")
+        return
+    t2 = time.perf_counter()
+    snap, _ = load_snapshot()
+    t3 = time.perf_counter()
+    print(f"✅ 快照已生成: {AUGMENT_DB_FILE} ({len(data) / 1024:.0f} KB)")
+    print(f"   英雄 {len(snap.hero_names)} | 记录 {len(snap)} | 字符串 {len(snap.strings)}")
+    print(f"   编译 {(t1 - t0) * 1000:.1f}ms | 写入 {(t2 - t1) * 1000:.1f}ms | 映射加载 {(t3 - t2) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+OCR 文本 -> 海克斯名称 匹配
+
+AugmentIndex: 字符 n-gram 倒排索引，首次 search 时构建一次 (match_batch 不需要)。
+  查询时先用倒排表统计候选与 OCR 文本的公共字符数，
+  公共字符数给出 fuzz.ratio 的上界 (ratio = 2*LCS/(|a|+|b|), LCS <= 公共字符数)，
+  候选按上界从高到低精确打分，上界低于当前第 k 名即停止，结果与全量打分一致。
+
+所有英雄共用同一批海克斯名称 (~220 个)，倒排表按全局名称 ID 建立一份，
+查询时用英雄自己的查找表 (HeroAugments) 过滤，即等价于每个英雄一份索引，
+而加载时无需为 170+ 个英雄各建一遍。
+
+match_batch: 一帧的全部 OCR 文本与英雄词表一次性计算相似度矩阵 (rapidfuzz cdist)，
+  同时给出最佳匹配与次佳候选，两者分差用于标记存疑的识别结果。
+  与英雄词表完全一致的文本 (词典束搜索的解码结果) 直接命中, 不参与相似度计算。
+"""
+from collections import defaultdict
+
+import numpy as np
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
+
+NGRAM_SIZES = (1, 2)   # 单字用于打分上界, 双字用于同上界候选的排序
+MATCH_THRESHOLD = 60   # 模糊匹配最低分 (与原 fuzz.ratio > 60 规则一致)
+AMBIGUITY_MARGIN = 10  # 最佳与次佳分差低于此值视为存疑
+
+
+def _gram_counts(text, n):
+    counts = {}
+    for i in range(len(text) - n + 1):
+        gram = text[i:i + n]
+        counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+class AugmentIndex:
+    """海克斯名称 n-gram 倒排索引"""
+
+    def __init__(self, store):
+        self.store = store
+        self.processed = [default_process(name) for name in store.names]
+        self.lengths = [len(p) for p in self.processed]
+        self._postings = None
+        self._choices = {}  # 英雄序号 -> (预处理名称列表, 原名称元组)
+
+    @property
+    def postings(self):
+        """n-gram -> ((名称ID, 该 n-gram 在名称中的出现次数), ...)，首次使用时构建"""
+        if self._postings is None:
+            postings = defaultdict(list)
+            for nid, text in enumerate(self.processed):
+                for n in NGRAM_SIZES:
+                    for gram, cnt in _gram_counts(text, n).items():
+                        postings[gram].append((nid, cnt))
+            self._postings = {gram: tuple(items) for gram, items in postings.items()}
+        return self._postings
+
+    def _overlap(self, query, n, lookup):
+        """英雄词表内每个候选与 OCR 文本的公共 n-gram 数 (按次数取 min)"""
+        acc = {}
+        postings = self.postings
+        for gram, qcnt in _gram_counts(query, n).items():
+            for nid, cnt in postings.get(gram, ()):
+                if lookup[nid]:
+                    acc[nid] = acc.get(nid, 0) + (cnt if cnt < qcnt else qcnt)
+        return acc
+
+    def search(self, text, hero_view, limit=5, score_cutoff=0):
+        """
+        在英雄词表中检索 OCR 文本的最佳候选。
+
+        Returns:
+            list[(str, float)]: 按分数降序的 (海克斯名称, 分数)，最多 limit 个
+        """
+        query = default_process(text)
+        if not query or not hero_view:
+            return []
+        lookup = hero_view.lookup
+        common = self._overlap(query, 1, lookup)
+        if not common:
+            return []  # 无任何公共字符, ratio 必为 0
+        bigram = self._overlap(query, 2, lookup) if 2 in NGRAM_SIZES else {}
+
+        qlen, lengths = len(query), self.lengths
+        ranked = sorted(
+            ((200.0 * c / (qlen + lengths[nid]), bigram.get(nid, 0), nid)
+             for nid, c in common.items()),
+            reverse=True,
+        )
+
+        results = []
+        floor = max(score_cutoff, 0)
+        for bound, _, nid in ranked:
+            if bound < floor or (len(results) >= limit and bound < results[-1][1]):
+                break
+            score = fuzz.ratio(query, self.processed[nid])
+            if score < floor:
+                continue
+            results.append((self.store.names[nid], score))
+            results.sort(key=lambda x: -x[1])
+            if len(results) > limit:
+                results.pop()
+        return results
+
+    def _hero_choices(self, hero_view):
+        """英雄词表的预处理名称 (CSV 顺序), 首次使用时缓存"""
+        cached = self._choices.get(hero_view.hero_idx)
+        if cached is None:
+            names = hero_view.names
+            ids = self.store.name_ids
+            cached = ([self.processed[ids[n]] for n in names], names)
+            self._choices[hero_view.hero_idx] = cached
+        return cached
+
+    def match_batch(self, texts, hero_view, score_cutoff=MATCH_THRESHOLD):
+        """
+        批量匹配一帧内的所有 OCR 文本 (单次 cdist 相似度矩阵)。
+
+        Returns:
+            list[dict]: 与 texts 一一对应:
+                match            最佳匹配名称 (分数不超过阈值时为 None)
+                best / score     最高分候选及其分数
+                runner_up / runner_up_score  次佳候选及其分数
+                margin           最佳与次佳的分差
+                ambiguous        已匹配但分差低于 AMBIGUITY_MARGIN
+        """
+        results = [{"match": None, "best": None, "score": 0.0, "runner_up": None,
+                    "runner_up_score": 0.0, "margin": 0.0, "ambiguous": False}
+                   for _ in texts]
+        if not hero_view:
+            return results
+        queries = []
+        for res, t in zip(results, texts):
+            if t and t in hero_view:
+                res.update(match=t, best=t, score=100.0, margin=100.0)
+                queries.append("")
+            else:
+                queries.append(default_process(t) if t else "")
+        rows = [i for i, q in enumerate(queries) if q]
+        if not rows:
+            return results
+
+        choices, names = self._hero_choices(hero_view)
+        matrix = process.cdist([queries[i] for i in rows], choices,
+                               scorer=fuzz.ratio, dtype=np.float32)
+        # 稳定排序: 同分时取 CSV 中靠前者, 与 extractOne 的取舍一致
+        order = np.argsort(-matrix, axis=1, kind="stable")[:, :2]
+
+        for r, i in enumerate(rows):
+            res = results[i]
+            best = order[r, 0]
+            res["best"], res["score"] = names[best], float(matrix[r, best])
+            if order.shape[1] > 1:
+                second = order[r, 1]
+                res["runner_up"], res["runner_up_score"] = names[second], float(matrix[r, second])
+            res["margin"] = res["score"] - res["runner_up_score"]
+            if res["score"] > score_cutoff:
+                res["match"] = res["best"]
+                res["ambiguous"] = res["margin"] < AMBIGUITY_MARGIN
+        return results
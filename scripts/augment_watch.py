@@ -0,0 +1,240 @@
+"""
+海克斯选择界面自动检测 (监视模式, 默认关闭)
+运行: python -m scripts.benchmark watch <截图目录>  (分类结果与单次采样耗时)
+
+开启后 (data/watch.json 中 "enabled": true, 或 GUI 勾选"自动检测海克斯界面")，
+热键监听循环低频截取 REGIONS 条带, 缩成小灰度缩略图后用轻量规则判断三张海克斯卡片是否出现，
+出现时自动触发分析, 无需按 F6。
+
+分类 (每张卡片的缩略图):
+  背景 (低分位亮度) 足够暗, 文字 (高分位亮度) 与背景反差足够大, 亮像素占比落在标题文字的范围内,
+  且亮像素集中在中间几行 (标题上下留白, 对局画面等纹理则布满整个区域);
+  三张卡片都满足且背景亮度接近 (同一种卡片底板) 才判为选择界面。
+触发: 连续 confirm 次判为选择界面且卡片内容稳定 (避开入场/刷新动画) 时触发一次，
+  之后不再重复触发, 直到界面消失 (连续 confirm 次判为否) 或卡片内容变化 (刷新海克斯)。
+CPU 预算: 按单次采样的线程 CPU 耗时 (滑动平均) 拉长采样间隔,
+  保证采样占用不超过单核的 cpu_budget; 每次采样的耗时记入性能统计 (watch 阶段)。
+"""
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# 兼容直接运行和包导入
+try:
+    from scripts.config import WATCH_FILE
+except ImportError:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    parent_dir = os.path.dirname(current_dir)
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+    from scripts.config import WATCH_FILE
+
+from scripts.capture import ThreadMssCapture, grab_regions
+from scripts.perf import monitor
+
+WATCH_DEFAULTS = {
+    "enabled": False,      # 是否开启监视模式
+    "interval": 0.5,       # 采样间隔 (秒, CPU 预算不足时自动拉长)
+    "cpu_budget": 0.01,    # 采样允许占用的单核 CPU 比例
+    "confirm": 2,          # 连续多少次判定一致才触发 / 解除
+}
+
+THUMB_SIZE = (64, 12)      # 每张卡片的缩略图尺寸 (宽, 高)
+BG_MAX = 110               # 卡片背景亮度 (各列 20 分位的中位数) 上限
+MIN_CONTRAST = 35          # 文字 (98 分位) 与背景的最小亮度差
+TEXT_RATIO = (0.02, 0.3)   # 亮像素 (高于背景与文字的中点) 占比范围
+MARGIN_ROWS = 2            # 缩略图上下各取几行作为留白
+MARGIN_MAX = 0.1           # 留白行中亮像素占比上限
+BG_SPREAD = 50             # 三张卡片背景亮度的最大差值
+CHANGE_THRESHOLD = 8.0     # 缩略图平均灰度差超过此值视为卡片内容变化
+COST_SMOOTHING = 0.2       # 采样耗时滑动平均的权重
+
+
+def validate_watch_settings(settings):
+    """校验监视配置, 返回合并默认值后的副本 (取值错误时抛出 ValueError)"""
+    result = dict(WATCH_DEFAULTS)
+    for key, value in settings.items():
+        if key not in WATCH_DEFAULTS:
+            raise ValueError(f"未知配置项: {key}")
+        if key == "enabled":
+            if not isinstance(value, bool):
+                raise ValueError(f"{key} 应为 true/false: {value!r}")
+        elif key == "confirm":
+            if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+                raise ValueError(f"{key} 应为正整数: {value!r}")
+        elif isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+            raise ValueError(f"{key} 应为正数: {value!r}")
+        elif key == "cpu_budget" and value > 1:
+            raise ValueError(f"{key} 应不大于 1: {value!r}")
+        result[key] = value
+    return result
+
+
+def load_watch_settings(path=WATCH_FILE):
+    """读取监视配置 (合并默认值); 文件不存在或无效时返回默认值"""
+    if not os.path.exists(path):
+        return dict(WATCH_DEFAULTS)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            settings = json.load(f)
+        if not isinstance(settings, dict):
+            raise ValueError("顶层应为 JSON 对象")
+        return validate_watch_settings(settings)
+    except (OSError, ValueError) as e:
+        print(f"⚠ 监视模式配置无效, 使用默认值 ({path}): {e}")
+        return dict(WATCH_DEFAULTS)
+
+
+def save_watch_settings(settings, path=WATCH_FILE):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(validate_watch_settings(settings), f, ensure_ascii=False, indent=2)
+        return True
+    except (OSError, ValueError) as e:
+        print(f"⚠ 监视模式配置写入失败: {e}")
+        return False
+
+
+def thumbnail(view):
+    """BGRA 区域视图 -> 灰度缩略图 (先缩小再转灰度, 只处理少量像素)"""
+    small = cv2.resize(view, THUMB_SIZE, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGRA2GRAY)
+
+
+def card_signature(thumb):
+    """
+    缩略图 -> (背景亮度, 文字反差, 亮像素占比, 上下留白行的亮像素占比)。
+    背景按列估计 (每列的 20 分位亮度), 卡片底板的横向渐变不会被当成文字。
+    """
+    background = np.sort(thumb, axis=0)[int(thumb.shape[0] * 0.2)]
+    residual = thumb.astype(np.int16) - background
+    contrast = float(np.sort(residual, axis=None)[int(residual.size * 0.98)])
+    bright = residual > contrast / 2
+    margin = np.concatenate((bright[:MARGIN_ROWS], bright[-MARGIN_ROWS:]))
+    return float(np.median(background)), contrast, float(bright.mean()), float(margin.mean())
+
+
+def is_augment_screen(signatures):
+    """三张卡片的特征是否都符合海克斯卡片标题 (见模块说明)"""
+    if len(signatures) < 3:
+        return False
+    for bg, contrast, ratio, margin in signatures:
+        if bg > BG_MAX or contrast < MIN_CONTRAST or margin > MARGIN_MAX:
+            return False
+        if not TEXT_RATIO[0] <= ratio <= TEXT_RATIO[1]:
+            return False
+    backgrounds = [sig[0] for sig in signatures]
+    return max(backgrounds) - min(backgrounds) <= BG_SPREAD
+
+
+class AugmentWatcher:
+    """
+    海克斯界面监视器 (由热键监听线程轮询 poll(), 不另开线程)。
+
+    Args:
+        regions: 截取区域 {key: 区域}
+        capture: 截图后端 (默认每线程常驻 mss 句柄)
+        settings: 监视配置 (同 data/watch.json)
+    """
+
+    def __init__(self, regions, capture=None, settings=None):
+        self.regions = regions
+        self.capture = capture or ThreadMssCapture()
+        self.settings = validate_watch_settings(settings or {})
+        self.enabled = self.settings["enabled"]
+        self.interval = self.settings["interval"]
+        self._next = 0.0
+        self._positive = 0
+        self._negative = 0
+        self._armed = True
+        self._thumbs = None       # 最近一次采样的缩略图
+        self._triggered = None    # 上次触发时的缩略图
+        self.cost = 0.0           # 单次采样线程 CPU 耗时 (滑动平均, 秒)
+        self.samples = 0
+        self.triggers = 0
+        self.cpu_time = 0.0
+        self._started = None
+
+    def sample(self):
+        """采样一次, 返回是否判为选择界面 (计入耗时统计)"""
+        t0, c0 = time.perf_counter(), time.thread_time()
+        try:
+            views = grab_regions(self.capture, self.regions)
+            self._thumbs = {key: thumbnail(view) for key, view in views.items()}
+            positive = is_augment_screen([card_signature(t) for t in self._thumbs.values()])
+        except Exception as e:
+            print(f"监视采样失败: {e}")
+            self._thumbs, positive = None, False
+        cpu = time.thread_time() - c0
+        monitor.record("watch", time.perf_counter() - t0, cpu_ms=round(cpu * 1000, 3), positive=positive)
+        self.samples += 1
+        self.cpu_time += cpu
+        self.cost += COST_SMOOTHING * (cpu - self.cost)  # 从 0 起平滑, 首次采样的预热耗时不会拉长间隔
+        return positive
+
+    @staticmethod
+    def _differs(thumbs, reference):
+        """两次采样的缩略图是否有卡片内容变化"""
+        if thumbs is None or reference is None:
+            return True
+        return any(np.abs(thumbs[k].astype(np.int16) - reference[k]).mean() > CHANGE_THRESHOLD
+                   for k in thumbs if k in reference)
+
+    def poll(self, now=None):
+        """到采样时间时采样一次; 返回 True 表示应当触发分析"""
+        if not self.enabled:
+            return False
+        now = time.perf_counter() if now is None else now
+        if now < self._next:
+            return False
+        if self._started is None:
+            self._started = now
+        previous = self._thumbs
+        positive = self.sample()
+        # 采样间隔: 配置值与 CPU 预算所需间隔取大者
+        self._next = now + max(self.interval, self.cost / self.settings["cpu_budget"])
+
+        confirm = self.settings["confirm"]
+        if not positive:
+            self._positive = 0
+            self._negative += 1
+            if self._negative >= confirm:
+                self._armed = True
+            return False
+        self._negative = 0
+        # 内容仍在变化 (动画中) 时重新计数
+        self._positive = 1 if self._differs(self._thumbs, previous) else self._positive + 1
+        if self._positive < confirm or not (self._armed or self._differs(self._thumbs, self._triggered)):
+            return False
+        self.notify_analyzed()
+        self.triggers += 1
+        return True
+
+    def notify_analyzed(self):
+        """已分析当前界面 (自动触发或手动 F6), 界面消失或卡片变化前不再触发"""
+        self._armed = False
+        if self._thumbs is not None:
+            self._triggered = {k: t.astype(np.int16) for k, t in self._thumbs.items()}
+
+    def set_enabled(self, enabled):
+        self.enabled = bool(enabled)
+        self._next = 0.0
+        self._positive = self._negative = 0
+        self._armed = True
+
+    @property
+    def usage(self):
+        """开启以来采样占用的单核 CPU 比例"""
+        if self._started is None:
+            return 0.0
+        elapsed = time.perf_counter() - self._started
+        return self.cpu_time / elapsed if elapsed > 0 else 0.0
+
+    def close(self):
+        if hasattr(self.capture, "close"):
+            self.capture.close()
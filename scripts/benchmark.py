@@ -0,0 +1,1111 @@
+"""
+性能基准测试工具
+运行: python -m scripts.benchmark <子命令> [参数]
+
+子命令:
+  memory   海克斯数据内存占用: 旧版逐行字典 vs 紧凑存储 (RSS / 对象数)
+  match    OCR 文本匹配: thefuzz 全量 extractOne vs n-gram 索引 vs 三卡批量 cdist
+  ocr      OCR 执行模式: serial vs parallel vs stitched vs rec 纯识别 (同一批截图)
+  capture  截图 + 预处理: PIL 逐步转换 vs BGRA 零拷贝, 逐区域截图 vs 单次条带截图 (无显示器时用 FakeCapture)
+  crops    单卡语料 (scripts.synth_cards 生成) 的 OCR + 匹配准确率与吞吐 (张/秒)
+  replay   离线回放整屏截图目录, 统计 GameAnalyzer 各阶段耗时分位数与匹配准确率 (可在无显示器的 Linux 运行)
+  engine   在回放语料上扫描 onnxruntime 会话选项与 det/rec 输入尺寸, 输出耗时/准确率对比表
+  watch    监视模式: 海克斯界面分类结果 (截图目录 + 合成负样本) 与单次采样的耗时 / CPU 占用
+  lcu      LCU 轮询 (get_champion_auto): 每次请求新建连接 vs 常驻 keep-alive 会话 (本地 TLS 模拟服务器);
+           以及事件订阅 (WAMP WebSocket) 下英雄更换到回调的延迟;
+           --slow: 注入慢接口/超时, 顺序查询 (get_champion_auto) vs 并发查询 (get_champion_race) 的耗时
+  champion-ids 连接时的英雄 ID 映射: 每次下载 champion-summary vs 按客户端版本的磁盘缓存 (本地 TLS 模拟服务器)
+  discovery 客户端发现: 每次扫描全部进程命令行 vs ClientDiscovery (lockfile / PID 缓存, 只读进程名) (模拟进程表)
+"""
+import argparse
+import gc
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+# 兼容直接运行和包导入
+try:
+    from scripts.config import BASE_DIR, CSV_FILE, AUGMENT_DB_FILE
+except ImportError:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    parent_dir = os.path.dirname(current_dir)
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+    from scripts.config import BASE_DIR, CSV_FILE, AUGMENT_DB_FILE
+
+from scripts.perf import percentile
+
+
+def _rss_bytes():
+    import psutil
+    return psutil.Process().memory_info().rss
+
+
+def _run_child(args):
+    """在独立子进程中运行子命令并解析其 JSON 输出 (保证 RSS 测量互不干扰)"""
+    cmd = [sys.executable, "-m", "scripts.benchmark"] + args
+    out = subprocess.run(cmd, cwd=BASE_DIR, capture_output=True, text=True, encoding='utf-8')
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip() or f"子进程失败: {cmd}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+# ================= memory: 数据内存占用 =================
+
+def _build_legacy():
+    """旧版表示: hero_data[hero][name] = {"tier", "overall_rank", "t_rank"}"""
+    from scripts.augment_db import parse_csv
+    return {
+        hero: {name: {"tier": tier, "overall_rank": o_rank, "t_rank": t_rank}
+               for name, tier, o_rank, t_rank in rows}
+        for hero, rows in parse_csv(CSV_FILE).items()
+    }
+
+
+def _build_compact():
+    from scripts.augment_db import load_snapshot, AugmentStore
+    snapshot, _ = load_snapshot(CSV_FILE, AUGMENT_DB_FILE)
+    store = AugmentStore(snapshot)
+    # 模拟运行期: 所有英雄的名称元组都被匹配逻辑访问过
+    for view in store.heroes.values():
+        view.names
+    return store
+
+
+def _memory_child(variant):
+    import psutil  # noqa: F401  (提前导入, 排除模块自身的内存)
+    from scripts import augment_db  # noqa: F401
+    gc.collect()
+    rss0, blocks0, objs0 = _rss_bytes(), sys.getallocatedblocks(), len(gc.get_objects())
+    t0 = time.perf_counter()
+    data = _build_legacy() if variant == "legacy" else _build_compact()
+    elapsed = time.perf_counter() - t0
+    gc.collect()
+    result = {
+        "variant": variant,
+        "rss": _rss_bytes() - rss0,
+        "blocks": sys.getallocatedblocks() - blocks0,
+        "gc_objects": len(gc.get_objects()) - objs0,
+        "load_ms": elapsed * 1000,
+    }
+    del data
+    print(json.dumps(result))
+
+
+def cmd_memory(args):
+    if args.variant:
+        _memory_child(args.variant)
+        return
+
+    # 先生成快照, 避免把首次编译计入紧凑存储的加载时间
+    from scripts.augment_db import load_snapshot
+    load_snapshot(CSV_FILE, AUGMENT_DB_FILE)
+
+    rows = [_run_child(["memory", "--variant", v]) for v in ("legacy", "compact")]
+    print(f"{'表示':<10}{'RSS 增量':>12}{'内存块':>12}{'GC 对象':>12}{'加载耗时':>12}")
+    for r in rows:
+        print(f"{r['variant']:<10}{r['rss'] / 1024 / 1024:>10.2f}MB{r['blocks']:>12}"
+              f"{r['gc_objects']:>12}{r['load_ms']:>10.1f}ms")
+    legacy, compact = rows
+    if compact["rss"] > 0:
+        print(f"\nRSS 降低 {legacy['rss'] / compact['rss']:.1f}x, "
+              f"内存块减少 {legacy['blocks'] - compact['blocks']}")
+
+
+# ================= match: OCR 文本匹配 =================
+
+# OCR 常见噪声: 标点/边框误识别
+_OCR_JUNK = "·.。-—_|'\"「」【】1lI"
+
+
+def _load_dm():
+    """加载 DataManager 所需的数据 (不依赖 main.py 的 GUI / 热键模块)"""
+    from scripts.augment_db import load_snapshot, AugmentStore
+    from scripts.augment_match import AugmentIndex
+    snapshot, _ = load_snapshot(CSV_FILE, AUGMENT_DB_FILE)
+    store = AugmentStore(snapshot)
+    return store, AugmentIndex(store)
+
+
+def _noisy_ocr(name, charset, rng):
+    """模拟 OCR 误识别: 替换/丢失/插入字符"""
+    chars = list(name)
+    op = rng.random()
+    if op < 0.3 and len(chars) > 2:
+        chars.pop(rng.randrange(len(chars)))
+    elif op < 0.7:
+        chars[rng.randrange(len(chars))] = rng.choice(charset)
+    elif op < 0.85:
+        chars.insert(rng.randrange(len(chars) + 1), rng.choice(_OCR_JUNK))
+    if rng.random() < 0.2:
+        chars.insert(0, rng.choice(_OCR_JUNK))
+    return "".join(chars)
+
+
+def _match_samples(store, args):
+    """读取 OCR 样本文件 (每行: 英雄<TAB>OCR文本)，否则基于真实名称生成噪声样本"""
+    if args.samples:
+        samples = []
+        with open(args.samples, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) >= 2 and parts[0] in store.heroes:
+                    samples.append((parts[0], parts[1]))
+        return samples
+
+    # 每 3 条同一英雄, 对应一次 F6 的三张卡片
+    rng = random.Random(args.seed)
+    charset = sorted(set("".join(store.names)))
+    heroes = list(store.heroes)
+    samples = []
+    for _ in range(0, args.count, 3):
+        hero = rng.choice(heroes)
+        for name in rng.sample(store.heroes[hero].names, 3):
+            samples.append((hero, _noisy_ocr(name, charset, rng)))
+    return samples[:args.count]
+
+
+def cmd_match(args):
+    from thefuzz import process, fuzz
+    store, index = _load_dm()
+    samples = _match_samples(store, args)
+    if not samples:
+        print("❌ 没有可用的样本")
+        return
+
+    def legacy(hero, txt):
+        return process.extractOne(txt, list(store.heroes[hero].keys()), scorer=fuzz.ratio)
+
+    def indexed(hero, txt):
+        top = index.search(txt, store.heroes[hero], limit=1)
+        return top[0] if top else (None, 0)
+
+    # 批量: 相邻同英雄样本每 3 条一组, 一次 cdist
+    frames = []
+    for hero, txt in samples:
+        if frames and frames[-1][0] == hero and len(frames[-1][1]) < 3:
+            frames[-1][1].append(txt)
+        else:
+            frames.append((hero, [txt]))
+
+    def batched():
+        out = []
+        for hero, txts in frames:
+            out.extend((m["best"], m["score"]) for m in index.match_batch(txts, store.heroes[hero]))
+        return out
+
+    timings, answers = {}, {}
+    for label, fn in (("thefuzz", legacy), ("n-gram", indexed), ("cdist×3", None)):
+        run = batched if fn is None else (lambda fn=fn: [fn(hero, txt) for hero, txt in samples])
+        run()  # 预热 (含每英雄词表缓存)
+        out = []
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            out = run()
+        timings[label] = (time.perf_counter() - t0) / (args.repeat * len(samples))
+        answers[label] = out
+
+    print(f"样本数: {len(samples)} ({'文件' if args.samples else '模拟 OCR 噪声'}) | "
+          f"帧数: {len(frames)} | 重复 {args.repeat} 次")
+    base = timings["thefuzz"]
+    for label, t in timings.items():
+        # 与全量打分结果一致: 同名, 或分数相同 (并列候选)
+        agree = sum(1 for (n1, s1), (n2, s2) in zip(answers["thefuzz"], answers[label])
+                    if n1 == n2 or round(s1) == round(s2))
+        print(f"  {label:<10}{t * 1e6:>10.1f} µs/卡  加速 {base / t:>5.1f}x  一致率 {agree / len(samples):.1%}")
+
+
+# ================= ocr: OCR 执行模式 =================
+
+def _pil_to_bgra(img):
+    import cv2
+    import numpy as np
+    return cv2.cvtColor(np.asarray(img.convert("RGB")), cv2.COLOR_RGB2BGRA)
+
+
+def _load_screenshots(folder):
+    """读取整屏截图, 按各自分辨率裁出三个区域 -> [(名称, {key: 图像}, 标注)]"""
+    from PIL import Image
+    from scripts.ocr_pipeline import compute_regions, crop_regions
+    frames = []
+    for name in sorted(os.listdir(folder)):
+        if not name.lower().endswith((".png", ".jpg", ".jpeg", ".bmp")):
+            continue
+        with Image.open(os.path.join(folder, name)) as img:
+            frame = _pil_to_bgra(img)
+        h, w = frame.shape[:2]
+        frames.append((name, crop_regions(frame, compute_regions(w, h)), None))
+    return frames
+
+
+def _synthetic_frames(font_path, count, seed):
+    """用真实海克斯名称渲染 2K 分辨率下的卡片文字区域 (scripts.synth_cards 渲染器)"""
+    import cv2
+    from scripts.ocr_pipeline import compute_regions, preprocess
+    from scripts.synth_cards import CardRenderer
+    store, _ = _load_dm()
+    rng = random.Random(seed)
+    renderer = CardRenderer(font_path, seed)
+    regions = compute_regions(2560, 1440)
+    frames = []
+    for i in range(count):
+        names = rng.sample(store.names, len(regions))
+        images = {}
+        for (key, r), text in zip(regions.items(), names):
+            card = renderer.render(text, (r['width'], r['height']))
+            images[key] = preprocess(cv2.cvtColor(card, cv2.COLOR_RGB2BGRA))
+        frames.append((f"synthetic-{i}", images, dict(zip(regions, names))))
+    return frames
+
+
+def cmd_ocr(args):
+    from concurrent.futures import ThreadPoolExecutor
+    from scripts.ocr_pipeline import OCR_MODES, create_engine, ocr_single, ocr_stitched, ocr_recognize
+
+    if args.images:
+        frames = _load_screenshots(args.images)
+    else:
+        from scripts.synth_cards import find_cjk_font
+        font = find_cjk_font(args.font)
+        if not font:
+            print("❌ 未提供 --images 截图目录, 且未找到中文字体 (可用 --font 指定) 无法合成样本")
+            return
+        frames = _synthetic_frames(font, args.count, args.seed)
+    if not frames:
+        print("❌ 没有可用的截图")
+        return
+
+    ocr = create_engine(args.threads)
+    executor = ThreadPoolExecutor(max_workers=3)
+
+    def run_serial(images):
+        return {k: ocr_single(ocr, img) for k, img in images.items()}
+
+    def run_parallel(images):
+        futures = {k: executor.submit(ocr_single, ocr, img) for k, img in images.items()}
+        return {k: f.result() for k, f in futures.items()}
+
+    def run_stitched(images):
+        return ocr_stitched(ocr, images)
+
+    fallbacks = []
+
+    def run_rec(images):
+        texts, fallback = ocr_recognize(ocr, images)
+        fallbacks.append(len(fallback))
+        return texts
+
+    runners = {"serial": run_serial, "parallel": run_parallel, "stitched": run_stitched, "rec": run_rec}
+    modes = [m for m in args.modes.split(",") if m in OCR_MODES]
+    run_serial(frames[0][1])  # 预热
+
+    results = {}
+    for mode in modes:
+        fn = runners[mode]
+        samples, texts = [], {}
+        for name, images, _ in frames:
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                texts[name] = fn(images)
+                samples.append(time.perf_counter() - t0)
+        samples.sort()
+        results[mode] = (samples, texts)
+    executor.shutdown()
+
+    print(f"帧数: {len(frames)} ({'截图' if args.images else '合成样本'}) | 每帧重复 {args.repeat} 次")
+    base = results[modes[0]][1]
+    cards = len(frames[0][1])
+    for mode, (samples, texts) in results.items():
+        p50 = samples[len(samples) // 2]
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        total = sum(len(t) for t in base.values())
+        agree = sum(texts[n][k] == base[n][k] for n in base for k in base[n])
+        line = (f"  {mode:<10} p50 {p50 * 1000:>7.1f}ms  p95 {p95 * 1000:>7.1f}ms  "
+                f"每卡 {p50 * 1000 / cards:>6.1f}ms  与 {modes[0]} 一致 {agree / total:.1%}")
+        if mode == "rec" and fallbacks:
+            line += f"  回退 det+rec {sum(fallbacks) / (len(fallbacks) * cards):.1%}"
+        labelled = [(texts[n][k], label[k]) for n, _, label in frames if label for k in label]
+        if labelled:
+            correct = sum(t == truth for t, truth in labelled)
+            line += f"  准确率 {correct / len(labelled):.1%}"
+        print(line)
+
+
+# ================= capture: 截图 + 预处理 =================
+
+def _legacy_preprocess(shot):
+    """旧版: PIL RGB -> 灰度 -> 双三次 2x -> np.array (每步新分配)"""
+    import numpy as np
+    from PIL import Image
+    img = Image.frombytes("RGB", shot.size, shot.rgb)
+    gray = img.convert("L")
+    w, h = gray.size
+    return np.array(gray.resize((w * 2, h * 2), Image.BICUBIC))
+
+
+def _capture_backend(args):
+    """返回 (说明, 区域, 截图后端); 无显示器时使用合成整屏图像的 FakeCapture"""
+    import numpy as np
+    from scripts.capture import MssCapture, FakeCapture
+    from scripts.ocr_pipeline import compute_regions
+    if not args.synthetic:
+        try:
+            import mss
+            with mss.mss() as sct:
+                mon = sct.monitors[1]
+            regions = compute_regions(mon['width'], mon['height'])
+            backend = MssCapture()
+            backend.grab(next(iter(regions.values())))
+            return "mss 实时截图", regions, backend
+        except Exception as e:
+            print(f"⚠ 无法截屏 ({e}), 改用合成整屏图像")
+    frame = np.random.default_rng(args.seed).integers(0, 256, (1440, 2560, 4), dtype=np.uint8)
+    label = f"合成整屏图像 (FakeCapture 2560x1440, 单次截图附加 {args.grab_latency_ms}ms)"
+    return label, compute_regions(2560, 1440), FakeCapture(frame, args.grab_latency_ms / 1000)
+
+
+def cmd_capture(args):
+    import numpy as np
+    from scripts.capture import grab_regions
+    from scripts.ocr_pipeline import RegionBuffers
+
+    label, regions, backend = _capture_backend(args)
+    buffers = RegionBuffers()
+
+    def legacy():
+        return {k: _legacy_preprocess(backend.grab_raw(r)) for k, r in regions.items()}
+
+    def per_region():
+        return {k: buffers.preprocess(k, backend.grab(r)) for k, r in regions.items()}
+
+    def strip():
+        return {k: buffers.preprocess(k, v) for k, v in grab_regions(backend, regions).items()}
+
+    def grab_per_region():
+        return [backend.grab(r) for r in regions.values()]
+
+    def grab_strip():
+        return grab_regions(backend, regions)
+
+    # 条带切片与逐区域截图像素一致; 与旧版 PIL 预处理基本一致 (双三次插值核略有差异)
+    a, b, c = legacy(), {k: v.copy() for k, v in per_region().items()}, strip()
+    diff = max(float(np.abs(a[k].astype(np.int16) - b[k]).mean()) for k in regions)
+    same = all(np.array_equal(b[k], c[k]) for k in regions)
+
+    print(f"来源: {label} | 区域数: {len(regions)} | 重复 {args.repeat} 次")
+    timings = {}
+    for name, fn in (("逐区域截图", grab_per_region), ("条带截图", grab_strip),
+                     ("PIL 逐步转换", legacy), ("零拷贝 逐区域", per_region), ("零拷贝 条带", strip)):
+        fn()
+        samples = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - t0)
+        samples.sort()
+        timings[name] = samples[len(samples) // 2]
+        print(f"  {name:<12} p50 {timings[name] * 1000:>7.2f}ms  min {samples[0] * 1000:>7.2f}ms")
+    print(f"\n截图 + 预处理: {timings['PIL 逐步转换'] * 1000:.2f}ms -> {timings['零拷贝 逐区域'] * 1000:.2f}ms "
+          f"-> {timings['零拷贝 条带'] * 1000:.2f}ms (条带)")
+    print(f"条带切片与逐区域结果一致: {'是' if same else '否'} | 与 PIL 预处理像素平均差 {diff:.2f}")
+
+
+# ================= crops: 单卡语料批量评测 =================
+
+def cmd_crops(args):
+    import cv2
+    from scripts.ocr_pipeline import create_engine, preprocess, ocr_single, ocr_recognize
+
+    labels_path = os.path.join(args.corpus, "labels.json")
+    if not os.path.exists(labels_path):
+        print(f"❌ 找不到标注文件: {labels_path} (先运行 python -m scripts.synth_cards)")
+        return
+    with open(labels_path, 'r', encoding='utf-8') as f:
+        items = json.load(f)["crops"]
+    if args.limit:
+        items = random.Random(args.seed).sample(items, min(args.limit, len(items)))
+
+    store, index = _load_dm()
+    ocr = create_engine(args.threads)
+    ocr_time = match_time = 0.0
+    stats = {}  # 分辨率 -> [OCR 完全正确, 匹配正确, 总数]
+    fallbacks = 0
+    for item in items:
+        bgr = cv2.imread(os.path.join(args.corpus, item["file"]), cv2.IMREAD_COLOR)
+        img = preprocess(cv2.cvtColor(bgr, cv2.COLOR_BGR2BGRA))
+        t0 = time.perf_counter()
+        if args.mode == "rec":
+            texts, fallback = ocr_recognize(ocr, {"card": img})
+            text = texts["card"]
+            fallbacks += len(fallback)
+        else:
+            text = ocr_single(ocr, img)
+        t1 = time.perf_counter()
+        view = store.heroes.get(item["hero"])
+        match = index.match_batch([text], view)[0] if view else {"match": None}
+        t2 = time.perf_counter()
+        ocr_time += t1 - t0
+        match_time += t2 - t1
+        stat = stats.setdefault(item["resolution"], [0, 0, 0])
+        stat[0] += text == item["name"].replace(" ", "").replace(".", "")
+        stat[1] += match["match"] == item["name"]
+        stat[2] += 1
+        if args.verbose and match["match"] != item["name"]:
+            print(f"  ✗ {item['file']}: OCR={text!r} 匹配={match['match']} 标注={item['name']}")
+
+    n = len(items)
+    print(f"单卡: {n} 张 | OCR 模式: {args.mode}" + (f" | 回退 det+rec {fallbacks}" if args.mode == "rec" else ""))
+    print(f"  OCR   {ocr_time / n * 1000:>7.1f}ms/张  {n / ocr_time:>8.1f} 张/秒")
+    print(f"  匹配  {match_time / n * 1000:>7.3f}ms/张  {n / match_time:>8.0f} 张/秒")
+    print(f"{'分辨率':<12}{'OCR 完全正确':>14}{'匹配正确':>12}")
+    for res, (ocr_ok, match_ok, total) in sorted(stats.items()):
+        print(f"{res:<12}{ocr_ok / total:>14.1%}{match_ok / total:>12.1%}")
+
+
+# ================= replay: 离线回放 GameAnalyzer =================
+
+def _load_labels(path):
+    """
+    标注文件 (JSON): {"截图文件名": {"hero": "英雄", "hex_1": "海克斯", "hex_2": ..., "hex_3": ...}}
+    """
+    if not path:
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def cmd_replay(args):
+    import contextlib
+    import io
+    from scripts.capture import ReplayCapture
+    import main
+
+    capture = ReplayCapture(args.frames)
+    if not capture.paths:
+        print(f"❌ 目录中没有截图: {args.frames}")
+        return
+    labels = _load_labels(args.labels)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        dm = main.DataManager()
+        analyzer = main.GameAnalyzer(dm, ocr_mode=args.mode, capture=capture, use_cache=args.cache,
+                                     vocab_decode=args.vocab, workers=args.workers)
+
+    from scripts.perf import STAGE_ORDER
+    timings = {stage: [] for stage in STAGE_ORDER}
+    by_size = {}  # 分辨率 -> [正确数, 标注数]
+    skipped = 0
+    for path in capture.paths:
+        name = os.path.basename(path)
+        label = labels.get(name, {})
+        hero = label.get("hero") or args.hero
+        if not hero:
+            skipped += 1
+            continue
+        capture.load(path)
+        for _ in range(args.repeat):
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                results = analyzer.analyze(hero)
+            if args.verbose:
+                print(out.getvalue(), end="")
+            for stage, t in analyzer.last_timings.items():
+                timings.setdefault(stage, []).append(t)
+        stat = by_size.setdefault("x".join(map(str, capture.size)), [0, 0])
+        for key in ("hex_1", "hex_2", "hex_3"):
+            if label.get(key):
+                stat[0] += results.get(key, {}).get("name") == label[key]
+                stat[1] += 1
+                if args.verbose and results.get(key, {}).get("name") != label[key]:
+                    print(f"  ✗ {name} {key}: {results.get(key, {}).get('name')} != {label[key]}")
+
+    frames = len(capture.paths) - skipped
+    print(f"截图: {frames} 帧 (跳过无英雄标注 {skipped}) | OCR 模式: {analyzer.ocr_mode} | "
+          f"缓存: {'开' if args.cache else '关'} | 词表解码: {'开' if analyzer.vocab else '关'} | "
+          f"工作进程: {analyzer.pool.workers if analyzer.pool else 0} | "
+          f"每帧重复 {args.repeat} 次")
+    print(f"{'阶段':<12}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}")
+    for stage, samples in timings.items():
+        samples = sorted(samples)
+        if not samples:
+            continue
+        print(f"{stage:<12}" + "".join(f"{percentile(samples, q) * 1000:>8.1f}ms" for q in (50, 90, 99))
+              + f"{samples[-1] * 1000:>8.1f}ms")
+    if any(total for _, total in by_size.values()):
+        print("匹配准确率:")
+        for size, (correct, total) in sorted(by_size.items()):
+            if total:
+                print(f"  {size:<12}{correct}/{total} ({correct / total:.1%})")
+    analyzer.close()
+
+
+# ================= engine: OCR 引擎配置扫描 =================
+
+# 默认扫描: 每次只改变一项 (其余取基准配置)
+DEFAULT_SWEEP = (
+    ("graph_optimization_level", ("basic", "extended", "all")),
+    ("enable_cpu_mem_arena", (False, True)),
+    ("execution_mode", ("sequential", "parallel")),
+    ("intra_op_num_threads", (-1, 1, 2, 4)),
+    ("det_limit_side_len", (320, 480, 640)),
+    ("rec_img_width", (320, 480)),
+    ("quantized", (False, True)),
+)
+
+
+def _parse_setting(text):
+    """'key=v1,v2' -> (key, (v1, v2)); 取值按 整数 / true|false / 字符串 解析"""
+    key, _, values = text.partition("=")
+    parsed = []
+    for v in values.split(","):
+        v = v.strip()
+        if v.lower() in ("true", "false"):
+            parsed.append(v.lower() == "true")
+        else:
+            try:
+                parsed.append(int(v))
+            except ValueError:
+                parsed.append(v)
+    return key.strip(), tuple(parsed)
+
+
+def _sweep_configs(base, sweep, product=False):
+    """-> [(说明, 配置)]: 基准 + 逐项变化, product 为 True 时取全部组合"""
+    if product:
+        keys = [k for k, _ in sweep]
+        return [(" ".join(f"{k}={v}" for k, v in zip(keys, combo)), dict(base, **dict(zip(keys, combo))))
+                for combo in itertools.product(*(values for _, values in sweep))]
+    configs = [("基准", dict(base))]
+    for key, values in sweep:
+        for v in values:
+            if v != base[key]:
+                configs.append((f"{key}={v}", dict(base, **{key: v})))
+    return configs
+
+
+def cmd_engine(args):
+    from concurrent.futures import ThreadPoolExecutor
+    from scripts.ocr_pipeline import (ENGINE_DEFAULTS, create_engine, load_engine_settings,
+                                      validate_engine_settings, ocr_single, ocr_stitched, ocr_recognize)
+
+    frames = _load_screenshots(args.frames)
+    if not frames:
+        print(f"❌ 目录中没有截图: {args.frames}")
+        return
+    labels_path = args.labels or os.path.join(args.frames, "labels.json")
+    labels = _load_labels(labels_path) if os.path.exists(labels_path) else {}
+    if args.limit:
+        frames = frames[:args.limit]
+    try:
+        base = dict(ENGINE_DEFAULTS, **load_engine_settings())
+        base.update(validate_engine_settings({k: v[0] for k, v in map(_parse_setting, args.set)}))
+        sweep = tuple(_parse_setting(s) for s in args.sweep) or DEFAULT_SWEEP
+        configs = _sweep_configs(base, sweep, args.product)
+        for _, cfg in configs:
+            validate_engine_settings(cfg)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+
+    store, index = _load_dm()
+    executor = ThreadPoolExecutor(max_workers=3)
+    runners = {
+        "serial": lambda ocr, images: {k: ocr_single(ocr, img) for k, img in images.items()},
+        "parallel": lambda ocr, images: {k: f.result() for k, f in
+                                         {k: executor.submit(ocr_single, ocr, img) for k, img in images.items()}.items()},
+        "stitched": ocr_stitched,
+        "rec": lambda ocr, images: ocr_recognize(ocr, images)[0],
+    }
+    run = runners[args.mode]
+
+    print(f"截图: {len(frames)} 帧 | OCR 模式: {args.mode} | 每帧重复 {args.repeat} 次 | 配置 {len(configs)} 组")
+    print(f"基准: {json.dumps(base, ensure_ascii=False)}")
+    print(f"{'配置':<36}{'建引擎':>8}{'p50':>10}{'p95':>10}{'OCR 正确':>10}{'匹配正确':>10}")
+    for desc, cfg in configs:
+        t0 = time.perf_counter()
+        ocr = create_engine(settings=cfg)
+        build = time.perf_counter() - t0
+        run(ocr, frames[0][1])  # 预热
+        samples, ocr_ok, match_ok, total = [], 0, 0, 0
+        for name, images, _ in frames:
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                texts = run(ocr, images)
+                samples.append(time.perf_counter() - t0)
+            label = labels.get(name, {})
+            view = store.heroes.get(label.get("hero"))
+            keys = [k for k in images if label.get(k)]
+            if not keys:
+                continue
+            matches = index.match_batch([texts[k] for k in keys], view) if view else [{"match": None}] * len(keys)
+            for k, m in zip(keys, matches):
+                ocr_ok += texts[k] == label[k].replace(" ", "").replace(".", "")
+                match_ok += m["match"] == label[k]
+                total += 1
+        samples.sort()
+        acc = (f"{ocr_ok / total:>10.1%}{match_ok / total:>10.1%}" if total else f"{'-':>10}{'-':>10}")
+        print(f"{desc:<36}{build:>7.2f}s{percentile(samples, 50) * 1000:>8.1f}ms"
+              f"{percentile(samples, 95) * 1000:>8.1f}ms{acc}")
+    executor.shutdown()
+
+
+# ================= watch: 海克斯界面自动检测 =================
+
+def _watch_negatives(frame, regions, rng):
+    """由选择界面截图合成负样本: 卡片区域模糊掉文字 / 换成高纹理场景"""
+    import cv2
+    import numpy as np
+    blurred, textured = frame.copy(), frame.copy()
+    for r in regions.values():
+        ys, xs = slice(r['top'], r['top'] + r['height']), slice(r['left'], r['left'] + r['width'])
+        blurred[ys, xs] = cv2.blur(frame[ys, xs], (r['width'] // 2 | 1, r['height'] | 1))
+        noise = rng.integers(0, 256, (r['height'] // 6 + 1, r['width'] // 6 + 1, 4), dtype=np.uint8)
+        textured[ys, xs] = cv2.resize(noise, (r['width'], r['height']), interpolation=cv2.INTER_LINEAR)
+    return {"模糊无文字": blurred, "高纹理场景": textured}
+
+
+def cmd_watch(args):
+    import numpy as np
+    from scripts.augment_watch import WATCH_DEFAULTS, AugmentWatcher
+    from scripts.capture import FakeCapture, MssCapture, ReplayCapture, ThreadMssCapture
+    from scripts.ocr_pipeline import compute_regions
+
+    capture = ReplayCapture(args.frames)
+    labels = _load_labels(args.labels or os.path.join(args.frames, "labels.json")
+                          if args.labels or os.path.exists(os.path.join(args.frames, "labels.json")) else None)
+    negatives = ReplayCapture(args.negatives).paths if args.negatives else []
+    rng = np.random.default_rng(args.seed)
+
+    # 分类: {类别: [判为选择界面的数量, 总数]}
+    stats = {}
+    watcher = None
+    for path in capture.paths + negatives:
+        frame = capture.load(path)
+        regions = compute_regions(*capture.size)
+        positive = path not in negatives and (not labels or os.path.basename(path) in labels)
+        samples = {"选择界面" if positive else "负样本 (目录)": frame}
+        if positive:
+            samples.update(_watch_negatives(frame, regions, rng))
+        for kind, image in samples.items():
+            watcher = AugmentWatcher(regions, FakeCapture(image))
+            stat = stats.setdefault(kind, [0, 0])
+            stat[0] += watcher.sample()
+            stat[1] += 1
+    if not stats:
+        print(f"❌ 目录中没有截图: {args.frames}")
+        return
+    print(f"分类结果 ({args.frames}):")
+    for kind, (hits, total) in stats.items():
+        print(f"  {kind:<12} 判为选择界面 {hits}/{total}")
+
+    # 单次采样耗时 (截图 + 缩略图 + 分类)
+    backends = [("回放截图 (FakeCapture)", watcher)]
+    if args.live:
+        try:
+            import mss
+            with mss.mss() as sct:
+                mon = sct.monitors[1]
+            live_regions = compute_regions(mon['width'], mon['height'])
+            backends += [("实时截屏 (每次新建 mss)", AugmentWatcher(live_regions, MssCapture())),
+                         ("实时截屏 (常驻 mss 句柄)", AugmentWatcher(live_regions, ThreadMssCapture()))]
+        except Exception as e:
+            print(f"⚠ 无法截屏 ({e}), 只测回放截图")
+    interval = WATCH_DEFAULTS["interval"]
+    print(f"\n单次采样耗时 (重复 {args.repeat} 次) 与默认间隔 {interval}s 下的单核 CPU 占用:")
+    for name, w in backends:
+        w.sample()
+        wall, cpu = [], []
+        for _ in range(args.repeat):
+            t0, c0 = time.perf_counter(), time.thread_time()
+            w.sample()
+            wall.append(time.perf_counter() - t0)
+            cpu.append(time.thread_time() - c0)
+        wall.sort()
+        mean_cpu = sum(cpu) / len(cpu)
+        print(f"  {name:<22} p50 {wall[len(wall) // 2] * 1000:>6.2f}ms  "
+              f"p90 {wall[int(len(wall) * 0.9)] * 1000:>6.2f}ms  CPU {mean_cpu * 1000:>6.2f}ms  "
+              f"占用 {mean_cpu / interval:.2%}")
+        w.close()
+
+
+# ================= lcu: LCU 轮询 =================
+
+class _OneShotSession:
+    """旧版行为: 每次请求直接 requests.request (新建连接, TCP + TLS 握手)"""
+
+    def __init__(self, auth=None):
+        self.auth = auth
+
+    def request(self, method, url, **kwargs):
+        import requests
+        return requests.request(method, url, auth=self.auth, verify=False, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def close(self):
+        pass
+
+
+# (说明, 阶段, 注入延迟): 延迟超过 LCU_TIMEOUT 的接口会超时并重试一次
+_LCU_SLOW_PATHS = ("/lol-gameflow/v1/gameflow-phase", "/lol-champ-select/v1/session", "/lol-gameflow/v1/session")
+_LCU_SLOW_SCENARIOS = (
+    ("选人: 阶段接口慢 2.5s", "ChampSelect", {"/lol-gameflow/v1/gameflow-phase": 2.5}),
+    ("对局中: 对局信息超时", "InProgress", {"/lol-gameflow/v1/session": 10}),
+    ("对局中: LCU 全部超时", "InProgress", {path: 10 for path in _LCU_SLOW_PATHS}),
+    ("选人: LCU 全部超时", "ChampSelect", {path: 10 for path in _LCU_SLOW_PATHS}),
+)
+
+
+def _lcu_slow(args):
+    import contextlib
+    import io
+    from scripts.config import CHAMPION_ID_FILE
+    from scripts.fake_lcu import FakeLCU
+    from scripts.lcu_connector import LCUConnector
+
+    print(f"慢接口场景, 每种查询方式 {args.slow_repeat} 次 (本地 HTTPS 模拟服务器注入延迟)")
+    print(f"  {'场景':<22}{'方式':<8}{'最大耗时':>10}{'结果':>14}")
+    for label, phase, delays in _LCU_SLOW_SCENARIOS:
+        fake = FakeLCU(phase=phase).start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                connector = LCUConnector(CHAMPION_ID_FILE, id_cache_path=None, key_path=None)  # 不读写真实缓存
+                fake.attach(connector)  # 连接时不注入延迟
+            fake.delays.update(delays)
+            for name, query in (("顺序", connector.get_champion_auto), ("并发", connector.get_champion_race)):
+                worst, result = 0.0, None
+                for _ in range(args.slow_repeat):
+                    connector._connected = True  # 超时会标记断开; 只比较查询本身, 不重新扫描进程
+                    t0 = time.perf_counter()
+                    result = query()
+                    worst = max(worst, time.perf_counter() - t0)
+                outcome = f"{result[0]} ({result[1]})" if result[0] else f"无 ({result[1] or '-'})"
+                print(f"  {label:<22}{name:<8}{worst * 1000:>8.0f}ms  {outcome}")
+            connector.close()
+        finally:
+            fake.delays.clear()
+            fake.stop()
+
+
+def cmd_lcu(args):
+    import contextlib
+    import io
+    from scripts.config import CHAMPION_ID_FILE
+    from scripts.fake_lcu import FakeLCU
+    from scripts.lcu_connector import LCUConnector
+
+    if args.slow:
+        return _lcu_slow(args)
+
+    # (说明, 阶段, 对局信息中是否含自己): 选人 2 次请求; 对局中回退 Live API 共 3 次请求
+    scenarios = (("选人阶段", "ChampSelect", True), ("对局中 (回退 Live API)", "InProgress", False))
+    print(f"每种场景轮询 {args.repeat} 次 get_champion_auto (本地 HTTPS 模拟服务器)")
+    print(f"  {'场景':<20}{'方式':<12}{'p50':>9}{'p90':>9}{'连接/次':>9}{'请求/次':>9}")
+    for label, phase, player in scenarios:
+        fake = FakeLCU(phase=phase, gameflow_player=player).start()
+        try:
+            for name, pooled in (("每次新建连接", False), ("常驻会话", True)):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    connector = LCUConnector(CHAMPION_ID_FILE, id_cache_path=None, key_path=None)  # 不读写真实缓存
+                    if not pooled:
+                        connector._lcu_session = _OneShotSession(('riot', fake.token))
+                        connector._live_session = _OneShotSession()
+                    fake.attach(connector)
+                hero, _ = connector.get_champion_auto()  # 预热
+                if hero is None:
+                    print(f"❌ {label}: 未获取到英雄")
+                    break
+                conns, reqs = fake.connections, fake.requests
+                samples = []
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    connector.get_champion_auto()
+                    samples.append(time.perf_counter() - t0)
+                samples.sort()
+                print(f"  {label:<20}{name:<12}{samples[len(samples) // 2] * 1000:>7.2f}ms"
+                      f"{samples[int(len(samples) * 0.9)] * 1000:>7.2f}ms"
+                      f"{(fake.connections - conns) / args.repeat:>9.2f}{(fake.requests - reqs) / args.repeat:>9.2f}")
+                connector.close()
+        finally:
+            fake.stop()
+
+    # 事件订阅: 选人阶段更换英雄 -> 回调 (轮询时平均要等半个轮询间隔)
+    fake = FakeLCU(phase="ChampSelect").start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            connector = LCUConnector(CHAMPION_ID_FILE, id_cache_path=None, key_path=None)  # 不读写真实缓存
+            fake.attach(connector)
+        changed = threading.Event()
+        if connector.subscribe(lambda hero, source: changed.set()) is None:
+            print("⚠ 未安装 websocket-client, 跳过事件推送测试")
+            return
+        if not changed.wait(5):  # 订阅后的首次同步
+            print("❌ 事件订阅失败")
+            return
+        aliases = list(fake.champion_ids)
+        samples = []
+        for i in range(args.repeat):
+            changed.clear()
+            t0 = time.perf_counter()
+            fake.set_champion(aliases[1 + i % 2])
+            if not changed.wait(2):
+                print("❌ 未收到推送")
+                break
+            samples.append(time.perf_counter() - t0)
+        if samples:
+            samples.sort()
+            print(f"  {'选人阶段更换英雄':<20}{'事件推送':<12}{samples[len(samples) // 2] * 1000:>7.2f}ms"
+                  f"{samples[int(len(samples) * 0.9)] * 1000:>7.2f}ms"
+                  f"  (2s 轮询平均延迟约 1000ms)")
+        connector.close()
+    finally:
+        fake.stop()
+
+
+# ================= champion-ids: 英雄 ID 映射 =================
+
+def cmd_champion_ids(args):
+    import contextlib
+    import io
+    import tempfile
+    from scripts.config import CHAMPION_ID_FILE
+    from scripts.fake_lcu import FakeLCU
+    from scripts.lcu_connector import LCUConnector, save_champion_ids
+
+    summary = "/lol-game-data/assets/v1/champion-summary.json"
+    fake = FakeLCU(phase="ChampSelect").start()
+    if args.summary_ms:
+        fake.delays[summary] = args.summary_ms / 1000  # 模拟客户端 game-data 插件的响应耗时
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = os.path.join(tmp, "champion_ids.json")
+            keys = os.path.join(tmp, "champion_keys.json")
+            # 模拟 updater 同步的 ddragon 数据 (key -> 英文名)
+            save_champion_ids(keys, "ddragon", {i: alias for alias, i in fake.champion_ids.items()})
+            with contextlib.redirect_stdout(io.StringIO()):
+                connector = LCUConnector(CHAMPION_ID_FILE, id_cache_path=cache, key_path=None)
+                fake.attach(connector)  # 首次连接: 下载并写入缓存
+
+            def build(label, forget):
+                samples, before = [], fake.hits(summary)
+                for _ in range(args.repeat):
+                    if forget:
+                        connector._id_version = None  # 旧版行为: 每次连接都下载
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        t0 = time.perf_counter()
+                        connector._build_champion_id_map()
+                        samples.append(time.perf_counter() - t0)
+                samples.sort()
+                print(f"  {label:<24}{samples[len(samples) // 2] * 1000:>8.2f}ms"
+                      f"{(fake.hits(summary) - before) / args.repeat:>10.2f}{len(connector.id_to_cn):>8}")
+
+            print(f"连接时构建英雄 ID 映射 (中位数, {args.repeat} 次; 英雄数据接口附加延迟 {args.summary_ms:.0f}ms)")
+            print(f"  {'场景':<22}{'耗时':>10}{'下载/次':>8}{'映射数':>6}")
+            build("旧版 (每次下载)", True)
+            build("版本一致 (使用缓存)", False)
+            with contextlib.redirect_stdout(io.StringIO()):
+                t0 = time.perf_counter()
+                restarted = LCUConnector(CHAMPION_ID_FILE, id_cache_path=cache, key_path=None)
+                load = time.perf_counter() - t0
+            print(f"  重启后读缓存预填: {len(restarted.id_to_cn)} 个英雄 (创建连接器共 {load * 1000:.2f}ms)")
+            connector.close()
+
+            # 英雄数据接口无应答 (且无缓存) 时, 只靠 ddragon 预填识别英雄
+            os.remove(cache)
+            fake.delays[summary] = 10
+            with contextlib.redirect_stdout(io.StringIO()):
+                seeded = LCUConnector(CHAMPION_ID_FILE, id_cache_path=cache, key_path=keys)
+                seeded.port, seeded.auth_token, seeded.base_url = str(fake.port), fake.token, fake.url
+                seeded._lcu_session.auth = ('riot', fake.token)
+                seeded._connected = True
+            print(f"  ddragon 预填: {len(seeded.id_to_cn)} 个英雄; 英雄数据接口无应答时选人英雄: "
+                  f"{seeded.get_champ_select_champion() or '未识别'}")
+            seeded.close()
+    finally:
+        fake.delays.clear()
+        fake.stop()
+
+
+# ================= discovery: 客户端发现 =================
+
+def _legacy_discover(ps):
+    """旧版 _connect_via_process: 取每个进程的命令行后再判断进程名"""
+    for proc in ps.process_iter(['pid', 'name', 'cmdline']):
+        if proc.info['name'] and proc.info['name'].lower() == 'leagueclientux.exe':
+            port = token = None
+            for arg in proc.info.get('cmdline') or []:
+                if '--app-port=' in arg:
+                    port = arg.split('=', 1)[1]
+                elif '--remoting-auth-token=' in arg:
+                    token = arg.split('=', 1)[1]
+            if port and token:
+                return port, token
+    return None
+
+
+def cmd_discovery(args):
+    import tempfile
+    from scripts.fake_lcu import FakeProcessTable
+    from scripts.lcu_connector import SCAN_INTERVAL, ClientDiscovery
+
+    def timed(func):
+        samples, result = [], None
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            result = func()
+            samples.append(time.perf_counter() - t0)
+        samples.sort()
+        return samples[len(samples) // 2], result
+
+    def row(label, seconds, result, extra=""):
+        print(f"  {label:<34}{seconds * 1000:>9.3f}ms  {'找到' if result else '未找到'}{extra}")
+
+    costs = dict(name_cost=args.name_us / 1e6, cmdline_cost=args.cmdline_us / 1e6)
+    print(f"模拟进程表: {args.processes} 个进程 | 读进程名 {args.name_us}us | 读命令行 {args.cmdline_us}us | 中位数 ({args.repeat} 次)")
+    with tempfile.TemporaryDirectory() as tmp:
+        install = os.path.join(tmp, "League of Legends")
+        os.makedirs(install)
+        cache = os.path.join(tmp, "lcu_discovery.json")
+        table = FakeProcessTable(args.processes, install, port="50000", token="tok", **costs)
+
+        print("客户端运行中:")
+        row("旧版 (扫描全部命令行)", *timed(lambda: _legacy_discover(table)))
+        first = ClientDiscovery(cache_path=cache, install_paths=[], ps=table)
+        row("首次 (扫描进程名)", *timed(lambda: ClientDiscovery(cache_path=None, install_paths=[], ps=table).find()))
+        first.find()  # 扫描后记住 PID, 安装目录写入缓存
+        row("再次连接 (上次的 PID)", *timed(first.find), f"  [{first.method}]")
+        table.write_lockfile(install, port="50000", token="tok")
+        restarted = ClientDiscovery(cache_path=cache, install_paths=[], ps=table)  # 读取缓存的安装目录
+        row("重启程序后 (缓存的安装目录 + lockfile)", *timed(restarted.find), f"  [{restarted.method}]")
+
+        print("客户端未运行 (每 2 秒重试一次):")
+        os.remove(os.path.join(install, "lockfile"))
+        idle = FakeProcessTable(args.processes, **costs)
+        row("旧版 (每次扫描全部命令行)", *timed(lambda: _legacy_discover(idle)))
+        waiting = ClientDiscovery(cache_path=cache, install_paths=[], ps=idle)
+
+        def due_scan():
+            waiting._last_scan = None
+            return waiting.find()
+        row("扫描进程名 (到达扫描间隔时)", *timed(due_scan))
+        row("检查 lockfile (扫描间隔内)", *timed(waiting.find))
+        per_minute = 60 / max(SCAN_INTERVAL, 2.0)
+        print(f"  每分钟扫描: 旧版 30 次 (全部命令行) -> {per_minute:.0f} 次 (进程名)，其余重试只检查 lockfile")
+
+    import psutil
+    print(f"本机进程表 ({len(psutil.pids())} 个进程, 客户端未运行时):")
+    row("旧版 (扫描全部命令行)", *timed(lambda: _legacy_discover(psutil)))
+    row("扫描进程名", *timed(lambda: ClientDiscovery(cache_path=None, install_paths=[]).find()))
+
+
+# ================= 入口 =================
+
+def main(argv=None):
+    from scripts.ocr_pipeline import OCR_MODES
+    parser = argparse.ArgumentParser(prog="python -m scripts.benchmark", description="ARAM 助手性能基准测试")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("memory", help="海克斯数据内存占用对比")
+    p.add_argument("--variant", choices=["legacy", "compact"], help=argparse.SUPPRESS)
+    p.set_defaults(func=cmd_memory)
+
+    p = sub.add_parser("match", help="OCR 文本匹配耗时对比")
+    p.add_argument("--samples", help="OCR 样本文件 (每行: 英雄<TAB>OCR文本)")
+    p.add_argument("--count", type=int, default=2000, help="模拟样本数量")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--seed", type=int, default=42)
+    p.set_defaults(func=cmd_match)
+
+    p = sub.add_parser("ocr", help="OCR 执行模式耗时对比 (serial / parallel / stitched / rec)")
+    p.add_argument("--images", help="整屏游戏截图目录 (按截图分辨率裁剪区域); 缺省时合成样本")
+    p.add_argument("--font", help="合成样本使用的中文字体路径")
+    p.add_argument("--count", type=int, default=20, help="合成样本帧数")
+    p.add_argument("--modes", default="serial,parallel,stitched,rec")
+    p.add_argument("--threads", type=int, default=-1, help="onnxruntime intra_op_num_threads (-1 为默认)")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--seed", type=int, default=42)
+    p.set_defaults(func=cmd_ocr)
+
+    p = sub.add_parser("capture", help="截图 + 预处理耗时对比")
+    p.add_argument("--synthetic", action="store_true", help="不截屏, 使用合成整屏图像")
+    p.add_argument("--grab-latency-ms", type=float, default=0.0,
+                   help="合成模式下每次截图附加的固定耗时, 模拟系统截屏调用开销")
+    p.add_argument("--repeat", type=int, default=200)
+    p.add_argument("--seed", type=int, default=42)
+    p.set_defaults(func=cmd_capture)
+
+    p = sub.add_parser("crops", help="单卡语料 OCR + 匹配准确率与吞吐")
+    p.add_argument("corpus", help="单卡语料目录 (含 labels.json, 如 data/cache/synth/crops)")
+    p.add_argument("--mode", choices=["serial", "rec"], default="serial", help="det+rec 或纯识别")
+    p.add_argument("--limit", type=int, default=0, help="随机抽取的样本数 (0 为全部)")
+    p.add_argument("--threads", type=int, default=-1, help="onnxruntime intra_op_num_threads (-1 为默认)")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--verbose", action="store_true", help="输出识别错误")
+    p.set_defaults(func=cmd_crops)
+
+    p = sub.add_parser("replay", help="离线回放截图目录, 统计各阶段耗时与准确率")
+    p.add_argument("frames", help="整屏游戏截图目录 (可混合多种分辨率)")
+    p.add_argument("--labels", help="标注文件 (JSON): {文件名: {hero, hex_1, hex_2, hex_3}}")
+    p.add_argument("--hero", help="标注中缺少英雄时使用的英雄名")
+    p.add_argument("--mode", choices=OCR_MODES, help="OCR 模式 (默认按 CPU 自动选择)")
+    p.add_argument("--cache", action="store_true", help="启用帧差缓存与 OCR 缓存 (默认关闭, 每帧真实推理)")
+    p.add_argument("--vocab", action="store_true", default=None,
+                   help="词表约束解码 (字符集约束 + rec 模式词典束搜索); 缺省时取 data/ocr_engine.json")
+    p.add_argument("--workers", type=int, default=None,
+                   help="OCR 工作进程数 (0 为进程内识别); 缺省时取 data/ocr_engine.json")
+    p.add_argument("--repeat", type=int, default=1)
+    p.add_argument("--verbose", action="store_true", help="输出分析日志与识别错误")
+    p.set_defaults(func=cmd_replay)
+
+    p = sub.add_parser("engine", help="扫描 OCR 引擎配置 (onnxruntime 会话选项 / det/rec 输入尺寸)")
+    p.add_argument("frames", help="整屏截图目录 (如 data/cache/synth/frames)")
+    p.add_argument("--labels", help="标注文件 (默认为目录下的 labels.json)")
+    p.add_argument("--mode", choices=OCR_MODES, default="stitched")
+    p.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                   help="修改基准配置 (默认取 data/ocr_engine.json), 可重复")
+    p.add_argument("--sweep", action="append", default=[], metavar="KEY=V1,V2",
+                   help="扫描的配置项与取值, 可重复 (缺省时扫描全部预设项)")
+    p.add_argument("--product", action="store_true", help="扫描全部组合 (默认每次只改变一项)")
+    p.add_argument("--limit", type=int, default=0, help="最多使用的截图数 (0 为全部)")
+    p.add_argument("--repeat", type=int, default=1)
+    p.set_defaults(func=cmd_engine)
+
+    p = sub.add_parser("watch", help="监视模式: 海克斯界面分类与采样耗时")
+    p.add_argument("frames", help="选择界面整屏截图目录 (如 data/cache/synth/frames)")
+    p.add_argument("--labels", help="标注文件 (默认为目录下的 labels.json; 只把标注中的截图当作选择界面)")
+    p.add_argument("--negatives", help="非选择界面的整屏截图目录 (对局画面等)")
+    p.add_argument("--live", action="store_true", help="同时测量实时截屏的采样耗时")
+    p.add_argument("--repeat", type=int, default=200)
+    p.add_argument("--seed", type=int, default=42)
+    p.set_defaults(func=cmd_watch)
+
+    p = sub.add_parser("lcu", help="LCU 轮询: 每次新建连接 vs 常驻会话")
+    p.add_argument("--repeat", type=int, default=200)
+    p.add_argument("--slow", action="store_true", help="注入慢接口/超时, 比较顺序查询与并发查询的最坏耗时")
+    p.add_argument("--slow-repeat", type=int, default=2)
+    p.set_defaults(func=cmd_lcu)
+
+    p = sub.add_parser("champion-ids", help="英雄 ID 映射: 每次下载 vs 按客户端版本缓存")
+    p.add_argument("--repeat", type=int, default=20)
+    p.add_argument("--summary-ms", type=float, default=0.0, help="英雄数据接口的附加响应延迟 (毫秒)")
+    p.set_defaults(func=cmd_champion_ids)
+
+    p = sub.add_parser("discovery", help="客户端发现: 扫描全部命令行 vs lockfile / PID 缓存")
+    p.add_argument("--processes", type=int, default=400, help="模拟进程数")
+    p.add_argument("--name-us", type=float, default=10.0, help="读取进程名的模拟耗时 (微秒)")
+    p.add_argument("--cmdline-us", type=float, default=150.0, help="读取命令行的模拟耗时 (微秒)")
+    p.add_argument("--repeat", type=int, default=50)
+    p.set_defaults(func=cmd_discovery)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+屏幕截图后端
+运行: python -m scripts.benchmark capture  (逐区域截图 vs 单次条带截图)
+
+三个海克斯区域位于同一水平条带 (top = H*0.375)，
+grab_regions 只截取覆盖全部区域的外接矩形一次，
+各卡片以该缓冲区上的 numpy 切片 (视图, 不拷贝) 的形式返回。
+
+后端约定: grab_raw(box) 返回 mss ScreenShot (BGRA 原始缓冲区)，
+          grab(box) 返回其上的 (高, 宽, 4) BGRA 视图。
+  MssCapture     实时截屏
+  ThreadMssCapture  实时截屏, 每个线程常驻一个 mss 句柄 (高频采样用, 见 scripts/augment_watch.py)
+  FakeCapture    从内存中的整屏 BGRA 图像截取 (无显示器环境/基准测试)
+  ReplayCapture  回放保存的整屏截图目录 (可混合多种分辨率, 提供 size 供按分辨率计算区域)
+"""
+import os
+import threading
+import time
+
+import mss
+import numpy as np
+from mss.screenshot import ScreenShot
+
+
+def bgra_view(shot):
+    """mss 截图原始 BGRA 缓冲区上的 (高, 宽, 4) 视图 (不拷贝像素)"""
+    return np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+
+
+def union_box(regions):
+    """覆盖所有区域的最小外接矩形 (mss 截图区域格式)"""
+    top = min(int(r['top']) for r in regions.values())
+    left = min(int(r['left']) for r in regions.values())
+    bottom = max(int(r['top']) + int(r['height']) for r in regions.values())
+    right = max(int(r['left']) + int(r['width']) for r in regions.values())
+    return {"top": top, "left": left, "width": right - left, "height": bottom - top, "mon": 0}
+
+
+class MssCapture:
+    """mss 实时截屏 (每次截图新建上下文: mss 句柄不能跨线程复用)"""
+
+    def grab_raw(self, box):
+        with mss.mss() as sct:
+            return sct.grab(box)
+
+    def grab(self, box):
+        return bgra_view(self.grab_raw(box))
+
+
+class ThreadMssCapture(MssCapture):
+    """每个线程常驻一个 mss 句柄, 省去每次截图新建上下文的开销 (句柄只在创建它的线程中使用)"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def grab_raw(self, box):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            sct = self._local.sct = mss.mss()
+        return sct.grab(box)
+
+    def close(self):
+        """关闭当前线程的句柄"""
+        sct = getattr(self._local, "sct", None)
+        if sct is not None:
+            sct.close()
+            self._local.sct = None
+
+
+class FakeCapture:
+    """
+    从整屏 BGRA 图像截取, 与 mss 一样每次截图拷贝出新的缓冲区。
+    latency: 每次截图附加的固定耗时 (秒)，用于模拟系统截屏调用的单次开销。
+    """
+
+    def __init__(self, frame, latency=0.0):
+        self.frame = frame
+        self.latency = latency
+        self.grabs = 0
+
+    @property
+    def size(self):
+        h, w = self.frame.shape[:2]
+        return w, h
+
+    def grab_raw(self, box):
+        self.grabs += 1
+        if self.latency:
+            time.sleep(self.latency)
+        top, left = int(box['top']), int(box['left'])
+        pixels = self.frame[top:top + int(box['height']), left:left + int(box['width'])]
+        return ScreenShot(bytearray(pixels.tobytes()), box)
+
+    def grab(self, box):
+        return bgra_view(self.grab_raw(box))
+
+
+class ReplayCapture(FakeCapture):
+    """回放整屏截图: load(path) 切换当前帧, 之后的截图都从该帧截取"""
+
+    IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp")
+
+    def __init__(self, folder):
+        super().__init__(None)
+        self.folder = folder
+        self.paths = sorted(
+            os.path.join(folder, name) for name in os.listdir(folder)
+            if name.lower().endswith(self.IMAGE_EXTS)
+        )
+        self.current = None
+
+    def load(self, path):
+        import cv2
+        from PIL import Image
+        with Image.open(path) as img:
+            self.frame = cv2.cvtColor(np.asarray(img.convert("RGB")), cv2.COLOR_RGB2BGRA)
+        self.current = path
+        return self.frame
+
+
+def grab_regions(backend, regions):
+    """
+    单次截取所有区域的外接矩形, 返回 {key: BGRA 切片视图}。
+    切片共享同一缓冲区, 在下一次截图前有效。
+    """
+    box = union_box(regions)
+    strip = backend.grab(box)
+    views = {}
+    for key, r in regions.items():
+        y, x = int(r['top']) - box['top'], int(r['left']) - box['left']
+        views[key] = strip[y:y + int(r['height']), x:x + int(r['width'])]
+    return views
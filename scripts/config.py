@@ -21,3 +21,19 @@ DATA_DIR = os.path.join(BASE_DIR, 'data')
 CHAMPION_ID_FILE = os.path.join(DATA_DIR, "champions.json")
 PINYIN_FILE      = os.path.join(DATA_DIR, "pinyin_map.json")
 CSV_FILE         = os.path.join(DATA_DIR, "hero_augments.csv")
+CHAMPION_KEY_FILE = os.path.join(DATA_DIR, "champion_keys.json")  # ddragon 英雄数字 ID (key) -> 英文名
+
+# 本地缓存目录 (编译快照等可再生文件, 删除后自动重建)
+CACHE_DIR        = os.path.join(DATA_DIR, "cache")
+AUGMENT_DB_FILE  = os.path.join(CACHE_DIR, "hero_augments.bin")
+OCR_CACHE_FILE   = os.path.join(CACHE_DIR, "ocr_cache.json")
+PERF_TRACE_FILE  = os.path.join(CACHE_DIR, "perf_trace.jsonl")
+OCR_PROFILE_FILE = os.path.join(CACHE_DIR, "ocr_profile.json")
+OCR_MODEL_DIR    = os.path.join(CACHE_DIR, "models")
+OCR_QUANT_FILE   = os.path.join(OCR_MODEL_DIR, "quantized.json")
+LCU_DISCOVERY_FILE = os.path.join(CACHE_DIR, "lcu_discovery.json")
+CHAMPION_ID_CACHE_FILE = os.path.join(CACHE_DIR, "champion_ids.json")  # LCU 英雄 ID 映射 (按客户端版本)
+
+# 用户配置 (可选, 不存在时使用默认值)
+OCR_ENGINE_FILE  = os.path.join(DATA_DIR, "ocr_engine.json")
+WATCH_FILE       = os.path.join(DATA_DIR, "watch.json")
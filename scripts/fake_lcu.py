@@ -0,0 +1,451 @@
+"""
+本地 LCU / Live Client Data API 模拟服务器 (HTTPS, 自签名证书)
+运行: python -m scripts.fake_lcu [--phase ChampSelect] [--champion Ahri] [--port 0]
+      python -m scripts.benchmark lcu  (每次新建连接 vs 常驻会话的单次轮询耗时)
+
+实现 LCUConnector 用到的接口，返回最小可用的数据:
+  /lol-gameflow/v1/gameflow-phase            当前阶段
+  /lol-summoner/v1/current-summoner          召唤师 ID
+  /lol-patch/v1/game-version                 客户端版本 (version)
+  /lol-game-data/assets/v1/champion-summary.json  英雄 ID 列表 (按 champions.json 顺序编号)
+  /lol-champ-select/v1/session               选人阶段 (phase == ChampSelect)
+  /lol-gameflow/v1/session                   对局信息 (gameflow_player=False 时不含自己, 迫使回退 Live API)
+  /liveclientdata/activeplayer               Live API (免密, 对局中)
+  /  (WebSocket, WAMP)                       事件订阅: [5, 主题] 订阅, set_phase / set_champion 时推送 [8, 主题, 事件]
+LCU 接口校验 Basic 认证 (riot:令牌)。HTTP/1.1 keep-alive, 统计建立的连接数与请求数。
+delays 可为任意接口注入响应延迟 (模拟客户端卡顿 / 接口超时)。
+FakeProcessTable 模拟 psutil 的进程接口 (客户端发现的基准测试用)。
+证书由 openssl 命令行临时生成 (也可用 --cert/--key 指定)。
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import shutil
+import socket
+import ssl
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import psutil
+
+# 兼容直接运行和包导入
+try:
+    from scripts.config import CHAMPION_ID_FILE
+except ImportError:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    parent_dir = os.path.dirname(current_dir)
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+    from scripts.config import CHAMPION_ID_FILE
+
+SUMMONER_ID = 1001
+IN_GAME_PHASES = ("InProgress", "GameStart")
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"  # RFC 6455 握手常量
+WS_TEXT, WS_CLOSE, WS_PING, WS_PONG = 0x1, 0x8, 0x9, 0xA
+
+
+def ws_read_frame(rfile):
+    """读取一个客户端帧 (带掩码), 返回 (opcode, 数据); 连接关闭时返回 (None, b"")"""
+    head = rfile.read(2)
+    if len(head) < 2:
+        return None, b""
+    opcode, length = head[0] & 0x0F, head[1] & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", rfile.read(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", rfile.read(8))[0]
+    mask = rfile.read(4) if head[1] & 0x80 else b"\0\0\0\0"
+    data = rfile.read(length)
+    return opcode, bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+
+
+def ws_frame(opcode, data):
+    """服务器帧 (不带掩码, 单帧)"""
+    n = len(data)
+    if n < 126:
+        head = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 1 << 16:
+        head = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        head = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return head + data
+
+
+def generate_cert(folder):
+    """用 openssl 生成 127.0.0.1 的自签名证书, 返回 (证书, 私钥) 路径"""
+    openssl = shutil.which("openssl")
+    if not openssl:
+        raise RuntimeError("未找到 openssl, 请用 --cert/--key 指定证书")
+    cert, key = os.path.join(folder, "cert.pem"), os.path.join(folder, "key.pem")
+    subprocess.run([openssl, "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                    "-subj", "/CN=127.0.0.1", "-keyout", key, "-out", cert],
+                   check=True, capture_output=True)
+    return cert, key
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # 响应头与正文分两次写出, 否则 keep-alive 下每次请求多等一个延迟 ACK
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+            self.server.active.add(self.connection)
+
+    def finish(self):
+        with self.server.lock:
+            self.server.active.discard(self.connection)
+        super().finish()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (OSError, ssl.SSLError):
+            self.close_connection = True  # 客户端已超时放弃 (注入延迟时)
+
+    def do_GET(self):
+        fake = self.server.fake
+        path = self.path.split("?", 1)[0]
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.hits[path] = self.server.hits.get(path, 0) + 1
+        delay = fake.delays.get(path)
+        if delay:
+            time.sleep(delay)
+        if self.headers.get("Upgrade", "").lower() == "websocket":
+            if self.headers.get("Authorization") != fake.auth_header:
+                return self._send(401, {"message": "unauthorized"})
+            return self._websocket()
+        if path.startswith("/liveclientdata/"):
+            if path == "/liveclientdata/activeplayer" and fake.phase in IN_GAME_PHASES:
+                return self._send(200, {"championName": fake.champion})
+            return self._send(404, {"message": "not in game"})
+        if self.headers.get("Authorization") != fake.auth_header:
+            return self._send(401, {"message": "unauthorized"})
+        route = fake.routes().get(path)
+        if route is None:
+            return self._send(404, {"message": f"no route: {path}"})
+        self._send(200, route)
+
+    def _websocket(self):
+        """WAMP 事件连接: 握手后只处理订阅 / ping / 关闭, 事件由 FakeLCU.publish 推送"""
+        accept = base64.b64encode(hashlib.sha1((self.headers["Sec-WebSocket-Key"] + WS_GUID).encode()).digest())
+        self.send_response(101)
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", accept.decode())
+        if "wamp" in self.headers.get("Sec-WebSocket-Protocol", ""):
+            self.send_header("Sec-WebSocket-Protocol", "wamp")
+        self.end_headers()
+        self.wfile.flush()
+        self.close_connection = True
+        client = _WsClient(self.connection)
+        with self.server.lock:
+            self.server.ws_clients.add(client)
+        try:
+            while True:
+                opcode, data = ws_read_frame(self.rfile)
+                if opcode is None or opcode == WS_CLOSE:
+                    break
+                if opcode == WS_PING:
+                    client.send(WS_PONG, data)
+                elif opcode == WS_TEXT:
+                    try:
+                        msg = json.loads(data)
+                    except ValueError:
+                        continue
+                    if isinstance(msg, list) and len(msg) >= 2 and msg[0] == 5:
+                        client.topics.add(msg[1])
+        except OSError:
+            pass
+        finally:
+            with self.server.lock:
+                self.server.ws_clients.discard(client)
+
+
+class _WsClient:
+    """已握手的 WebSocket 连接 (发送加锁: 推送来自调用 publish 的线程)"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.topics = set()
+        self.lock = threading.Lock()
+
+    def send(self, opcode, data):
+        with self.lock:
+            self.sock.sendall(ws_frame(opcode, data))
+
+
+class FakeLCU:
+    """
+    模拟客户端 (start() 后在后台线程中服务, stop() 关闭)。
+
+    Args:
+        phase: gameflow 阶段
+        champion: 当前英雄英文名 (champions.json 中的值)
+        gameflow_player: /lol-gameflow/v1/session 中是否包含自己
+        delays: {接口路径: 响应前等待秒数}
+        version: 客户端版本
+    """
+
+    def __init__(self, phase="ChampSelect", champion=None, gameflow_player=True, token="fake-token",
+                 port=0, cert=None, key=None, champions_path=CHAMPION_ID_FILE, delays=None, version="14.20.620.6321"):
+        with open(champions_path, 'r', encoding='utf-8') as f:
+            aliases = list(json.load(f).values())
+        self.champion_ids = {alias: i + 1 for i, alias in enumerate(aliases)}
+        self.phase = phase
+        self.champion = champion or aliases[0]
+        self.gameflow_player = gameflow_player
+        self.delays = dict(delays or {})
+        self.version = version
+        self.token = token
+        self.auth_header = "Basic " + base64.b64encode(f"riot:{token}".encode()).decode()
+
+        self._tmp = None
+        if not cert:
+            self._tmp = tempfile.mkdtemp(prefix="fake_lcu_")
+            cert, key = generate_cert(self._tmp)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.server.daemon_threads = True
+        self.server.socket = context.wrap_socket(self.server.socket, server_side=True)
+        self.server.fake = self
+        self.server.lock = threading.Lock()
+        self.server.connections = 0
+        self.server.requests = 0
+        self.server.hits = {}  # 接口路径 -> 请求次数
+        self.server.active = set()  # 进行中的 keep-alive 连接 (stop 时断开, 模拟客户端退出)
+        self.server.ws_clients = set()
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    @property
+    def url(self):
+        return f"https://127.0.0.1:{self.port}"
+
+    @property
+    def connections(self):
+        """已接受的连接数 (每个连接一次 TCP + TLS 握手)"""
+        return self.server.connections
+
+    @property
+    def requests(self):
+        return self.server.requests
+
+    def hits(self, path):
+        """某个接口被请求的次数"""
+        with self.server.lock:
+            return self.server.hits.get(path, 0)
+
+    def routes(self):
+        cid = self.champion_ids.get(self.champion, 0)
+        me = {"summonerId": SUMMONER_ID, "championId": cid}
+        routes = {
+            "/lol-gameflow/v1/gameflow-phase": self.phase,
+            "/lol-summoner/v1/current-summoner": {"summonerId": SUMMONER_ID},
+            "/lol-patch/v1/game-version": self.version,
+            "/lol-game-data/assets/v1/champion-summary.json":
+                [{"id": -1, "alias": "None", "name": "None", "roles": []}]
+                + [{"id": i, "alias": a, "name": a, "roles": ["fighter"],
+                    "squarePortraitPath": f"/lol-game-data/assets/v1/champion-icons/{i}.png"}
+                   for a, i in self.champion_ids.items()],
+            "/lol-gameflow/v1/session": {"phase": self.phase, "gameData": {
+                "teamOne": [me] if self.gameflow_player else [], "teamTwo": [],
+                "playerChampionSelections": []}},
+        }
+        if self.phase == "ChampSelect":
+            routes["/lol-champ-select/v1/session"] = {
+                "localPlayerCellId": 0, "myTeam": [{"cellId": 0, "championId": cid}]}
+        return routes
+
+    @property
+    def subscribers(self):
+        """已订阅事件的 WebSocket 连接数"""
+        with self.server.lock:
+            return sum(1 for c in self.server.ws_clients if c.topics)
+
+    def publish(self, uri, data, event_type="Update"):
+        """向订阅了该接口的 WebSocket 连接推送事件, 返回推送的连接数"""
+        topic = "OnJsonApiEvent" + uri.replace("/", "_")
+        message = json.dumps([8, topic, {"data": data, "eventType": event_type, "uri": uri}]).encode()
+        with self.server.lock:
+            clients = [c for c in self.server.ws_clients if topic in c.topics]
+        sent = 0
+        for client in clients:
+            try:
+                client.send(WS_TEXT, message)
+                sent += 1
+            except OSError:
+                pass
+        return sent
+
+    def set_phase(self, phase):
+        """切换 gameflow 阶段并推送事件 (进入选人阶段时同时推送选人会话)"""
+        self.phase = phase
+        self.publish("/lol-gameflow/v1/gameflow-phase", phase)
+        if phase == "ChampSelect":
+            self.publish("/lol-champ-select/v1/session", self.routes()["/lol-champ-select/v1/session"])
+
+    def set_champion(self, champion):
+        """更换英雄 (选人阶段随机 / 交换) 并推送选人会话事件"""
+        self.champion = champion
+        if self.phase == "ChampSelect":
+            self.publish("/lol-champ-select/v1/session", self.routes()["/lol-champ-select/v1/session"])
+
+    def attach(self, connector):
+        """让 LCUConnector 连接到本服务器 (代替扫描进程/lockfile; Live API 也指向本服务器)"""
+        connector.port = str(self.port)
+        connector.auth_token = self.token
+        connector.base_url = self.url
+        connector.LIVE_API_URL = self.url
+        return connector._finalize_connection()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fake-lcu", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        with self.server.lock:
+            active, self.server.active = list(self.server.active), set()
+        for conn in active:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._tmp:
+            shutil.rmtree(self._tmp, ignore_errors=True)
+            self._tmp = None
+
+
+def _spin(seconds):
+    """忙等 (模拟系统调用耗时, 比 sleep 精确)"""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class _FakeProcess:
+    def __init__(self, table, pid, name, cmdline=(), exe=""):
+        self._table = table
+        self.pid = pid
+        self._name = name
+        self._cmdline = list(cmdline)
+        self._exe = exe
+        self.info = {}
+
+    def name(self):
+        _spin(self._table.name_cost)
+        return self._name
+
+    def cmdline(self):
+        _spin(self._table.cmdline_cost)
+        return list(self._cmdline)
+
+    def exe(self):
+        return self._exe
+
+
+class FakeProcessTable:
+    """
+    模拟进程表, 提供 ClientDiscovery 用到的 psutil 接口 (process_iter / Process / pid_exists)。
+    name_cost / cmdline_cost 为读取进程名 / 命令行的模拟耗时 (秒): Windows 上读命令行需要打开进程并读取其内存，
+    远比读进程名慢。
+
+    Args:
+        count: 其他进程数量
+        install_path: 客户端安装目录; 为 None 时不含客户端进程
+    """
+
+    def __init__(self, count=400, install_path=None, port="0", token="fake-token",
+                 name_cost=10e-6, cmdline_cost=150e-6):
+        self.name_cost = name_cost
+        self.cmdline_cost = cmdline_cost
+        self.processes = [_FakeProcess(self, 1000 + i * 4, f"svc{i}.exe", [f"C:\\Windows\\svc{i}.exe", "-k", "netsvcs"])
+                          for i in range(count)]
+        self.client_pid = self.ux_pid = None
+        if install_path:
+            self.client_pid, self.ux_pid = 900001, 900002
+            self.processes.append(_FakeProcess(self, self.client_pid, "LeagueClient.exe"))
+            self.processes.append(_FakeProcess(
+                self, self.ux_pid, "LeagueClientUx.exe",
+                [os.path.join(install_path, "LeagueClientUx.exe"), f"--app-port={port}",
+                 f"--remoting-auth-token={token}", f"--install-directory={install_path}"],
+                exe=os.path.join(install_path, "LeagueClientUx.exe")))
+        self._by_pid = {proc.pid: proc for proc in self.processes}
+
+    def process_iter(self, attrs=None):
+        for proc in self.processes:
+            proc.info = {attr: getattr(proc, attr)() if attr != "pid" else proc.pid for attr in attrs or ()}
+            yield proc
+
+    def Process(self, pid):
+        if pid not in self._by_pid:
+            raise psutil.NoSuchProcess(pid)
+        return self._by_pid[pid]
+
+    def pid_exists(self, pid):
+        return pid in self._by_pid
+
+    def write_lockfile(self, install_path, port="0", token="fake-token"):
+        """在安装目录写入客户端 lockfile (客户端运行时存在)"""
+        with open(os.path.join(install_path, "lockfile"), "w") as f:
+            f.write(f"LeagueClient:{self.client_pid}:{port}:{token}:https")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m scripts.fake_lcu", description="本地 LCU API 模拟服务器")
+    parser.add_argument("--phase", default="ChampSelect", help="gameflow 阶段 (ChampSelect / InProgress / Lobby ...)")
+    parser.add_argument("--champion", help="当前英雄英文名 (默认 champions.json 中第一个)")
+    parser.add_argument("--no-gameflow-player", action="store_true", help="对局信息中不含自己 (测试回退 Live API)")
+    parser.add_argument("--delay", action="append", default=[], metavar="路径=秒",
+                        help="为接口注入响应延迟, 可重复 (如 /lol-gameflow/v1/session=5)")
+    parser.add_argument("--token", default="fake-token")
+    parser.add_argument("--port", type=int, default=0, help="端口 (0 为随机)")
+    parser.add_argument("--cert", help="证书 PEM (默认用 openssl 临时生成)")
+    parser.add_argument("--key", help="私钥 PEM")
+    args = parser.parse_args(argv)
+    delays = {}
+    for item in args.delay:
+        path, _, seconds = item.rpartition("=")
+        if not path:
+            parser.error(f"--delay 格式应为 路径=秒: {item}")
+        delays[path] = float(seconds)
+
+    fake = FakeLCU(args.phase, args.champion, not args.no_gameflow_player, args.token,
+                   args.port, args.cert, args.key, delays=delays).start()
+    print(f"✅ 模拟 LCU: {fake.url} | 阶段 {fake.phase} | 英雄 {fake.champion}")
+    print(f"   lockfile 格式: LeagueClient:{os.getpid()}:{fake.port}:{fake.token}:https")
+    try:
+        fake._thread.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake.stop()
+        print(f"已关闭 (连接 {fake.connections}, 请求 {fake.requests})")
+
+
+if __name__ == "__main__":
+    main()
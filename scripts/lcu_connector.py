@@ -4,17 +4,57 @@ LCU Connector - 英雄联盟客户端本地 API 连接器
 通过读取 LeagueClientUx.exe 的进程信息或 lockfile，
 连接客户端本地 API 以自动获取当前英雄（全生命周期覆盖）。
 
+客户端发现 (ClientDiscovery): 优先读已知安装目录的 lockfile、检查上次的进程 PID,
+只有都失败时才扫描进程 (只取进程名, 匹配后才读命令行); 找到的安装目录写入缓存, 下次启动直接使用。
+
+英雄 ID 映射: 启动时用 ddragon 数据 (updater 同步的 champion_keys.json) 与上次的磁盘缓存预填，
+连接后只查询客户端版本, 版本与缓存一致时不再下载 champion-summary.json。
+
 支持三种获取模式:
   1. ChampSelect 阶段: /lol-champ-select/v1/session
   2. InProgress  阶段: /lol-gameflow/v1/session (gameData)
   3. InGame     备用:  Live Client Data API (端口 2999)
+
+HTTP: LCU 与 Live API 各用一个常驻 requests.Session (连接池 keep-alive)，
+轮询时复用已建立的 TLS 连接, 不再每次请求重新握手; 失败重试与退避由连接池的 Retry 策略处理。
+
+事件订阅: subscribe() 启动 LCUEventStream 后台线程, 通过客户端的 WAMP WebSocket
+(与 REST 同一端口) 订阅 gameflow 阶段与选人会话的变化, 英雄确定 / 更换 (随机、交换) 时
+立即回调, 不再每 2 秒轮询。需要 websocket-client; 未安装时 subscribe() 返回 None, 调用方继续轮询。
+
+并发查询: get_champion_race() 同时发出阶段查询与三种策略的查询, 返回第一个可信的结果
+(采信规则见 race_sources / pick_race_result), 最坏耗时由 RACE_TIMEOUT 限制,
+不再是各接口超时之和。F7 刷新与自动检测使用此接口; get_champion_auto() 保留顺序查询。
 """
+import base64
 import json
 import os
+import ssl
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import psutil
 import requests
 import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import websocket  # websocket-client, 事件订阅
+except ImportError:
+    websocket = None
+
+# 兼容直接运行和包导入
+try:
+    from scripts.config import CHAMPION_ID_CACHE_FILE, CHAMPION_KEY_FILE, LCU_DISCOVERY_FILE
+except ImportError:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    parent_dir = os.path.dirname(current_dir)
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+    from scripts.config import CHAMPION_ID_CACHE_FILE, CHAMPION_KEY_FILE, LCU_DISCOVERY_FILE
 
 # 禁用 SSL 自签名证书警告
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -36,27 +76,300 @@ COMMON_INSTALL_PATHS = [
 ]
 
 
+POOL_SIZE = 4  # 每个会话保持的 keep-alive 连接数 (控制器线程与 GUI 线程可能同时请求)
+
+# 重试策略 (只重试幂等的 GET):
+#   LCU      客户端启动/切换阶段时偶发 5xx 与断连, 连接失败重试 1 次, 5xx 重试 2 次
+#   Live API 不在对局中时端口未监听, 连接失败不重试 (立即返回), 只重试读超时与 5xx 1 次
+LCU_RETRY = Retry(total=3, connect=1, read=1, status=2, backoff_factor=0.1,
+                  status_forcelist=(500, 502, 503, 504), allowed_methods=frozenset({"GET"}),
+                  raise_on_status=False)
+LIVE_RETRY = Retry(total=1, connect=0, read=1, status=1, backoff_factor=0.1,
+                   status_forcelist=(500, 502, 503, 504), allowed_methods=frozenset({"GET"}),
+                   raise_on_status=False)
+
+
+IDLE_PHASES = ("None", "Lobby", "Matchmaking", "EndOfGame", "WaitingForStats")  # 不会有英雄的阶段
+IN_GAME_PHASES = ("InProgress", "GameStart")
+# 阶段未知时即可采信的来源: 选人会话只在选人阶段存在, Live API 只在对局进行中应答
+UNKNOWN_PHASE_SOURCES = ("ChampSelect", "Live API")
+
+
+def race_sources(phase):
+    """
+    阶段 -> 可采信的来源, 多个来源同时有结果时按此顺序取 (与 get_champion_auto 的查询顺序一致):
+      ChampSelect        选人会话
+      GameStart/InProgress  对局信息 > Live API > 选人会话
+      空闲阶段 (IDLE_PHASES)  无
+      其他 (含阶段查询失败)  选人会话
+    """
+    if phase == "ChampSelect":
+        return ("ChampSelect",)
+    if phase in IN_GAME_PHASES:
+        return ("GameFlow", "Live API", "ChampSelect")
+    if phase in IDLE_PHASES:
+        return ()
+    return ("ChampSelect",)
+
+
+def pick_race_result(results):
+    """
+    根据已完成的查询判断能否给出结果。
+
+    Args:
+        results: {"phase" | 来源: 查询结果}, 未完成的查询不在其中
+    Returns:
+        (英雄中文名 | None, 来源或阶段): 已可确定; None: 继续等待
+    规则: 阶段已知时按 race_sources 采信, 可采信的来源都已完成仍无英雄则确定为无;
+      阶段未知时只采信 UNKNOWN_PHASE_SOURCES (对局信息在结算阶段仍保留, 必须等阶段确认)。
+    """
+    known = "phase" in results
+    sources = race_sources(results["phase"]) if known else UNKNOWN_PHASE_SOURCES
+    for source in sources:
+        if results.get(source):
+            return results[source], source
+    if known and all(source in results for source in sources):
+        return None, results["phase"] or ""
+    return None
+
+
+def make_session(retry, auth=None):
+    """本地自签名证书 (verify=False) 的常驻会话, 连接池大小 POOL_SIZE"""
+    session = requests.Session()
+    session.verify = False
+    # 只访问 127.0.0.1: 不读环境变量 (REQUESTS_CA_BUNDLE 会覆盖 verify=False, 代理/.netrc 查找每次请求都有开销)
+    session.trust_env = False
+    session.auth = auth
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+UX_PROCESS_NAME = "leagueclientux.exe"
+SCAN_INTERVAL = 10.0  # 已知安装目录时, 进程扫描的最小间隔 (秒; 客户端启动后 lockfile 出现即可连接, 无需扫描)
+
+
+def parse_lockfile(path):
+    """lockfile (名称:PID:端口:令牌:协议) -> (PID, 端口, 令牌); 不存在或格式错误时为 None"""
+    try:
+        with open(path, 'r') as f:
+            parts = f.read().strip().split(':')
+    except OSError:
+        return None
+    if len(parts) < 5:
+        return None
+    try:
+        pid = int(parts[1])
+    except ValueError:
+        pid = None
+    return pid, parts[2], parts[3]
+
+
+def parse_ux_cmdline(cmdline):
+    """LeagueClientUx 命令行 -> (端口, 令牌, 安装目录); 缺少端口或令牌时为 None"""
+    port = token = install = None
+    for arg in cmdline or ():
+        if arg.startswith('--app-port='):
+            port = arg.split('=', 1)[1]
+        elif arg.startswith('--remoting-auth-token='):
+            token = arg.split('=', 1)[1]
+        elif arg.startswith('--install-directory='):
+            install = arg.split('=', 1)[1].rstrip('/\\') or None
+    return (port, token, install) if port and token else None
+
+
+class ClientDiscovery:
+    """
+    查找运行中的客户端 (端口 + 令牌), 按开销从低到高依次尝试:
+      1. 已知安装目录下的 lockfile (记录的客户端进程仍存活才采用, 避免崩溃后残留的旧文件)
+      2. 上次找到的 LeagueClientUx 进程 (PID 存活且进程名一致) 的命令行
+      3. 扫描进程: 只读取进程名, 名称匹配后才读命令行; 已知安装目录时至多每 SCAN_INTERVAL 秒扫描一次
+      4. 逐个探测 COMMON_INSTALL_PATHS 下的 lockfile
+    找到后记住 PID 与安装目录; 安装目录写入 cache_path, 下次启动时第 1 步即可命中。
+
+    Args:
+        ps: 进程接口 (默认 psutil 模块; 基准测试传入模拟进程表)
+    """
+
+    def __init__(self, cache_path=LCU_DISCOVERY_FILE, install_paths=COMMON_INSTALL_PATHS, ps=psutil):
+        self.cache_path = cache_path
+        self.install_paths = install_paths
+        self.ps = ps
+        self.pid = None            # 上次找到的 LeagueClientUx PID
+        self.install_path = None   # 上次找到的安装目录
+        self.method = None         # 最近一次成功使用的方式 (lockfile / pid / scan / probe)
+        self.scans = 0             # 进程扫描次数
+        self._last_scan = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                self.install_path = json.load(f).get('install_path') or None
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(self.cache_path, 'w', encoding='utf-8') as f:
+                json.dump({'install_path': self.install_path}, f, ensure_ascii=False)
+        except OSError:
+            pass
+
+    def _remember(self, method, pid=None, install_path=None):
+        self.method = method
+        if pid is not None:
+            self.pid = pid
+        if install_path and install_path != self.install_path:
+            self.install_path = install_path
+            self._save()
+
+    def find(self):
+        """返回 (端口, 令牌); 客户端未运行时为 None"""
+        with self._lock:
+            return (self._from_lockfile() or self._from_pid() or self._from_scan()
+                    or self._from_probe())
+
+    def _live_lockfile(self, folder):
+        found = parse_lockfile(os.path.join(folder, 'lockfile'))
+        if found is None:
+            return None
+        pid, port, token = found
+        if pid is not None and not self.ps.pid_exists(pid):
+            return None  # 客户端已退出, lockfile 残留
+        return port, token
+
+    def _from_lockfile(self):
+        if not self.install_path:
+            return None
+        found = self._live_lockfile(self.install_path)
+        if found:
+            self._remember('lockfile')
+        return found
+
+    def _from_pid(self):
+        if self.pid is None:
+            return None
+        try:
+            proc = self.ps.Process(self.pid)
+            if proc.name().lower() == UX_PROCESS_NAME:
+                found = parse_ux_cmdline(proc.cmdline())
+                if found:
+                    self._remember('pid', install_path=found[2])
+                    return found[:2]
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            pass
+        self.pid = None
+        return None
+
+    def _from_scan(self):
+        now = time.monotonic()
+        if self.install_path and self._last_scan is not None and now - self._last_scan < SCAN_INTERVAL:
+            return None
+        self._last_scan = now
+        self.scans += 1
+        try:
+            for proc in self.ps.process_iter(['name']):
+                name = proc.info.get('name')
+                if not name or name.lower() != UX_PROCESS_NAME:
+                    continue
+                try:
+                    found = parse_ux_cmdline(proc.cmdline())
+                    if not found:
+                        continue
+                    install = found[2]
+                    if not install:
+                        install = os.path.dirname(proc.exe())
+                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                    continue
+                self._remember('scan', pid=proc.pid, install_path=install)
+                return found[:2]
+        except Exception:
+            pass
+        return None
+
+    def _from_probe(self):
+        for base_path in self.install_paths:
+            if base_path == self.install_path:
+                continue  # 第 1 步已检查
+            found = self._live_lockfile(base_path)
+            if found:
+                self._remember('probe', install_path=base_path)
+                return found
+        return None
+
+
+def load_champion_ids(path):
+    """英雄 ID 文件 {"version": 版本, "ids": {ID: 英文名}} -> (版本, {int ID: 英文名}); 不存在或无效时为 (None, {})"""
+    if not path or not os.path.exists(path):
+        return None, {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data.get('version'), {int(cid): alias for cid, alias in data['ids'].items() if alias}
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None, {}
+
+
+def save_champion_ids(path, version, ids):
+    """写入英雄 ID 文件 (临时文件 + 原子替换, 读取方不会看到写了一半的文件)"""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': version, 'ids': {str(cid): alias for cid, alias in ids.items()}},
+                      f, ensure_ascii=False)
+        os.replace(tmp, path)
+        return True
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return False
+
+
 class LCUConnector:
     """英雄联盟客户端 LCU API 连接器（全生命周期）"""
 
     LCU_TIMEOUT = 3       # LCU API 请求超时 (秒)
     LIVE_API_TIMEOUT = 2  # Live Client Data API 超时 (秒)
+    LIVE_API_URL = "https://127.0.0.1:2999"
+    RACE_TIMEOUT = 3      # get_champion_race 最长等待 (秒)
 
-    def __init__(self, champions_json_path):
+    def __init__(self, champions_json_path, id_cache_path=CHAMPION_ID_CACHE_FILE, key_path=CHAMPION_KEY_FILE):
         self.port = None
         self.auth_token = None
         self.base_url = None
         self._connected = False
+        self._connect_lock = threading.Lock()  # 控制器线程与事件线程都会调用 connect()
         self._summoner_id = None  # 缓存当前召唤师ID
 
+        # 常驻会话: LCU (连接后设置认证) / Live Client Data API (免密)
+        self._lcu_session = make_session(LCU_RETRY)
+        self._live_session = make_session(LIVE_RETRY)
+
         # 加载 champions.json: 中文名 -> 英文名
         self.cn_to_en = {}
         # 反向映射: 英文名(小写) -> 中文名
         self.en_to_cn = {}
         self._load_champions_map(champions_json_path)
 
-        # 英雄 ID -> 中文名映射 (连接后构建)
-        self.id_to_cn = {}
+        # 英雄 ID -> 中文名映射: 先用 ddragon 数据与磁盘缓存预填 (连接前 / LCU 无响应时也可用)，
+        # 连接后按客户端版本校验 (_build_champion_id_map)
+        self.id_cache_path = id_cache_path
+        self._id_version, cached = load_champion_ids(id_cache_path)
+        self.id_to_cn = self._join_aliases({**load_champion_ids(key_path)[1], **cached})
+
+        self._events = None  # LCUEventStream (subscribe 后创建)
+        self.discovery = ClientDiscovery()
 
     def _load_champions_map(self, path):
         """加载 champions.json 构建中英文映射"""
@@ -77,58 +390,30 @@ class LCUConnector:
     # ==========================================
 
     def connect(self):
-        """尝试连接到 League 客户端。返回 bool"""
-        if self._connect_via_process() or self._connect_via_lockfile():
-            return self._finalize_connection()
-        self._connected = False
-        return False
-
-    def _connect_via_process(self):
-        """通过扫描进程命令行参数获取连接信息"""
-        try:
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-                try:
-                    if proc.info['name'] and proc.info['name'].lower() == 'leagueclientux.exe':
-                        cmdline = proc.info.get('cmdline', [])
-                        if not cmdline:
-                            continue
-                        port = token = None
-                        for arg in cmdline:
-                            if '--app-port=' in arg:
-                                port = arg.split('=', 1)[1]
-                            elif '--remoting-auth-token=' in arg:
-                                token = arg.split('=', 1)[1]
-                        if port and token:
-                            self.port = port
-                            self.auth_token = token
-                            self.base_url = f"https://127.0.0.1:{port}"
-                            return True
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    continue
-        except Exception:
-            pass
-        return False
+        """
+        尝试连接到 League 客户端 (见 ClientDiscovery)。返回 bool
 
-    def _connect_via_lockfile(self):
-        """通过读取 lockfile 获取连接信息"""
-        for base_path in COMMON_INSTALL_PATHS:
-            lockfile_path = os.path.join(base_path, 'lockfile')
-            if os.path.exists(lockfile_path):
-                try:
-                    with open(lockfile_path, 'r') as f:
-                        content = f.read().strip()
-                    parts = content.split(':')
-                    if len(parts) >= 5:
-                        self.port = parts[2]
-                        self.auth_token = parts[3]
-                        self.base_url = f"https://127.0.0.1:{self.port}"
-                        return True
-                except Exception:
-                    continue
-        return False
+        多线程调用时串行执行 (认证切换、ID 映射下载与写盘只做一次):
+        等待期间已由其他线程连上时直接复用该连接。
+        """
+        with self._connect_lock:
+            if self._connected:
+                return True
+            found = self.discovery.find()
+            if found:
+                self.port, self.auth_token = found
+                self.base_url = f"https://127.0.0.1:{self.port}"
+                return self._finalize_connection()
+            self._connected = False
+            return False
 
     def _finalize_connection(self):
         """连接成功后，构建英雄 ID 映射 + 缓存召唤师ID"""
+        auth = ('riot', self.auth_token)
+        if self._lcu_session.auth != auth:
+            # 客户端重启后端口/令牌变化: 丢弃连到旧端口的空闲连接
+            self._lcu_session.close()
+            self._lcu_session.auth = auth
         self._connected = True
         self._build_champion_id_map()
         self._cache_summoner_id()
@@ -140,14 +425,11 @@ class LCUConnector:
         if not self.base_url or not self.auth_token:
             return None
         try:
-            resp = requests.request(
-                method, f"{self.base_url}{endpoint}",
-                auth=('riot', self.auth_token),
-                verify=False, timeout=self.LCU_TIMEOUT, **kwargs
+            return self._lcu_session.request(
+                method, f"{self.base_url}{endpoint}", timeout=self.LCU_TIMEOUT, **kwargs
             )
-            return resp
         except requests.exceptions.ConnectionError:
-            self._connected = False
+            self.mark_disconnected()
             return None
         except Exception:
             return None
@@ -155,28 +437,90 @@ class LCUConnector:
     def is_connected(self):
         return self._connected
 
+    def mark_disconnected(self):
+        """标记连接已失效 (客户端可能已重启), 下次 connect() 重新发现端口与令牌"""
+        self._connected = False
+
+    def subscribe(self, on_champion):
+        """
+        订阅英雄变化事件 (可多次调用, 共用一个后台连接)。
+
+        Args:
+            on_champion: 回调 (英雄中文名, 数据来源), 在事件线程中调用, 应尽快返回
+        Returns:
+            LCUEventStream | None: 未安装 websocket-client 时为 None (调用方应继续轮询)
+        """
+        if websocket is None:
+            print("   [WARN] websocket-client 未安装, 英雄检测使用轮询")
+            return None
+        if self._events is None or not self._events.is_alive():
+            self._events = LCUEventStream(self)
+            self._events.add_listener(on_champion)
+            self._events.start()
+        else:
+            self._events.add_listener(on_champion)
+        return self._events
+
+    def close(self):
+        """关闭常驻会话的连接池与事件订阅 (停止引擎/退出时调用; 之后仍可再次请求, 会重新建立连接)"""
+        if self._events is not None:
+            self._events.stop()
+            self._events = None
+        self._lcu_session.close()
+        self._live_session.close()
+
     # ==========================================
     # 英雄 ID 映射 + 召唤师信息
     # ==========================================
 
+    def _join_aliases(self, ids):
+        """{ID: 英文名} -> {ID: 中文名} (只保留 champions.json 中有的英雄)"""
+        result = {}
+        for cid, alias in ids.items():
+            cn_name = self.en_to_cn.get(alias.lower())
+            if cn_name:
+                result[cid] = cn_name
+        return result
+
+    def get_game_version(self):
+        """客户端版本 (如 "14.20.620.6321"), 失败时为 None"""
+        resp = self._request('GET', '/lol-patch/v1/game-version')
+        if resp and resp.status_code == 200:
+            try:
+                version = resp.json()
+                return version if isinstance(version, str) and version else None
+            except Exception:
+                pass
+        return None
+
     def _build_champion_id_map(self):
-        """从 LCU API 获取英雄数据，构建 ID -> 中文名映射"""
+        """
+        构建 ID -> 中文名映射。客户端版本与缓存一致时直接使用预填的映射;
+        版本变化 (或无缓存) 时从 LCU API 下载英雄数据并写回缓存。下载失败时保留预填的映射。
+        """
+        version = self.get_game_version()
+        if version and version == self._id_version:
+            print(f"   [OK] ID map: {len(self.id_to_cn)} champions (cached {version})")
+            return
         resp = self._request('GET', '/lol-game-data/assets/v1/champion-summary.json')
         if not resp or resp.status_code != 200:
             return
         try:
-            champions = resp.json()
-            for champ in champions:
+            ids = {}
+            for champ in resp.json():
                 cid = champ.get('id')
                 alias = champ.get('alias', '')
-                if cid is None or cid == -1:
+                if cid is None or cid == -1 or not alias:
                     continue
-                cn_name = self.en_to_cn.get(alias.lower())
-                if cn_name:
-                    self.id_to_cn[cid] = cn_name
-            print(f"   [OK] ID map: {len(self.id_to_cn)} champions")
+                ids[cid] = alias
         except Exception:
-            pass
+            return
+        self.id_to_cn = self._join_aliases(ids)
+        if version:
+            self._id_version = version
+            if self.id_cache_path:
+                save_champion_ids(self.id_cache_path, version, ids)
+        print(f"   [OK] ID map: {len(self.id_to_cn)} champions")
 
     def _cache_summoner_id(self):
         """缓存当前登录玩家的召唤师 ID"""
@@ -221,19 +565,23 @@ class LCUConnector:
         if not resp or resp.status_code != 200:
             return None
         try:
-            data = resp.json()
-            local_cell_id = data.get('localPlayerCellId')
-            if local_cell_id is None:
-                return None
-            for player in data.get('myTeam', []):
-                if player.get('cellId') == local_cell_id:
-                    cid = player.get('championId', 0)
-                    if cid and cid > 0:
-                        return self.id_to_cn.get(cid)
+            return self.champion_from_session(resp.json())
         except Exception:
             pass
         return None
 
+    def champion_from_session(self, data):
+        """选人会话 (/lol-champ-select/v1/session 或其事件数据) -> 自己的英雄中文名"""
+        local_cell_id = data.get('localPlayerCellId')
+        if local_cell_id is None:
+            return None
+        for player in data.get('myTeam', []):
+            if player.get('cellId') == local_cell_id:
+                cid = player.get('championId', 0)
+                if cid and cid > 0:
+                    return self.id_to_cn.get(cid)
+        return None
+
     def get_gameflow_champion(self):
         """
         加载/游戏阶段获取英雄 (InProgress/GameStart)。
@@ -275,9 +623,9 @@ class LCUConnector:
         仅在游戏进行中（Loading 结束后）可用。
         """
         try:
-            resp = requests.get(
-                'https://127.0.0.1:2999/liveclientdata/activeplayer',
-                verify=False, timeout=self.LIVE_API_TIMEOUT
+            resp = self._live_session.get(
+                f"{self.LIVE_API_URL}/liveclientdata/activeplayer",
+                timeout=self.LIVE_API_TIMEOUT
             )
             if resp.status_code == 200:
                 en_name = resp.json().get('championName', '')
@@ -325,7 +673,7 @@ class LCUConnector:
                 return hero, "ChampSelect"
 
         # 策略2: InProgress / GameStart 阶段
-        if phase in ("InProgress", "GameStart"):
+        if phase in IN_GAME_PHASES:
             hero = self.get_gameflow_champion()
             if hero:
                 return hero, "GameFlow"
@@ -335,9 +683,183 @@ class LCUConnector:
                 return hero, "Live API"
 
         # 策略3: 其他阶段也尝试 champ-select (以防 phase 查询延迟)
-        if phase not in ("None", "Lobby", "Matchmaking", "EndOfGame", "WaitingForStats"):
+        if phase not in IDLE_PHASES:
             hero = self.get_champ_select_champion()
             if hero:
                 return hero, "ChampSelect"
 
         return None, phase or ""
+
+    def get_champion_race(self, timeout=None):
+        """
+        get_champion_auto 的并发版本: 阶段、选人会话、对局信息、Live API 四个查询同时发出，
+        每完成一个就按 pick_race_result 判断, 得到可信结果立即返回, 其余查询取消 (未开始的不再执行，
+        已发出的请求在后台线程中自行结束, 结果丢弃)。每次调用使用独立的线程池,
+        上次遗留的慢请求不会占住线程、拖慢下一次查询。
+
+        Args:
+            timeout: 最长等待秒数 (默认 RACE_TIMEOUT); 超时仍无法确定时返回 (None, 阶段或 "")
+        Returns:
+            (str | None, str): (英雄中文名, 数据来源)
+        """
+        if not self._connected:
+            if not self.connect():
+                hero = self.get_ingame_champion()
+                return (hero, "Live API") if hero else (None, "")
+
+        pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lcu-race")
+        futures = {
+            pool.submit(self.get_gameflow_phase): "phase",
+            pool.submit(self.get_champ_select_champion): "ChampSelect",
+            pool.submit(self.get_gameflow_champion): "GameFlow",
+            pool.submit(self.get_ingame_champion): "Live API",
+        }
+        deadline = time.perf_counter() + (self.RACE_TIMEOUT if timeout is None else timeout)
+        results = {}
+        pending = set(futures)
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=max(deadline - time.perf_counter(), 0),
+                                     return_when=FIRST_COMPLETED)
+                if not done:
+                    break  # 超时
+                for future in done:
+                    results[futures[future]] = future.result()
+                answer = pick_race_result(results)
+                if answer is not None:
+                    return answer
+            return None, results.get("phase") or ""
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ==========================================
+# 事件订阅 (WAMP over WebSocket)
+# ==========================================
+
+WAMP_SUBSCRIBE = 5           # [5, 主题]
+WAMP_EVENT = 8               # [8, 主题, {"data", "eventType", "uri"}]
+PHASE_URI = "/lol-gameflow/v1/gameflow-phase"
+CHAMP_SELECT_URI = "/lol-champ-select/v1/session"
+EVENT_URIS = (PHASE_URI, CHAMP_SELECT_URI)
+HERO_PHASES = ("ChampSelect",) + IN_GAME_PHASES
+RECONNECT_DELAY = 2.0        # 连接失败 / 客户端退出后重连间隔 (秒)
+CONNECT_TIMEOUT = 3          # WebSocket 握手超时 (秒)
+
+
+def event_topic(uri):
+    """REST 路径 -> WAMP 主题 (OnJsonApiEvent_lol-gameflow_v1_gameflow-phase)"""
+    return "OnJsonApiEvent" + uri.replace("/", "_")
+
+
+class LCUEventStream(threading.Thread):
+    """
+    LCU 事件订阅线程 (由 LCUConnector.subscribe 创建)。
+
+    连接成功并订阅后先用 REST 查询一次当前英雄 (订阅前已发生的变化), 之后只处理推送:
+      gameflow-phase  进入 GameStart / InProgress 时查询一次对局信息; 离开选人/对局阶段时清空记录
+      champ-select    会话更新中直接解析自己的英雄 (锁定、随机、交换)
+    英雄与上次通知的不同才回调。客户端未启动或退出时每 RECONNECT_DELAY 秒重连。
+    """
+
+    def __init__(self, connector):
+        super().__init__(daemon=True, name="lcu-events")
+        self.connector = connector
+        self.phase = None
+        self.champion = None       # 最近一次通知的英雄
+        self.connected = False     # WebSocket 是否已订阅
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._ws = None
+
+    def add_listener(self, on_champion):
+        with self._lock:
+            self._listeners.append(on_champion)
+
+    def stop(self):
+        self._stopped.set()
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.abort()  # 中断阻塞中的 recv
+            except Exception:
+                pass
+
+    def run(self):
+        while not self._stopped.is_set():
+            if self.connector.is_connected() or self.connector.connect():
+                try:
+                    self._listen()
+                except Exception as e:
+                    if not self._stopped.is_set():
+                        print(f"   [WARN] LCU 事件连接断开: {type(e).__name__}")
+                finally:
+                    self.connected = False
+                    self._ws = None
+                # 客户端可能已重启 (端口/令牌变化), 下次重新发现
+                self.connector.mark_disconnected()
+            self._stopped.wait(RECONNECT_DELAY)
+
+    def _listen(self):
+        connector = self.connector
+        token = base64.b64encode(f"riot:{connector.auth_token}".encode()).decode()
+        url = connector.base_url.replace("https://", "wss://", 1) + "/"
+        ws = websocket.create_connection(
+            url, timeout=CONNECT_TIMEOUT, header=[f"Authorization: Basic {token}"],
+            subprotocols=["wamp"], sslopt={"cert_reqs": ssl.CERT_NONE, "check_hostname": False},
+            enable_multithread=True, suppress_origin=True)
+        self._ws = ws
+        if self._stopped.is_set():
+            ws.close()
+            return
+        try:
+            for uri in EVENT_URIS:
+                ws.send(json.dumps([WAMP_SUBSCRIBE, event_topic(uri)]))
+            ws.settimeout(None)
+            self.connected = True
+            # 订阅前的状态以 REST 补齐一次
+            self.phase = connector.get_gameflow_phase()
+            hero, source = connector.get_champion_race()
+            if hero:
+                self._notify(hero, source)
+            while not self._stopped.is_set():
+                message = ws.recv()
+                if not message:
+                    break  # 服务器关闭
+                self._dispatch(message)
+        finally:
+            ws.close()
+
+    def _dispatch(self, message):
+        try:
+            msg = json.loads(message)
+        except ValueError:
+            return
+        if not isinstance(msg, list) or len(msg) < 3 or msg[0] != WAMP_EVENT or not isinstance(msg[2], dict):
+            return
+        uri, data = msg[2].get("uri"), msg[2].get("data")
+        if uri == PHASE_URI:
+            self.phase = data
+            if data not in HERO_PHASES:
+                self.champion = None  # 新的一局即使同一英雄也重新通知
+            elif data in IN_GAME_PHASES:
+                hero = self.connector.get_gameflow_champion()
+                if hero:
+                    self._notify(hero, "GameFlow")
+        elif uri == CHAMP_SELECT_URI and isinstance(data, dict) and msg[2].get("eventType") != "Delete":
+            hero = self.connector.champion_from_session(data)
+            if hero:
+                self._notify(hero, "ChampSelect")
+
+    def _notify(self, hero, source):
+        if hero == self.champion:
+            return
+        self.champion = hero
+        with self._lock:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback(hero, source)
+            except Exception as e:
+                print(f"   [WARN] LCU 事件回调出错: {e}")
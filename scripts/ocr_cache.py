@@ -0,0 +1,276 @@
+"""
+OCR 结果持久化缓存 (跨会话)
+运行: python -m scripts.ocr_cache          查看缓存统计
+      python -m scripts.ocr_cache --clear  清空缓存
+
+同一批海克斯卡片每局都会反复出现，截图预处理后的图像几乎一致。
+本模块以 "截取区域几何 + 预处理图像的感知哈希 (dHash)" 为键缓存 OCR 文本，
+命中时完全跳过 det+rec 推理。
+
+dHash: 面积插值缩放到 (HASH_WIDTH+1) x HASH_HEIGHT 灰度图，
+  比较水平相邻像素的明暗关系得到 HASH_WIDTH*HASH_HEIGHT 位指纹。
+  实时截图的轻微噪声就会翻转背景平坦处的若干位, 哈希完全相同只作为第一步快速查找；
+  未命中时在同一区域几何/尺寸的条目中按缩略图的单格最大灰度差找最近者
+  (thumb_distance, 与帧差缓存同一度量)，不超过阈值即视为同一张卡片。
+  汉明距离无法区分噪声与只差一个字的名称 (前者可翻转 20+ 位, 后者可能只差 1~3 位)，
+  缩略图保留了灰度幅值, 两者相差一个数量级。
+
+缓存为 LRU (OrderedDict)，超过容量淘汰最久未使用的条目；
+以 JSON 保存在 CACHE_DIR，写入时先写临时文件再原子替换。
+命中只改变内存中的 LRU 顺序, 不触发写盘；每新增 SAVE_EVERY 条后在后台线程写回,
+close() 时再写一次 (顺序变化随之持久化)，分析线程不等待磁盘 IO。
+条目的读写由一把锁保护: close() 在 UI 线程调用时分析线程可能仍在 get/put。
+"""
+import base64
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+# 兼容直接运行和包导入
+try:
+    from scripts.config import OCR_CACHE_FILE
+except ImportError:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    parent_dir = os.path.dirname(current_dir)
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+    from scripts.config import OCR_CACHE_FILE
+
+
+CACHE_VERSION = 2  # 2: 条目附带缩略图 (近似查找)
+HASH_WIDTH = 32   # 哈希网格列数 (每行 32 位比较)
+HASH_HEIGHT = 8   # 哈希网格行数
+DEFAULT_CAPACITY = 1024
+SAVE_EVERY = 16   # 每新增/更新多少条后台写回一次
+DEFAULT_MAX_DIFF = 16  # 近似命中的最大单格灰度差 (与 GameAnalyzer.FRAME_DIFF_THRESHOLD 同一度量)
+
+
+def dhash(img):
+    """灰度图的差值哈希, 返回十六进制字符串 (HASH_WIDTH*HASH_HEIGHT 位)"""
+    small = cv2.resize(img, (HASH_WIDTH + 1, HASH_HEIGHT), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return np.packbits(bits).tobytes().hex()
+
+
+def region_key(region, img):
+    """缓存键: 屏幕区域几何 + 图像尺寸 + dHash (分辨率/区域变化时自然失效)"""
+    h, w = img.shape[:2]
+    geometry = f"{region['left']},{region['top']},{region['width']},{region['height']}"
+    return f"{geometry}|{w}x{h}|{dhash(img)}"
+
+
+def _bucket(key):
+    """键中的 区域几何 + 图像尺寸 部分 (近似查找只在同一桶内进行)"""
+    return key.rsplit("|", 1)[0]
+
+
+def thumb_distance(a, b):
+    """
+    两张同尺寸缩略图的单格最大灰度差 (先减去平均差, 整体亮度漂移不计)。
+    a 可以是 (N, 高, 宽) 的一叠缩略图, 此时返回 N 个距离。
+    """
+    diff = np.asarray(a, dtype=np.int16) - np.asarray(b, dtype=np.int16)
+    flat = diff.reshape(-1, diff.shape[-2] * diff.shape[-1])
+    flat -= (flat.sum(axis=1, dtype=np.int32) // flat.shape[1]).astype(np.int16)[:, None]
+    dist = np.abs(flat).max(axis=1)
+    return dist if diff.ndim == 3 else int(dist[0])
+
+
+class OcrCache:
+    """感知哈希 (+ 缩略图近似查找) -> OCR 文本 的 LRU 缓存 (JSON 持久化)"""
+
+    def __init__(self, path=OCR_CACHE_FILE, capacity=DEFAULT_CAPACITY, save_every=SAVE_EVERY,
+                 max_diff=DEFAULT_MAX_DIFF):
+        self.path = path
+        self.capacity = capacity
+        self.save_every = save_every
+        self.max_diff = max_diff
+        self._entries = OrderedDict()  # 键 -> (文本, 缩略图 uint8 或 None)
+        self._stacks = {}        # (桶, 缩略图尺寸) -> (键列表, 缩略图堆叠), 条目变化时失效
+        self._dirty = False      # 条目有增删改, 尚未写盘
+        self._reordered = False  # 仅 LRU 顺序变化 (命中), close() 时写盘
+        self._unsaved = 0        # 上次写盘后的 put 次数
+        self._closed = False     # close() 之后的 put 立即后台写回
+        self._lock = threading.Lock()        # 保护条目、桶缓存与变更标记
+        self._write_lock = threading.Lock()  # 串行化磁盘写入
+        self._writer = None
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(payload, dict) or payload.get("version") != CACHE_VERSION:
+            return  # 格式或哈希算法已变更, 丢弃旧缓存
+        for item in payload.get("entries", []):
+            if not isinstance(item, list) or len(item) not in (2, 5):
+                continue
+            thumb = None
+            if len(item) == 5:
+                try:
+                    h, w = int(item[2]), int(item[3])
+                    thumb = np.frombuffer(base64.b64decode(item[4]), dtype=np.uint8).reshape(h, w)
+                except (ValueError, TypeError):
+                    thumb = None
+            self._entries[item[0]] = (item[1], thumb)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, thumb=None):
+        """
+        命中时返回文本并标记为最近使用, 否则返回 None。
+
+        先按键精确查找; 未命中且给出缩略图时, 在同一区域几何/尺寸的条目中
+        取缩略图距离最近者, 不超过 max_diff 即命中。
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and thumb is not None:
+                key = self._nearest(_bucket(key), thumb)
+                entry = self._entries.get(key) if key is not None else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._reordered = True  # 顺序变化不单独写盘, 随下次保存一并持久化
+            self.hits += 1
+            return entry[0]
+
+    def _nearest(self, bucket, thumb):
+        """同一桶内缩略图距离最近且不超过 max_diff 的条目键, 没有时返回 None (调用方持有锁)"""
+        thumb = np.asarray(thumb)
+        stack_key = (bucket, thumb.shape)
+        cached = self._stacks.get(stack_key)
+        if cached is None:
+            keys = [k for k, (_, t) in self._entries.items()
+                    if t is not None and t.shape == thumb.shape and _bucket(k) == bucket]
+            stack = np.stack([self._entries[k][1] for k in keys]) if keys else None
+            cached = self._stacks[stack_key] = (keys, stack)
+        keys, stack = cached
+        if not keys:
+            return None
+        dist = thumb_distance(stack, thumb)
+        best = int(dist.argmin())
+        return keys[best] if dist[best] <= self.max_diff else None
+
+    def put(self, key, text, thumb=None):
+        """
+        记录识别结果 (空文本不缓存, 以免把截图时机不对的结果固化)。
+        调用方只应传入已成功匹配到海克斯的文本; thumb 为用于近似查找的缩略图。
+        """
+        if not text:
+            return
+        if thumb is not None:
+            thumb = np.clip(thumb, 0, 255).astype(np.uint8)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == text:
+                self._entries.move_to_end(key)
+                self._reordered = True
+                return
+            self._entries[key] = (text, thumb)
+            self._dirty = True
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+            self._stacks.clear()
+            self._unsaved += 1
+            flush = self._closed or self._unsaved >= self.save_every
+        if flush:
+            self.save_async()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stacks.clear()
+            self._dirty = True
+
+    def _snapshot(self):
+        """取出待写入的内容并清除变更标记 (调用方持有锁, 之后的修改不影响已取出的内容)"""
+        entries = []
+        for key, (text, thumb) in self._entries.items():
+            if thumb is None:
+                entries.append([key, text])
+            else:
+                h, w = thumb.shape
+                entries.append([key, text, h, w, base64.b64encode(thumb.tobytes()).decode('ascii')])
+        payload = {"version": CACHE_VERSION, "entries": entries}
+        self._dirty = self._reordered = False
+        self._unsaved = 0
+        return payload
+
+    def save_async(self):
+        """在后台线程写回磁盘 (上一次写入未完成时不重复启动)"""
+        with self._lock:
+            if self._writer is not None and self._writer.is_alive():
+                return
+            payload = self._snapshot()
+            self._writer = threading.Thread(target=self._write, args=(payload,), name="ocr-cache-save", daemon=True)
+            self._writer.start()
+
+    def save(self):
+        """有变更时同步写回磁盘 (临时文件 + 原子替换), 返回是否成功"""
+        with self._lock:
+            if not self._dirty:
+                return True
+            payload = self._snapshot()
+        return self._write(payload)
+
+    def close(self):
+        """等待后台写入结束, 再写回剩余变更 (含 LRU 顺序); 之后的 put 立即后台写回"""
+        with self._lock:
+            self._closed = True
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.join()
+        with self._lock:
+            if not (self._dirty or self._reordered):
+                return True
+            payload = self._snapshot()
+        return self._write(payload)
+
+    def _write(self, payload):
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._write_lock:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(payload, f, ensure_ascii=False)
+                os.replace(tmp, self.path)
+            except OSError as e:
+                print(f"⚠ OCR 缓存写入失败: {e}")
+                with self._lock:
+                    self._dirty = True  # 保留变更, 下次保存时重试
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+                return False
+        return True
+
+
+def main():
+    cache = OcrCache()
+    if "--clear" in sys.argv[1:]:
+        cache.clear()
+        if cache.save():
+            print(f"✅ 已清空 OCR 缓存: {cache.path}")
+        return
+    texts = set(text for text, _ in cache._entries.values())
+    print(f"OCR 缓存: {cache.path}")
+    print(f"  条目数: {len(cache)} / {cache.capacity} | 不同文本: {len(texts)}")
+
+
+if __name__ == "__main__":
+    main()
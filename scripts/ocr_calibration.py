@@ -0,0 +1,224 @@
+"""
+OCR 执行配置启动校准
+运行: python -m scripts.ocr_calibration          强制重新校准并输出对比表
+      python -m scripts.ocr_calibration --show   查看当前缓存的配置
+
+首次启动时用与当前屏幕截取区域同尺寸的合成卡片，对
+  OCR 模式 (serial / parallel / stitched) x onnxruntime 单算子线程数 (intra_op_num_threads)
+的组合计时，选出单帧 (三张卡片) 耗时最短的配置，写入 CACHE_DIR 下的配置文件。
+之后启动时机器指纹 (主机/CPU/onnxruntime 与 RapidOCR 版本) 与引擎配置 (data/ocr_engine.json)
+不变则直接复用, 跳过校准; 引擎配置中指定了 intra_op_num_threads 时只校准模式。
+
+为控制校准时长: 每种线程数只建一次引擎，各模式先测 1 帧，
+明显慢于当前最优 (PRUNE_RATIO 倍) 的组合不再继续测量。
+"""
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 兼容直接运行和包导入
+try:
+    from scripts.config import OCR_PROFILE_FILE
+except ImportError:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    parent_dir = os.path.dirname(current_dir)
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+    from scripts.config import OCR_PROFILE_FILE
+
+from scripts.ocr_pipeline import (compute_regions, create_engine, load_engine_settings,
+                                  ocr_single, ocr_stitched, preprocess)
+
+PROFILE_VERSION = 1
+# 按通常的快慢排序: 先测出较优基准, 后面的慢组合可以尽早剪枝
+CALIBRATION_MODES = ("stitched", "parallel", "serial")
+CALIBRATION_FRAMES = 3   # 每个组合最多计时的帧数 (取中位数)
+PRUNE_RATIO = 2.0        # 首帧耗时超过当前最优的倍数即放弃该组合
+# 无中文字体时的替代文字 (仅用于计时, 不评估准确率)
+_FALLBACK_TEXTS = ("Quantum Surge", "Bloodthirst", "Mystic Punch", "Goliath", "Erosion")
+
+
+def machine_fingerprint():
+    """配置文件适用的机器与依赖版本 (任一变化即重新校准)"""
+    import onnxruntime
+    try:
+        from importlib.metadata import version
+        rapidocr_version = version("rapidocr_onnxruntime")
+    except Exception:
+        rapidocr_version = "?"
+    return {
+        "node": platform.node(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count() or 0,
+        "onnxruntime": onnxruntime.__version__,
+        "rapidocr": rapidocr_version,
+    }
+
+
+def thread_candidates(cpu_count=None):
+    """待测的 intra_op_num_threads: -1 (onnxruntime 默认) 与 1 / 2 / 4 / 半数逻辑核心"""
+    cpu_count = cpu_count or os.cpu_count() or 1
+    candidates = [-1] + sorted({n for n in (1, 2, 4, cpu_count // 2) if 1 <= n < cpu_count})
+    return candidates[:5]
+
+
+def load_profile(path=OCR_PROFILE_FILE, settings=None):
+    """读取与本机及引擎配置匹配的校准配置, 不存在/版本、机器或引擎配置不符时返回 None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if profile.get("version") != PROFILE_VERSION or profile.get("machine") != machine_fingerprint():
+        return None
+    if profile.get("engine", {}) != (settings or {}):
+        return None
+    if profile.get("mode") not in CALIBRATION_MODES:
+        return None
+    return profile
+
+
+def save_profile(profile, path=OCR_PROFILE_FILE):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(profile, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+        return True
+    except OSError as e:
+        print(f"⚠ OCR 配置写入失败: {e}")
+        return False
+
+
+def calibration_images(regions, frames=CALIBRATION_FRAMES, seed=7):
+    """与截取区域同尺寸的合成卡片 -> [{key: 预处理后的图像}]"""
+    import cv2
+    from scripts.synth_cards import CardRenderer, find_cjk_font
+    font = find_cjk_font()
+    renderer = CardRenderer(font, seed)
+    if font:
+        from scripts.augment_db import load_snapshot, AugmentStore
+        snapshot, _ = load_snapshot()
+        texts = AugmentStore(snapshot).names
+    else:
+        texts = _FALLBACK_TEXTS
+    result = []
+    for i in range(frames):
+        images = {}
+        for j, (key, r) in enumerate(regions.items()):
+            card = renderer.render(texts[(i * len(regions) + j) % len(texts)], (r['width'], r['height']))
+            images[key] = preprocess(cv2.cvtColor(card, cv2.COLOR_RGB2BGRA))
+        result.append(images)
+    return result
+
+
+def _runner(mode, engine, executor):
+    if mode == "serial":
+        return lambda images: {k: ocr_single(engine, img) for k, img in images.items()}
+    if mode == "parallel":
+        def run(images):
+            futures = {k: executor.submit(ocr_single, engine, img) for k, img in images.items()}
+            return {k: f.result() for k, f in futures.items()}
+        return run
+    return lambda images: ocr_stitched(engine, images)
+
+
+def calibrate(regions=None, executor=None, verbose=True, settings=None):
+    """
+    对 模式 x 线程数 组合计时 (其余引擎选项取 settings)。
+
+    Returns:
+        (profile, engine): profile 为写入配置文件的字典, engine 为最优线程数下已预热的 RapidOCR
+    """
+    regions = regions or compute_regions(2560, 1440)
+    settings = settings or {}
+    if "intra_op_num_threads" in settings:
+        candidates = [settings["intra_op_num_threads"]]
+    else:
+        candidates = thread_candidates()
+    frames = calibration_images(regions)
+    own_executor = executor is None
+    executor = executor or ThreadPoolExecutor(max_workers=len(regions))
+
+    results = []
+    best, best_engine = None, None
+    try:
+        for threads in candidates:
+            engine = create_engine(threads, settings)
+            engine(frames[0][next(iter(regions))])  # 预热
+            for mode in CALIBRATION_MODES:
+                run = _runner(mode, engine, executor)
+                samples = []
+                for images in frames:
+                    t0 = time.perf_counter()
+                    run(images)
+                    samples.append(time.perf_counter() - t0)
+                    if best and samples[0] > best["frame_ms"] / 1000 * PRUNE_RATIO:
+                        break
+                samples.sort()
+                entry = {"mode": mode, "intra_op_num_threads": threads,
+                         "frame_ms": round(samples[len(samples) // 2] * 1000, 2), "frames": len(samples)}
+                results.append(entry)
+                if verbose:
+                    print(f"  校准 {mode:<9} 线程 {'默认' if threads == -1 else threads:>4}: {entry['frame_ms']:.1f}ms/帧")
+                if best is None or entry["frame_ms"] < best["frame_ms"]:
+                    best, best_engine = entry, engine
+    finally:
+        if own_executor:
+            executor.shutdown(wait=False)
+
+    profile = {
+        "version": PROFILE_VERSION,
+        "machine": machine_fingerprint(),
+        "mode": best["mode"],
+        "intra_op_num_threads": best["intra_op_num_threads"],
+        "frame_ms": best["frame_ms"],
+        "engine": settings,
+        "results": results,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    return profile, best_engine
+
+
+def load_or_calibrate(regions=None, executor=None, path=OCR_PROFILE_FILE, settings=None):
+    """
+    读取本机配置, 没有则校准并保存。
+
+    Returns:
+        (profile, engine): 命中配置文件时 engine 为 None (由调用方按配置创建)
+    """
+    profile = load_profile(path, settings)
+    if profile:
+        return profile, None
+    print("⏱ 首次启动: 正在校准 OCR 执行配置 (仅需一次)...")
+    t0 = time.perf_counter()
+    profile, engine = calibrate(regions, executor, settings=settings)
+    save_profile(profile, path)
+    print(f"✅ 校准完成 ({time.perf_counter() - t0:.1f}s): {profile['mode']} 模式, "
+          f"线程数 {'默认' if profile['intra_op_num_threads'] == -1 else profile['intra_op_num_threads']}, "
+          f"{profile['frame_ms']:.1f}ms/帧")
+    return profile, engine
+
+
+def main():
+    settings = load_engine_settings()
+    if "--show" in sys.argv[1:]:
+        profile = load_profile(settings=settings)
+        if not profile:
+            print(f"尚无与本机匹配的 OCR 配置: {OCR_PROFILE_FILE}")
+            return
+        print(json.dumps(profile, ensure_ascii=False, indent=2))
+        return
+    profile, _ = calibrate(settings=settings)
+    save_profile(profile)
+    print(f"\n✅ 最优配置: {profile['mode']} 模式, intra_op_num_threads={profile['intra_op_num_threads']}, "
+          f"{profile['frame_ms']:.1f}ms/帧 -> {OCR_PROFILE_FILE}")
+
+
+if __name__ == "__main__":
+    main()
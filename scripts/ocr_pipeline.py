@@ -0,0 +1,347 @@
+"""
+海克斯卡片截图区域与 OCR 执行模式
+运行: python -m scripts.benchmark ocr  (三种模式耗时/一致性对比)
+
+区域计算与截图预处理集中在此，main.py 与基准测试共用同一套逻辑。
+
+预处理: 直接在 mss 截图的 BGRA 原始缓冲区视图上处理 (零拷贝, 见 scripts/capture.py)，
+  OpenCV 灰度转换 + 双三次上采样写入每个区域预分配的缓冲区，
+  不再经过 PIL RGB 图像 / 灰度图 / 缩放图 / np.array 逐步分配。
+
+OCR 模式:
+  serial    逐张调用 RapidOCR (det + rec 各 3 次)
+  parallel  线程池并发调用 (高核数 CPU)
+  stitched  三张预处理后的区域纵向拼接成一张画布 (中间留分隔带)，
+            只做 1 次检测 + 1 批识别，再按文本框纵坐标归属回 hex_1/2/3。
+            RapidOCR 检测前会把短边放大到 det_limit_side_len，
+            单张扁长文字条会被放大成很大的检测输入；拼接后短边接近阈值，检测开销大幅下降。
+  rec       跳过检测模型: 截取区域本身就是单行标题，先用 Otsu 二值化 + 行列投影
+            裁到文字外接框，三张一批直接送入识别模型；
+            置信度低于 REC_MIN_SCORE (或找不到文字) 的卡片回退到完整 det+rec。
+
+引擎配置: RapidOCR 只开放了线程数与少量模型参数, onnxruntime 会话选项是写死的
+  (关闭内存池 / 全部图优化 / 顺序执行)。ENGINE_DEFAULTS 列出可调整的会话选项与
+  det/rec 输入尺寸, data/ocr_engine.json 中的同名键覆盖默认值 (文件可选)，
+  与默认值不同的会话选项会在创建引擎后重建 det/rec 会话生效。
+  python -m scripts.benchmark engine 在回放语料上扫描这些配置。
+  quantized=true 时改用 python -m scripts.ocr_quantize 生成并通过准确率门槛的 int8 模型。
+"""
+import json
+import os
+import sys
+
+import cv2
+import numpy as np
+
+# 兼容直接运行和包导入
+try:
+    from scripts.config import OCR_ENGINE_FILE, OCR_QUANT_FILE
+except ImportError:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    parent_dir = os.path.dirname(current_dir)
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+    from scripts.config import OCR_ENGINE_FILE, OCR_QUANT_FILE
+
+OCR_MODES = ("serial", "parallel", "stitched", "rec")
+UPSCALE = 2        # 截图 2 倍上采样提高文字清晰度
+STITCH_GAP = 32    # 拼接画布中卡片之间的分隔带高度 (像素), 避免检测框跨卡片合并
+TRIM_MIN_PIXELS = 2  # 投影裁剪: 行/列中前景像素数不少于此值才视为有文字 (过滤孤立噪点)
+TRIM_PAD = 8         # 裁剪后四周保留的边距 (像素)
+REC_MIN_SCORE = 0.8  # 纯识别置信度低于此值时回退到 det+rec
+
+# OCR 引擎配置默认值 (会话选项取值与 RapidOCR 内置一致, 仅 det_limit_side_len 为本项目调优值)
+ENGINE_DEFAULTS = {
+    "intra_op_num_threads": -1,          # 单算子线程数 (-1 为 onnxruntime 默认)
+    "inter_op_num_threads": -1,          # 算子间线程数 (仅 execution_mode=parallel 时有意义)
+    "graph_optimization_level": "all",   # 图优化级别: disable / basic / extended / all
+    "enable_cpu_mem_arena": False,       # CPU 内存池 (开启后重复推理少分配, 常驻内存增加)
+    "execution_mode": "sequential",      # 算子执行方式: sequential / parallel
+    "det_limit_side_len": 480,           # 检测输入短边 (短边不足时放大到此值)
+    "rec_img_width": 320,                # 识别输入基准宽度 (高度由模型固定为 48)
+    "rec_batch_num": 6,                  # 识别模型单批最多行数
+    "quantized": False,                  # 使用 int8 量化模型 (需先通过 scripts.ocr_quantize 的准确率门槛)
+    "vocab_decode": False,               # 识别解码限制在海克斯名称内 (见 scripts/ocr_vocab.py, 由 GameAnalyzer 安装)
+    "ocr_workers": 0,                    # >0 时 OCR 在该数量的常驻工作进程中执行 (见 scripts/ocr_workers.py)
+}
+_GRAPH_LEVELS = ("disable", "basic", "extended", "all")
+_EXECUTION_MODES = ("sequential", "parallel")
+# RapidOCR 建会话时已处理的键, 其余会话选项与默认值不同时需重建会话
+_SESSION_KEYS = ("inter_op_num_threads", "graph_optimization_level", "enable_cpu_mem_arena", "execution_mode")
+# 允许取 0 的整数项 (其余整数项为正整数, 线程数可为 -1)
+_ZERO_ALLOWED = ("ocr_workers",)
+
+
+def validate_engine_settings(settings):
+    """检查引擎配置的键与取值, 不合法时抛出 ValueError; 返回规范化后的新字典"""
+    result = {}
+    for key, value in settings.items():
+        if key not in ENGINE_DEFAULTS:
+            raise ValueError(f"未知的 OCR 引擎配置项: {key}")
+        default = ENGINE_DEFAULTS[key]
+        if isinstance(default, bool):
+            if not isinstance(value, bool):
+                raise ValueError(f"{key} 应为 true/false: {value!r}")
+        elif isinstance(default, int):
+            if isinstance(value, bool) or not isinstance(value, int):
+                raise ValueError(f"{key} 应为整数: {value!r}")
+            if key in _ZERO_ALLOWED:
+                if value < 0:
+                    raise ValueError(f"{key} 不能为负数: {value!r}")
+            elif value < 1 and value != -1:
+                raise ValueError(f"{key} 应为正整数 (线程数可为 -1): {value!r}")
+        elif key == "graph_optimization_level" and value not in _GRAPH_LEVELS:
+            raise ValueError(f"{key} 应为 {' / '.join(_GRAPH_LEVELS)}: {value!r}")
+        elif key == "execution_mode" and value not in _EXECUTION_MODES:
+            raise ValueError(f"{key} 应为 {' / '.join(_EXECUTION_MODES)}: {value!r}")
+        result[key] = value
+    return result
+
+
+def load_engine_settings(path=OCR_ENGINE_FILE):
+    """
+    读取用户的引擎配置 (只含文件中出现的键, 不合并默认值)。
+    文件不存在时返回 {}; 格式或取值错误时提示并忽略整个文件。
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            settings = json.load(f)
+        if not isinstance(settings, dict):
+            raise ValueError("顶层应为 JSON 对象")
+        return validate_engine_settings(settings)
+    except (OSError, ValueError) as e:
+        print(f"⚠ OCR 引擎配置无效, 使用默认值 ({path}): {e}")
+        return {}
+
+
+def session_options(settings):
+    """按引擎配置构造 onnxruntime SessionOptions"""
+    import onnxruntime as ort
+    levels = {
+        "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+        "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+    }
+    opts = ort.SessionOptions()
+    opts.log_severity_level = 4
+    opts.graph_optimization_level = levels[settings["graph_optimization_level"]]
+    opts.enable_cpu_mem_arena = settings["enable_cpu_mem_arena"]
+    opts.execution_mode = (ort.ExecutionMode.ORT_PARALLEL if settings["execution_mode"] == "parallel"
+                           else ort.ExecutionMode.ORT_SEQUENTIAL)
+    if settings["intra_op_num_threads"] > 0:
+        opts.intra_op_num_threads = settings["intra_op_num_threads"]
+    if settings["inter_op_num_threads"] > 0:
+        opts.inter_op_num_threads = settings["inter_op_num_threads"]
+    return opts
+
+
+def quantized_models(path=OCR_QUANT_FILE):
+    """
+    通过准确率门槛的 int8 模型 -> {"det": 路径, "rec": 路径} (未量化的一侧为 None)。
+    未生成 / 未通过门槛 / 文件缺失时返回 None。
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not manifest.get("enabled"):
+        return None
+    folder = os.path.dirname(path)
+    models = {}
+    for kind in ("det", "rec"):
+        name = manifest.get("models", {}).get(kind)
+        models[kind] = os.path.join(folder, name) if name else None
+        if models[kind] and not os.path.exists(models[kind]):
+            return None
+    return models
+
+
+def _rebuild_session(infer, opts):
+    """用新的 SessionOptions 重建 RapidOCR 的 OrtInferSession 内部会话 (模型与执行后端不变)"""
+    import onnxruntime as ort
+    old = infer.session
+    infer.session = ort.InferenceSession(old._model_path, sess_options=opts, providers=old.get_providers())
+
+
+def create_engine(intra_op_num_threads=None, settings=None, models=None):
+    """
+    创建 RapidOCR 引擎 (关闭方向分类)。
+
+    Args:
+        intra_op_num_threads: 单独覆盖线程数 (None 时取 settings / 默认值)
+        settings: 引擎配置 (ENGINE_DEFAULTS 的部分键)
+        models: 指定模型文件 {"det": 路径, "rec": 路径} (None 的一侧用 RapidOCR 自带模型)，
+                不指定时按 settings["quantized"] 选择
+    """
+    from rapidocr_onnxruntime import RapidOCR
+    cfg = dict(ENGINE_DEFAULTS, **validate_engine_settings(settings or {}))
+    if intra_op_num_threads is not None:
+        cfg["intra_op_num_threads"] = intra_op_num_threads
+    if models is None and cfg["quantized"]:
+        models = quantized_models()
+        if models is None:
+            print("⚠ 未找到通过准确率门槛的 int8 模型 (python -m scripts.ocr_quantize), 使用 fp32 模型")
+    paths = {f"{kind}_model_path": p for kind, p in (models or {}).items() if p}
+    engine = RapidOCR(
+        use_angle_cls=False,
+        **paths,
+        det_limit_side_len=cfg["det_limit_side_len"],
+        rec_img_shape=[3, 48, cfg["rec_img_width"]],
+        rec_batch_num=cfg["rec_batch_num"],
+        intra_op_num_threads=cfg["intra_op_num_threads"],
+    )
+    if any(cfg[k] != ENGINE_DEFAULTS[k] for k in _SESSION_KEYS):
+        opts = session_options(cfg)
+        _rebuild_session(engine.text_det.infer, opts)
+        _rebuild_session(engine.text_rec.session, opts)
+    return engine
+
+
+def compute_regions(W, H):
+    """根据屏幕分辨率计算海克斯文字截取区域 (以 2K 2560x1440 为基准等比缩放)"""
+    return {
+        "hex_1": {'top': int(H * 0.375),  'left': int(W * 0.2539), 'width': int(W * 0.125), 'height': int(H * 0.0417)},
+        "hex_2": {'top': int(H * 0.375),  'left': int(W * 0.4414), 'width': int(W * 0.125), 'height': int(H * 0.0417)},
+        "hex_3": {'top': int(H * 0.375),  'left': int(W * 0.625),  'width': int(W * 0.125), 'height': int(H * 0.0417)},
+    }
+
+
+def preprocess(bgra, gray=None, out=None):
+    """
+    BGRA 数组 -> 灰度 + 2 倍双三次上采样 (OCR 输入)。
+    传入 gray/out 时直接写入这两个预分配缓冲区; 输入可以是大图上的切片视图。
+    """
+    h, w = bgra.shape[:2]
+    gray = cv2.cvtColor(bgra, cv2.COLOR_BGRA2GRAY, dst=gray)
+    return cv2.resize(gray, (w * UPSCALE, h * UPSCALE), dst=out, interpolation=cv2.INTER_CUBIC)
+
+
+class RegionBuffers:
+    """
+    每个区域预分配的 灰度/上采样 缓冲区 (区域尺寸变化时重新分配)。
+    返回的图像在下一次同区域预处理时会被覆盖, 调用方需在此之前用完。
+    """
+
+    def __init__(self):
+        self._buffers = {}
+
+    def preprocess(self, key, bgra):
+        h, w = bgra.shape[:2]
+        bufs = self._buffers.get(key)
+        if bufs is None or bufs[0].shape != (h, w):
+            bufs = (np.empty((h, w), dtype=np.uint8),
+                    np.empty((h * UPSCALE, w * UPSCALE), dtype=np.uint8))
+            self._buffers[key] = bufs
+        return preprocess(bgra, *bufs)
+
+
+def crop_regions(frame, regions):
+    """从整屏 BGRA 数组中切出各区域并预处理"""
+    images = {}
+    for key, r in regions.items():
+        images[key] = preprocess(frame[r['top']:r['top'] + r['height'], r['left']:r['left'] + r['width']])
+    return images
+
+
+def clean_text(res_ocr):
+    """拼接 RapidOCR 各文本行并去掉空格/句点"""
+    txt = "".join([line[1] for line in res_ocr]) if res_ocr else ""
+    return txt.replace(" ", "").replace(".", "")
+
+
+def ocr_single(ocr, img):
+    res_ocr, _ = ocr(img)
+    return clean_text(res_ocr)
+
+
+def stitch(images):
+    """
+    纵向拼接多张灰度图 (右侧/分隔带以背景色填充)。
+
+    Returns:
+        (canvas, bands): bands 为 [(key, y0, y1), ...]，即各图在画布中的纵向范围
+    """
+    keys = list(images)
+    width = max(images[k].shape[1] for k in keys)
+    height = sum(images[k].shape[0] for k in keys) + STITCH_GAP * (len(keys) - 1)
+    # 背景色取各图边缘像素中位数, 分隔带与卡片底色一致, 不会被检测成文字
+    border = np.concatenate([np.concatenate([images[k][0], images[k][-1]]) for k in keys])
+    canvas = np.full((height, width), int(np.median(border)), dtype=np.uint8)
+    bands, y = [], 0
+    for k in keys:
+        h, w = images[k].shape[:2]
+        canvas[y:y + h, :w] = images[k]
+        bands.append((k, y, y + h))
+        y += h + STITCH_GAP
+    return canvas, bands
+
+
+def trim_to_text(img):
+    """
+    Otsu 二值化后按行/列投影求文字外接框并裁剪 (加 TRIM_PAD 边距)。
+    文字像素总是少数类, 因此不依赖深底浅字还是浅底深字。
+
+    Returns:
+        裁剪后的灰度图; 找不到文字时返回 None
+    """
+    _, binary = cv2.threshold(img, 0, 1, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    if binary.mean() > 0.5:
+        binary = 1 - binary
+    rows = np.flatnonzero(binary.sum(axis=1) >= TRIM_MIN_PIXELS)
+    cols = np.flatnonzero(binary.sum(axis=0) >= TRIM_MIN_PIXELS)
+    if rows.size == 0 or cols.size == 0:
+        return None
+    h, w = img.shape[:2]
+    top, bottom = max(rows[0] - TRIM_PAD, 0), min(rows[-1] + TRIM_PAD + 1, h)
+    left, right = max(cols[0] - TRIM_PAD, 0), min(cols[-1] + TRIM_PAD + 1, w)
+    return img[top:bottom, left:right]
+
+
+def ocr_recognize(ocr, images, min_score=REC_MIN_SCORE, vocab=None, hero_view=None):
+    """
+    纯识别模式: 裁剪后的区域一批送入识别模型, 低置信度的卡片回退到 det+rec。
+    传入 vocab (VocabDecoder) 与英雄词表时先做词典束搜索, 置信度足够的卡片直接得到海克斯名称。
+
+    Returns:
+        (texts, fallback): texts 为 {key: 文本}，fallback 为回退到 det+rec 的 key 列表
+    """
+    texts, crops, fallback = {}, {}, []
+    for key, img in images.items():
+        crop = trim_to_text(img)
+        if crop is None:
+            fallback.append(key)
+        else:
+            # 识别模型输入为 3 通道
+            crops[key] = cv2.cvtColor(crop, cv2.COLOR_GRAY2BGR)
+    if crops and vocab is not None and hero_view is not None:
+        for key, (name, _score) in vocab.decode(crops, hero_view).items():
+            if name:
+                texts[key] = name
+                del crops[key]
+    if crops:
+        rec_res, _ = ocr.text_rec(list(crops.values()))
+        for key, (text, score) in zip(crops, rec_res):
+            if score < min_score:
+                fallback.append(key)
+            else:
+                texts[key] = clean_text([(None, text)])
+    for key in fallback:
+        texts[key] = ocr_single(ocr, images[key])
+    return texts, fallback
+
+
+def ocr_stitched(ocr, images):
+    """单次推理识别全部区域, 按文本框中心纵坐标归属到各卡片"""
+    canvas, bands = stitch(images)
+    res_ocr, _ = ocr(canvas)
+    lines = {k: [] for k in images}
+    for box, text, _score in res_ocr or []:
+        cy = float(np.mean([p[1] for p in box]))
+        # 落在分隔带内的框归属到最近的卡片
+        key = min(bands, key=lambda b: 0 if b[1] <= cy < b[2] else min(abs(cy - b[1]), abs(cy - b[2])))[0]
+        lines[key].append((None, text))
+    return {k: clean_text(v) for k, v in lines.items()}
@@ -0,0 +1,281 @@
+"""
+OCR 模型 int8 动态量化 + 准确率门槛
+运行: python -m scripts.ocr_quantize [--corpus 语料目录] [--threshold 0.01] [--limit 60]
+      python -m scripts.ocr_quantize --show   查看当前量化结果
+
+从 RapidOCR 自带的 det/rec ONNX 模型生成 int8 动态量化模型 (权重 int8, 激活运行时量化)，
+在合成/回放语料上与 fp32 对比匹配准确率和单帧耗时，输出加速比报告。
+只有准确率下降不超过阈值且加速超过 MIN_SPEEDUP 的方案才会写入 enabled，
+之后在 data/ocr_engine.json 中设置 "quantized": true 即可让 GameAnalyzer 使用。
+
+量化方案:
+  rec      只量化识别模型的 MatMul/Gemm (SVTR 注意力与全连接层)，卷积保持 fp32
+  det+rec  两个模型的卷积与全连接全部量化 (ConvInteger 在部分 CPU 上反而更慢、误差更大)
+
+PaddleOCR 导出的模型把权重存成 Constant 节点，量化前先转成 initializer。
+依赖 onnx 包 (仅此工具需要): pip install onnx
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# 兼容直接运行和包导入
+try:
+    from scripts.config import CACHE_DIR, OCR_MODEL_DIR, OCR_QUANT_FILE
+except ImportError:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    parent_dir = os.path.dirname(current_dir)
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+    from scripts.config import CACHE_DIR, OCR_MODEL_DIR, OCR_QUANT_FILE
+
+from scripts.ocr_pipeline import (compute_regions, create_engine, crop_regions, load_engine_settings,
+                                  ocr_recognize, ocr_single, ocr_stitched, preprocess)
+
+MANIFEST_VERSION = 1
+# 方案 -> {模型: 量化的算子类型}
+QUANT_VARIANTS = {
+    "rec": {"rec": ("MatMul", "Gemm")},
+    "det+rec": {"det": ("Conv", "MatMul", "Gemm"), "rec": ("Conv", "MatMul", "Gemm")},
+}
+ACCURACY_THRESHOLD = 0.01  # 允许的匹配准确率下降 (绝对值)
+MIN_SPEEDUP = 1.05         # 加速不足 5% (测量噪声以内) 的方案不启用
+DEFAULT_CORPORA = (os.path.join(CACHE_DIR, "synth", "frames"), os.path.join(CACHE_DIR, "synth", "crops"))
+
+
+def bundled_models():
+    """RapidOCR 自带的 fp32 模型路径 -> {"det": 路径, "rec": 路径}"""
+    import rapidocr_onnxruntime
+    import yaml
+    root = os.path.dirname(rapidocr_onnxruntime.__file__)
+    with open(os.path.join(root, "config.yaml"), 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    return {"det": os.path.join(root, config["Det"]["model_path"]),
+            "rec": os.path.join(root, config["Rec"]["model_path"])}
+
+
+def _constants_to_initializers(model):
+    """Constant 节点 -> initializer (量化工具只处理 initializer 形式的权重)"""
+    graph = model.graph
+    nodes = []
+    for node in graph.node:
+        if node.op_type == "Constant" and len(node.attribute) == 1 and node.attribute[0].name == "value":
+            tensor = graph.initializer.add()
+            tensor.CopyFrom(node.attribute[0].t)
+            tensor.name = node.output[0]
+        else:
+            nodes.append(node)
+    del graph.node[:]
+    graph.node.extend(nodes)
+    return model
+
+
+def quantize_model(src, dst, op_types):
+    """动态量化单个模型 (权重 int8), 保留模型元数据 (rec 的字符表)"""
+    import onnx
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    folded = f"{dst}.fp32.tmp"
+    onnx.save(_constants_to_initializers(onnx.load(src)), folded)
+    try:
+        quantize_dynamic(folded, dst, weight_type=QuantType.QInt8, op_types_to_quantize=list(op_types))
+    finally:
+        os.remove(folded)
+    return dst
+
+
+def build_variants(out_dir=OCR_MODEL_DIR, variants=QUANT_VARIANTS):
+    """生成各量化方案的模型文件 -> {方案: {"det": 文件名或 None, "rec": 文件名或 None}}"""
+    import logging
+    logging.getLogger().setLevel(logging.ERROR)  # 量化工具的预处理提示
+    os.makedirs(out_dir, exist_ok=True)
+    sources = bundled_models()
+    result = {}
+    for variant, targets in variants.items():
+        files = {"det": None, "rec": None}
+        for kind, op_types in targets.items():
+            base = os.path.splitext(os.path.basename(sources[kind]))[0]
+            name = f"{base}_int8_{'-'.join(op_types).lower()}.onnx"
+            path = os.path.join(out_dir, name)
+            if not os.path.exists(path):
+                quantize_model(sources[kind], path, op_types)
+            files[kind] = name
+        result[variant] = files
+    return result
+
+
+# ================= 语料与评测 =================
+
+def load_corpus(path, limit=0):
+    """
+    读取回放语料 (整屏截图 + labels.json) 或单卡语料 (crops/labels.json)。
+
+    Returns:
+        [(图像字典 {key: 预处理后的图像}, 标注 {key: 名称}, 英雄)]
+    """
+    import cv2
+    with open(os.path.join(path, "labels.json"), 'r', encoding='utf-8') as f:
+        labels = json.load(f)
+    samples = []
+    if "crops" in labels:
+        for item in labels["crops"]:
+            bgr = cv2.imread(os.path.join(path, item["file"]), cv2.IMREAD_COLOR)
+            img = preprocess(cv2.cvtColor(bgr, cv2.COLOR_BGR2BGRA))
+            samples.append(({"card": img}, {"card": item["name"]}, item.get("hero")))
+    else:
+        from PIL import Image
+        import numpy as np
+        for name, label in sorted(labels.items()):
+            with Image.open(os.path.join(path, name)) as img:
+                frame = cv2.cvtColor(np.asarray(img.convert("RGB")), cv2.COLOR_RGB2BGRA)
+            h, w = frame.shape[:2]
+            images = crop_regions(frame, compute_regions(w, h))
+            truth = {k: label[k] for k in images if label.get(k)}
+            samples.append((images, truth, label.get("hero")))
+    if limit:
+        samples = samples[:limit]
+    return samples
+
+
+def _run(mode, engine, images):
+    if mode == "stitched" and len(images) > 1:
+        return ocr_stitched(engine, images)
+    if mode == "rec":
+        return ocr_recognize(engine, images)[0]
+    return {k: ocr_single(engine, img) for k, img in images.items()}
+
+
+def evaluate(engine, corpus, mode, store, index):
+    """
+    Returns:
+        dict: frame_ms (中位数), ocr_acc (文本完全正确率), match_acc (匹配正确率, 无英雄标注时为 None)
+    """
+    _run(mode, engine, corpus[0][0])  # 预热
+    samples, ocr_ok, match_ok, matched, total = [], 0, 0, 0, 0
+    for images, truth, hero in corpus:
+        t0 = time.perf_counter()
+        texts = _run(mode, engine, images)
+        samples.append(time.perf_counter() - t0)
+        keys = list(truth)
+        view = store.heroes.get(hero) if hero else None
+        matches = index.match_batch([texts[k] for k in keys], view) if view and keys else []
+        for k in keys:
+            ocr_ok += texts[k] == truth[k].replace(" ", "").replace(".", "")
+            total += 1
+        for k, m in zip(keys, matches):
+            match_ok += m["match"] == truth[k]
+            matched += 1
+    samples.sort()
+    return {
+        "frame_ms": round(samples[len(samples) // 2] * 1000, 2),
+        "ocr_acc": ocr_ok / total if total else 0.0,
+        "match_acc": match_ok / matched if matched else None,
+        "samples": total,
+    }
+
+
+def _gate_metric(stats):
+    """门槛指标: 有英雄标注时用匹配准确率, 否则用 OCR 文本准确率"""
+    return stats["match_acc"] if stats["match_acc"] is not None else stats["ocr_acc"]
+
+
+def run_gate(corpus, mode="stitched", threshold=ACCURACY_THRESHOLD, verbose=True):
+    """量化全部方案并与 fp32 对比, 返回写入清单的字典 (enabled 为选中的方案或 None)"""
+    from scripts.augment_db import load_snapshot, AugmentStore
+    from scripts.augment_match import AugmentIndex
+    store = AugmentStore(load_snapshot()[0])
+    index = AugmentIndex(store)
+    settings = dict(load_engine_settings(), quantized=False)
+
+    variants = build_variants()
+    fp32 = evaluate(create_engine(settings=settings), corpus, mode, store, index)
+    baseline = _gate_metric(fp32)
+    results = {"fp32": fp32}
+    if verbose:
+        print(f"{'方案':<10}{'单帧':>10}{'加速比':>8}{'OCR 正确':>10}{'匹配正确':>10}  门槛")
+        _print_row("fp32", fp32, 1.0, "")
+    enabled, best_ms = None, fp32["frame_ms"]
+    for variant, files in variants.items():
+        models = {kind: os.path.join(OCR_MODEL_DIR, name) for kind, name in files.items() if name}
+        engine = create_engine(settings=settings, models=models)
+        stats = evaluate(engine, corpus, mode, store, index)
+        speedup = fp32["frame_ms"] / stats["frame_ms"]
+        accurate = baseline > 0 and _gate_metric(stats) >= baseline - threshold
+        stats.update(speedup=round(speedup, 3), passed=accurate and speedup > MIN_SPEEDUP)
+        results[variant] = stats
+        if verbose:
+            reason = "✅ 通过" if stats["passed"] else ("✗ 准确率" if not accurate else "✗ 未加速")
+            _print_row(variant, stats, speedup, reason)
+        if stats["passed"] and stats["frame_ms"] < best_ms:
+            enabled, best_ms = variant, stats["frame_ms"]
+
+    return {
+        "version": MANIFEST_VERSION,
+        "enabled": enabled,
+        "models": variants[enabled] if enabled else {},
+        "variants": variants,
+        "mode": mode,
+        "threshold": threshold,
+        "results": results,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def _print_row(name, stats, speedup, reason):
+    match = f"{stats['match_acc']:.1%}" if stats["match_acc"] is not None else "-"
+    print(f"{name:<10}{stats['frame_ms']:>8.1f}ms{speedup:>7.2f}x{stats['ocr_acc']:>10.1%}{match:>10}  {reason}")
+
+
+def save_manifest(manifest, path=OCR_QUANT_FILE):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m scripts.ocr_quantize", description="OCR 模型 int8 量化与准确率门槛")
+    parser.add_argument("--corpus", help="评测语料目录 (默认 data/cache/synth/frames 或 crops)")
+    parser.add_argument("--mode", choices=["serial", "stitched", "rec"], default="stitched", help="评测使用的 OCR 模式")
+    parser.add_argument("--threshold", type=float, default=ACCURACY_THRESHOLD, help="允许的准确率下降 (如 0.01 为 1%%)")
+    parser.add_argument("--limit", type=int, default=0, help="最多使用的样本数 (0 为全部)")
+    parser.add_argument("--show", action="store_true", help="查看当前量化清单")
+    args = parser.parse_args(argv)
+
+    if args.show:
+        if not os.path.exists(OCR_QUANT_FILE):
+            print(f"尚未生成量化模型: {OCR_QUANT_FILE}")
+            return
+        with open(OCR_QUANT_FILE, 'r', encoding='utf-8') as f:
+            print(f.read())
+        return
+
+    try:
+        import onnx  # noqa: F401
+    except ImportError:
+        print("❌ 量化需要 onnx 包: pip install onnx")
+        return
+    corpus_dir = args.corpus or next((p for p in DEFAULT_CORPORA if os.path.exists(os.path.join(p, "labels.json"))), None)
+    if not corpus_dir or not os.path.exists(os.path.join(corpus_dir, "labels.json")):
+        print("❌ 找不到评测语料 (含 labels.json), 先运行 python -m scripts.synth_cards --frames 30 或用 --corpus 指定")
+        return
+    corpus = load_corpus(corpus_dir, args.limit)
+    print(f"语料: {corpus_dir} ({len(corpus)} 个样本) | OCR 模式: {args.mode} | 阈值: 准确率下降 ≤ {args.threshold:.1%}")
+
+    manifest = run_gate(corpus, args.mode, args.threshold)
+    save_manifest(manifest)
+    fp32 = manifest["results"]["fp32"]
+    if _gate_metric(fp32) == 0:
+        print("⚠ fp32 在该语料上准确率为 0 (标注与渲染文字不符?), 无法评估, 不启用量化模型")
+    if manifest["enabled"]:
+        best = manifest["results"][manifest["enabled"]]
+        print(f"\n✅ 启用 {manifest['enabled']} 方案: {fp32['frame_ms']:.1f}ms -> {best['frame_ms']:.1f}ms/帧 "
+              f"({best['speedup']:.2f}x)。在 data/ocr_engine.json 中设置 \"quantized\": true 生效")
+    else:
+        print(f"\n✗ 没有方案通过门槛, 保持 fp32 模型 ({OCR_QUANT_FILE})")
+
+
+if __name__ == "__main__":
+    main()
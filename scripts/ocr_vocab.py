@@ -0,0 +1,180 @@
+"""
+海克斯名称词表约束的识别解码
+运行: python -m scripts.benchmark replay <截图目录> --mode rec --vocab  (与不加 --vocab 对比)
+
+识别目标来自封闭词表: hero_augments.csv 中约 220 个名称, 只用到约 500 个字符，
+而识别模型的字符表有 6600+ 个字符。两种约束:
+
+  字符集约束  CharsetDecode 替换 RapidOCR 识别模型的 CTC 后处理，
+              先把词表外字符的概率置零再取 argmax，所有 OCR 模式都不会再输出词表外的乱码字符。
+  词典束搜索  rec 模式下直接取识别模型的逐帧概率，在当前英雄海克斯名称的字典树上做
+              CTC 前缀束搜索，只保留合法名称的前缀，结束时得到完整名称与置信度。
+              置信度足够时直接作为匹配结果，跳过模糊匹配。
+
+置信度: 名称路径概率相对逐帧最大概率路径的比值, 按名称长度开方 (每字符几何平均)，
+  图像与名称吻合时接近 1, 乱码/非卡片截图时很低。
+空格在 CTC 中按空白处理 (名称中的空格可有可无, 与 clean_text 去空格一致)。
+"""
+import math
+
+import numpy as np
+
+BEAM_WIDTH = 8          # 束宽
+PRUNE_PROB = 1e-3       # 单帧概率低于此值的字符不参与扩展
+VOCAB_MIN_SCORE = 0.6   # 词典束搜索置信度低于此值时退回普通解码 + 模糊匹配
+
+
+def vocab_key(name):
+    """名称 -> 字典树键 (去掉空格与句点, 与 clean_text 一致)"""
+    return name.replace(" ", "").replace(".", "")
+
+
+class CharsetDecode:
+    """包装 RapidOCR 的 CTCLabelDecode: 词表外字符的概率置零后再解码"""
+
+    def __init__(self, base, names):
+        self.base = base
+        self.character = base.character
+        self.dict = base.dict
+        allowed = {base.dict[c] for c in set("".join(names)) if c in base.dict}
+        allowed.add(0)  # CTC blank
+        self.mask = np.zeros(len(base.character), dtype=np.float32)
+        self.mask[sorted(allowed)] = 1.0
+
+    def __call__(self, preds, return_word_box=False, **kwargs):
+        return self.base(preds * self.mask, return_word_box, **kwargs)
+
+
+def install_charset(ocr, names):
+    """为引擎的识别模型装上字符集约束 (重复调用时替换词表)"""
+    rec = ocr.text_rec
+    base = rec.postprocess_op.base if isinstance(rec.postprocess_op, CharsetDecode) else rec.postprocess_op
+    rec.postprocess_op = CharsetDecode(base, names)
+    return rec.postprocess_op
+
+
+class NameTrie:
+    """字符序号字典树: 节点为 {字符序号: 子节点}, 终止节点记录完整名称"""
+
+    __slots__ = ("children", "name")
+
+    def __init__(self):
+        self.children = {}
+        self.name = None
+
+    @classmethod
+    def build(cls, names, char_dict):
+        root = cls()
+        for name in names:
+            key = vocab_key(name)
+            if not key or any(c not in char_dict for c in key):
+                continue  # 含字符表外字符的名称无法识别出来, 交给模糊匹配
+            node = root
+            for c in key:
+                idx = char_dict[c]
+                child = node.children.get(idx)
+                if child is None:
+                    child = node.children[idx] = cls()
+                node = child
+            node.name = name
+        return root
+
+
+def trie_beam_search(probs, trie, blank=0, space=None, beam_width=BEAM_WIDTH):
+    """
+    CTC 前缀束搜索, 前缀限制在字典树内。
+
+    Args:
+        probs: (T, C) 逐帧字符概率 (softmax 输出)
+        space: 空格字符序号 (并入空白)
+
+    Returns:
+        (name, score): 最可能的完整名称与置信度; 束中没有完整名称时为 (None, 0.0)
+    """
+    # 束: 节点 -> [以空白结尾的概率, 以字符结尾的概率, 最后一个字符]
+    beams = {trie: [1.0, 0.0, None]}
+    log_scale = 0.0  # 每帧归一化系数的对数和, 防止长序列下溢
+    greedy = 0.0     # 逐帧最大概率路径的对数概率
+    for frame in probs:
+        p_blank = float(frame[blank]) + (float(frame[space]) if space is not None else 0.0)
+        greedy += math.log(max(float(frame.max()), p_blank, 1e-30))
+        active = np.flatnonzero(frame > PRUNE_PROB)
+        new = {}
+        for node, (pb, pnb, last) in beams.items():
+            entry = new.setdefault(node, [0.0, 0.0, last])
+            entry[0] += (pb + pnb) * p_blank
+            if last is not None:
+                entry[1] += pnb * float(frame[last])  # 重复字符 (未被空白隔开) 合并
+            for c in active:
+                child = node.children.get(int(c))
+                if child is None:
+                    continue
+                pc = float(frame[c])
+                centry = new.setdefault(child, [0.0, 0.0, int(c)])
+                centry[1] += (pb if c == last else pb + pnb) * pc
+        ranked = sorted(new.items(), key=lambda kv: kv[1][0] + kv[1][1], reverse=True)[:beam_width]
+        top = ranked[0][1][0] + ranked[0][1][1]
+        if top <= 0:
+            return None, 0.0
+        beams = {node: [pb / top, pnb / top, last] for node, (pb, pnb, last) in ranked}
+        log_scale += math.log(top)
+
+    best, best_p = None, 0.0
+    for node, (pb, pnb, _) in beams.items():
+        if node.name is not None and pb + pnb > best_p:
+            best, best_p = node.name, pb + pnb
+    if best is None:
+        return None, 0.0
+    log_ratio = min(math.log(best_p) + log_scale - greedy, 0.0)
+    return best, math.exp(log_ratio / max(len(vocab_key(best)), 1))
+
+
+def rec_probs(ocr, crops):
+    """
+    直接运行识别模型, 返回每张图的逐帧概率 [(T, C)] (与 TextRecognizer 相同的缩放/归一化)。
+    crops 为 3 通道图像列表, 一批推理 (按最宽的图补齐)。
+    """
+    rec = ocr.text_rec
+    _, img_h, img_w = rec.rec_image_shape[:3]
+    max_ratio = max([img_w / img_h] + [c.shape[1] / c.shape[0] for c in crops])
+    batch = np.stack([rec.resize_norm_img(c, max_ratio) for c in crops]).astype(np.float32)
+    preds = rec.session(batch)[0]
+    return list(preds)
+
+
+class VocabDecoder:
+    """
+    按英雄词表做字典树束搜索 (字典树按英雄缓存)。
+    store 为 AugmentStore; 引擎需已安装字符集约束或使用原始字符表均可。
+    """
+
+    def __init__(self, ocr, store, min_score=VOCAB_MIN_SCORE):
+        self.ocr = ocr
+        self.store = store
+        self.min_score = min_score
+        post = ocr.text_rec.postprocess_op
+        self.char_dict = post.dict
+        self.space = post.dict.get(" ")
+        self._tries = {}
+
+    def trie(self, hero_view):
+        trie = self._tries.get(hero_view.hero_idx)
+        if trie is None:
+            trie = self._tries[hero_view.hero_idx] = NameTrie.build(hero_view.names, self.char_dict)
+        return trie
+
+    def decode(self, crops, hero_view):
+        """
+        Args:
+            crops: {key: 3 通道裁剪图}
+        Returns:
+            {key: (名称, 置信度)}: 置信度不足的卡片名称为 None
+        """
+        if not crops or hero_view is None:
+            return {key: (None, 0.0) for key in crops}
+        trie = self.trie(hero_view)
+        results = {}
+        for key, probs in zip(crops, rec_probs(self.ocr, list(crops.values()))):
+            name, score = trie_beam_search(probs, trie, space=self.space)
+            results[key] = (name if score >= self.min_score else None, score)
+        return results
@@ -0,0 +1,232 @@
+"""
+进程外 OCR 工作进程池
+运行: python -m scripts.benchmark replay <截图目录> --workers 2  (与 --workers 0 对比)
+
+进程内 OCR 的线程与 Tk 悬浮窗、热键轮询争用 GIL。开启后 OCR 改由常驻工作进程执行，
+每个进程启动时加载一份模型，之后一直复用。
+
+数据交换: 每个工作进程一块 multiprocessing.shared_memory 共享内存 (不够大时重新分配)，
+  主进程把预处理后的灰度图按顺序拷入共享内存，管道中只传 (区域, 偏移, 高, 宽) 布局与识别文本，
+  像素数据不经过 pickle。工作进程在共享内存上直接构造 numpy 视图送入 OCR。
+
+调度: parallel 模式把卡片分给多个进程同时识别 (真正的多核并行);
+  serial / stitched / rec 模式整帧交给一个进程 (与进程内的对应模式行为一致)。
+
+生命周期: GameAnalyzer 创建时 start() (等待所有进程加载完模型)，close() 时通知退出、
+  超时未退出则强制结束，并释放共享内存。主进程意外退出时工作进程读到管道 EOF 自行退出。
+"""
+import multiprocessing as mp
+import os
+import sys
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# 兼容直接运行和包导入
+try:
+    from scripts.ocr_pipeline import create_engine, ocr_recognize, ocr_single, ocr_stitched
+except ImportError:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    parent_dir = os.path.dirname(current_dir)
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+    from scripts.ocr_pipeline import create_engine, ocr_recognize, ocr_single, ocr_stitched
+
+SLOT_BYTES = 2 * 1024 * 1024  # 每个进程共享内存的初始大小 (4K 分辨率下三张预处理卡片约 0.5MB)
+ALIGN = 64                    # 各图像在共享内存中的起始偏移对齐
+START_TIMEOUT = 120.0         # 等待工作进程加载模型 (秒)
+TASK_TIMEOUT = 30.0           # 单次识别超时 (秒)
+STOP_TIMEOUT = 5.0            # 退出等待, 超时后强制结束
+
+
+class WorkerError(RuntimeError):
+    """工作进程启动失败 / 识别超时 / 进程已退出"""
+
+
+def _worker_main(conn, settings):
+    """工作进程入口: 加载模型后循环处理 ("shm", 名称) / ("ocr", 模式, 英雄, 布局) / None (退出)"""
+    try:
+        engine = create_engine(settings=settings)
+        vocab, store = None, None
+        if settings.get("vocab_decode"):
+            from scripts.augment_db import load_snapshot, AugmentStore
+            from scripts.ocr_vocab import VocabDecoder, install_charset
+            store = AugmentStore(load_snapshot()[0])
+            install_charset(engine, store.names)
+            vocab = VocabDecoder(engine, store)
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+        return
+    conn.send(("ready", os.getpid()))
+
+    shm = None
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            break  # 主进程已退出
+        if msg is None:
+            break
+        if msg[0] == "shm":
+            if shm is not None:
+                shm.close()
+            shm = shared_memory.SharedMemory(name=msg[1])  # 所有权在主进程, 此处只挂载
+            continue
+        _, mode, hero, layout = msg
+        images = {}
+        try:
+            for key, offset, h, w in layout:
+                images[key] = np.ndarray((h, w), dtype=np.uint8, buffer=shm.buf, offset=offset)
+            if mode == "stitched" and len(images) > 1:
+                texts = ocr_stitched(engine, images)
+            elif mode == "rec":
+                hero_view = store.heroes.get(hero) if store is not None and hero else None
+                texts = ocr_recognize(engine, images, vocab=vocab, hero_view=hero_view)[0]
+            else:
+                texts = {key: ocr_single(engine, img) for key, img in images.items()}
+            conn.send(("ok", texts))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+        finally:
+            images.clear()  # 释放共享内存视图, 否则无法 close
+    if shm is not None:
+        shm.close()
+
+
+class _Worker:
+    """主进程侧的工作进程句柄 (管道 + 专属共享内存)"""
+
+    def __init__(self, ctx, settings, index):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child, settings),
+                                   name=f"ocr-worker-{index}", daemon=True)
+        self.process.start()
+        child.close()
+        self.shm = None
+
+    def wait_ready(self, timeout):
+        status, payload = self._recv(timeout)
+        if status != "ready":
+            raise WorkerError(f"工作进程启动失败: {payload}")
+
+    def _ensure_capacity(self, nbytes):
+        if self.shm is not None and self.shm.size >= nbytes:
+            return
+        old = self.shm
+        self.shm = shared_memory.SharedMemory(create=True, size=max(nbytes, SLOT_BYTES))
+        self.conn.send(("shm", self.shm.name))
+        if old is not None:
+            old.close()
+            old.unlink()
+
+    def send(self, mode, hero, images):
+        """把图像拷入共享内存并发送布局 (不等待结果)"""
+        layout, offset = [], 0
+        for key, img in images.items():
+            h, w = img.shape[:2]
+            layout.append((key, offset, h, w))
+            offset += (h * w + ALIGN - 1) // ALIGN * ALIGN
+        self._ensure_capacity(offset)
+        for (key, off, h, w) in layout:
+            np.ndarray((h, w), dtype=np.uint8, buffer=self.shm.buf, offset=off)[:] = images[key]
+        self.conn.send(("ocr", mode, hero, layout))
+
+    def result(self, timeout=TASK_TIMEOUT):
+        status, payload = self._recv(timeout)
+        if status != "ok":
+            raise WorkerError(f"识别失败: {payload}")
+        return payload
+
+    def _recv(self, timeout):
+        try:
+            if not self.conn.poll(timeout):
+                raise WorkerError(f"{self.process.name} 无响应 (超过 {timeout:.0f}s)")
+            return self.conn.recv()
+        except (EOFError, OSError):
+            raise WorkerError(f"{self.process.name} 已退出 (exitcode={self.process.exitcode})")
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+
+    def release(self, timeout=STOP_TIMEOUT):
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(1.0)
+        self.conn.close()
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+class OcrWorkerPool:
+    """
+    常驻 OCR 工作进程池。
+
+    Args:
+        workers: 进程数
+        settings: 引擎配置 (同 data/ocr_engine.json); 未指定线程数时每个进程分得 CPU核心数/进程数 个线程
+    """
+
+    def __init__(self, workers=2, settings=None):
+        self.workers = max(int(workers), 1)
+        settings = dict(settings or {})
+        if "intra_op_num_threads" not in settings:
+            settings["intra_op_num_threads"] = max((os.cpu_count() or 1) // self.workers, 1)
+        self.settings = settings
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def start(self, timeout=START_TIMEOUT):
+        """启动全部进程并等待模型加载完成; 任一失败则关闭已启动的进程并抛出 WorkerError"""
+        ctx = mp.get_context("spawn")  # 不 fork 已加载模型/持有线程的主进程
+        try:
+            self._workers = [_Worker(ctx, self.settings, i) for i in range(self.workers)]
+            for worker in self._workers:
+                worker.wait_ready(timeout)
+        except Exception:
+            self.close()
+            raise
+        return self
+
+    @property
+    def alive(self):
+        return bool(self._workers) and all(w.process.is_alive() for w in self._workers)
+
+    def run(self, mode, images, hero=None):
+        """
+        识别一帧的区域图像。出现 WorkerError 后进程间状态不再可靠, 调用方应 close() 进程池。
+
+        Returns:
+            {key: 文本}
+        """
+        keys = list(images)
+        with self._lock:
+            if not self._workers:
+                raise WorkerError("进程池未启动或已关闭")
+            n = min(len(self._workers), len(keys)) if mode == "parallel" else 1
+            chunks = [{k: images[k] for k in keys[i::n]} for i in range(n)]
+            used = self._workers[:n]
+            try:
+                for worker, chunk in zip(used, chunks):
+                    worker.send(mode, hero, chunk)
+                texts = {}
+                for worker in used:
+                    texts.update(worker.result())
+            except (OSError, ValueError) as e:
+                raise WorkerError(f"进程间通信失败: {e}")
+        return texts
+
+    def close(self):
+        """通知所有进程退出并释放共享内存 (等待进行中的识别结束; 可重复调用)"""
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.stop()
+        for worker in workers:
+            worker.release()
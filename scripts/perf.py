@@ -0,0 +1,165 @@
+"""
+热路径性能统计 (F6 分析各阶段耗时)
+
+阶段:
+  capture     条带截图
+  preprocess  灰度 + 上采样
+  cache       帧差 / 感知哈希缓存查询
+  ocr         OCR 总耗时;  ocr_card 单卡耗时 (批量模式按卡片数均摊)
+  match       批量模糊匹配
+  recommend   最优推荐计算
+  render      悬浮窗刷新 (流式显示时每张卡片一次)
+  analyze     一次 F6 分析总耗时
+  first_card  分析开始到第一张卡片结果产出 (流式分析, 缓存命中/最快的卡片)
+  first_visible  F6 到悬浮窗首次显示结果 (含队列等待与渲染; 与 analyze 对比即流式显示的收益)
+  watch       监视模式单次采样 (条带截图 + 缩略图 + 分类; 追踪文件中另记线程 CPU 耗时)
+
+每个阶段保留最近 ROLLING_WINDOW 个样本，summary() 给出 p50 / p95 / max。
+可选 JSONL 追踪文件: 每个样本一行 {"ts", "frame", "stage", "ms", ...}，
+设置环境变量 ARAM_PERF_TRACE=1 (写入 data/cache/perf_trace.jsonl) 或 =文件路径 即可开启。
+
+用法:
+    from scripts.perf import monitor
+    with monitor.stage("capture"):
+        ...
+    print(monitor.format_summary())   # 控制台 F9 / GUI "性能统计"
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# 兼容直接运行和包导入
+try:
+    from scripts.config import PERF_TRACE_FILE
+except ImportError:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    parent_dir = os.path.dirname(current_dir)
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+    from scripts.config import PERF_TRACE_FILE
+
+ROLLING_WINDOW = 200
+# 摘要中的阶段顺序 (未列出的阶段排在最后)
+STAGE_ORDER = ("analyze", "first_card", "first_visible", "capture", "preprocess", "cache", "ocr", "ocr_card", "match", "recommend", "render", "watch")
+
+
+def percentile(samples, q):
+    """已排序样本的分位数 (最近秩); 无样本时为 0"""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(round(q / 100 * (len(samples) - 1))))]
+
+
+class PerfMonitor:
+    """各阶段耗时的滚动统计 (线程安全: 分析线程与 UI 线程都会写入)"""
+
+    def __init__(self, window=ROLLING_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._trace = None
+        self.frame = 0
+
+    # ---------- 记录 ----------
+
+    def begin_frame(self):
+        """开始一次新的分析 (追踪文件中用于关联同一次 F6 的各阶段)"""
+        with self._lock:
+            self.frame += 1
+            return self.frame
+
+    def record(self, stage, seconds, **fields):
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self._counts[stage] = self._counts.get(stage, 0) + 1
+            if self._trace:
+                entry = {"ts": round(time.time(), 3), "frame": self.frame,
+                         "stage": stage, "ms": round(seconds * 1000, 3)}
+                entry.update(fields)
+                try:
+                    self._trace.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                except (OSError, ValueError):
+                    self._trace = None
+
+    @contextmanager
+    def stage(self, stage, **fields):
+        """计时上下文: with monitor.stage("capture"): ..."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - t0, **fields)
+
+    # ---------- 追踪文件 ----------
+
+    def enable_trace(self, path=PERF_TRACE_FILE):
+        """开启 JSONL 追踪 (追加写入, 行缓冲), 返回是否成功"""
+        self.disable_trace()
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            handle = open(path, 'a', encoding='utf-8', buffering=1)
+        except OSError as e:
+            print(f"⚠ 性能追踪文件无法打开: {e}")
+            return False
+        with self._lock:
+            self._trace = handle
+        print(f"性能追踪已开启: {path}")
+        return True
+
+    def disable_trace(self):
+        with self._lock:
+            handle, self._trace = self._trace, None
+        if handle:
+            handle.close()
+
+    # ---------- 查询 ----------
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+
+    def summary(self):
+        """{阶段: {"count", "p50", "p95", "max"}} (单位: 秒, 基于最近 window 个样本)"""
+        with self._lock:
+            snapshot = {stage: (sorted(samples), self._counts[stage])
+                        for stage, samples in self._samples.items() if samples}
+        order = {stage: i for i, stage in enumerate(STAGE_ORDER)}
+        result = {}
+        for stage in sorted(snapshot, key=lambda s: (order.get(s, len(order)), s)):
+            samples, count = snapshot[stage]
+            result[stage] = {
+                "count": count,
+                "p50": percentile(samples, 50),
+                "p95": percentile(samples, 95),
+                "max": samples[-1],
+            }
+        return result
+
+    def format_summary(self):
+        """多行文本摘要 (控制台 / GUI 日志)"""
+        stats = self.summary()
+        if not stats:
+            return "📊 暂无性能数据 (先按 F6 分析一次)"
+        lines = [f"📊 性能统计 (每阶段最近 {self.window} 个样本)",
+                 f"  {'阶段':<14}{'次数':>6}{'p50':>10}{'p95':>10}{'max':>10}"]
+        for stage, s in stats.items():
+            lines.append(f"  {stage:<14}{s['count']:>6}{s['p50'] * 1000:>8.1f}ms"
+                         f"{s['p95'] * 1000:>8.1f}ms{s['max'] * 1000:>8.1f}ms")
+        return "\n".join(lines)
+
+
+# 进程内共享的统计实例 (分析线程 / 悬浮窗 / 控制台 / GUI 共用)
+monitor = PerfMonitor()
+
+_trace_env = os.environ.get("ARAM_PERF_TRACE")
+if _trace_env:
+    monitor.enable_trace(PERF_TRACE_FILE if _trace_env == "1" else _trace_env)
@@ -0,0 +1,221 @@
+"""
+合成海克斯卡片 OCR 回归语料
+运行: python -m scripts.synth_cards [--out 目录] [--resolutions 1920x1080,2560x1440,3840x2160]
+                                    [--per-name 1] [--frames 30] [--font 字体路径]
+
+从 hero_augments.csv 取全部海克斯名称，用中文字体按 REGIONS 几何 (各分辨率下的截取区域尺寸)
+渲染成卡片标题截图，并加入背景渐变/纹理、文字颜色、位置抖动、模糊和噪声变化。
+
+输出:
+  crops/<分辨率>/*.png + crops/labels.json   单卡截图语料 (python -m scripts.benchmark crops)
+  frames/*.png + frames/labels.json          整屏截图语料 (python -m scripts.benchmark replay)
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+# 兼容直接运行和包导入
+try:
+    from scripts.config import CACHE_DIR, CSV_FILE, AUGMENT_DB_FILE
+except ImportError:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    parent_dir = os.path.dirname(current_dir)
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+    from scripts.config import CACHE_DIR, CSV_FILE, AUGMENT_DB_FILE
+
+from scripts.augment_db import load_snapshot, AugmentStore
+from scripts.ocr_pipeline import compute_regions
+
+DEFAULT_OUT = os.path.join(CACHE_DIR, "synth")
+DEFAULT_RESOLUTIONS = ((1920, 1080), (2560, 1440), (3840, 2160))
+
+# 常见系统中文字体
+CJK_FONTS = (
+    r"C:\Windows\Fonts\msyh.ttc", r"C:\Windows\Fonts\simhei.ttf", r"C:\Windows\Fonts\simsun.ttc",
+    "/System/Library/Fonts/PingFang.ttc",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+)
+
+# 卡片标题文字颜色 (白 / 银 / 金 / 棱彩紫)
+TEXT_COLORS = ((245, 245, 240), (215, 220, 230), (240, 215, 150), (225, 200, 255))
+
+
+def find_cjk_font(path=None):
+    """返回可用的中文字体路径 (优先使用指定路径), 找不到时返回 None"""
+    for candidate in ((path,) if path else CJK_FONTS):
+        if candidate and os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def parse_resolutions(text):
+    """'1920x1080,2560x1440' -> ((1920, 1080), (2560, 1440))"""
+    return tuple(tuple(int(v) for v in item.lower().split("x")) for item in text.split(",") if item)
+
+
+class CardRenderer:
+    """按截取区域尺寸渲染卡片标题 (字体对象按字号缓存; font_path 为 None 时使用 Pillow 内置字体)"""
+
+    def __init__(self, font_path, seed=42):
+        self.font_path = font_path
+        self.rng = np.random.default_rng(seed)
+        self._fonts = {}
+
+    def _font(self, size):
+        font = self._fonts.get(size)
+        if font is None:
+            if self.font_path:
+                font = ImageFont.truetype(self.font_path, size)
+            else:
+                # 无中文字体时使用 Pillow 内置字体 (仅能渲染拉丁字符, 用于计时)
+                font = ImageFont.load_default(size)
+            self._fonts[size] = font
+        return font
+
+    def _background(self, w, h):
+        """深色底 + 双向渐变 + 低频纹理 + 轻微色偏"""
+        rng = self.rng
+        base = rng.uniform(8, 55)
+        grad = (np.linspace(0, rng.uniform(-20, 35), w)[None, :]
+                + np.linspace(0, rng.uniform(-15, 15), h)[:, None])
+        texture = rng.normal(0, rng.uniform(2, 10), (max(h // 8, 1), max(w // 8, 1)))
+        texture = np.asarray(Image.fromarray(texture.astype(np.float32)).resize((w, h), Image.BILINEAR))
+        gray = base + grad + texture
+        tint = rng.uniform(0.85, 1.15, size=3)
+        return np.clip(gray[..., None] * tint, 0, 255).astype(np.uint8)
+
+    def render(self, text, size):
+        """渲染单张卡片标题, 返回 RGB numpy 数组 (高, 宽, 3)"""
+        rng = self.rng
+        w, h = size
+        img = Image.fromarray(self._background(w, h))
+        draw = ImageDraw.Draw(img)
+
+        font_size = max(int(h * rng.uniform(0.42, 0.6)), 8)
+        font = self._font(font_size)
+        tw = draw.textlength(text, font=font)
+        while tw > w * 0.95 and font_size > 8:
+            font_size -= 1
+            font = self._font(font_size)
+            tw = draw.textlength(text, font=font)
+        x = (w - tw) / 2 + rng.uniform(-0.05, 0.05) * w
+        y = (h - font_size) / 2 + rng.uniform(-0.12, 0.08) * h
+        color = TEXT_COLORS[rng.integers(len(TEXT_COLORS))]
+        if rng.random() < 0.5:
+            # 文字阴影
+            draw.text((x + 1, y + 1), text, font=font, fill=(0, 0, 0))
+        draw.text((x, y), text, font=font, fill=color)
+
+        radius = rng.uniform(0, 1.2)
+        if radius > 0.2:
+            img = img.filter(ImageFilter.GaussianBlur(radius))
+        arr = np.asarray(img).astype(np.float32)
+        arr += rng.normal(0, rng.uniform(0, 8), arr.shape)
+        return np.clip(arr, 0, 255).astype(np.uint8)
+
+    def frame(self, size, cards):
+        """整屏截图: 暗色渐变背景, cards 为 {区域: 卡片 RGB 数组} 按 REGIONS 位置贴入"""
+        W, H = size
+        shade = np.linspace(self.rng.uniform(20, 60), self.rng.uniform(5, 30), H)
+        frame = np.repeat(np.repeat(shade[:, None, None], W, axis=1), 3, axis=2).astype(np.uint8)
+        for r, card in cards:
+            h, w = card.shape[:2]
+            frame[r['top']:r['top'] + h, r['left']:r['left'] + w] = card
+        return frame
+
+
+def _hero_pools(store):
+    """名称 -> 拥有该海克斯的任一英雄 (单卡标注用)"""
+    owner = {}
+    for hero, view in store.heroes.items():
+        for name in view.names:
+            owner.setdefault(name, hero)
+    return owner
+
+
+def generate(out_dir, font_path, resolutions=DEFAULT_RESOLUTIONS, per_name=1, frames=0, seed=42):
+    """
+    生成语料并写入标注。
+
+    Returns:
+        dict: {"crops": 单卡数量, "frames": 整屏数量, "seconds": 渲染耗时 (不含写盘)}
+    """
+    snapshot, _ = load_snapshot(CSV_FILE, AUGMENT_DB_FILE)
+    store = AugmentStore(snapshot)
+    owner = _hero_pools(store)
+    renderer = CardRenderer(font_path, seed)
+    render_time = 0.0
+
+    crop_labels = []
+    for W, H in resolutions:
+        res = f"{W}x{H}"
+        region = compute_regions(W, H)["hex_1"]
+        os.makedirs(os.path.join(out_dir, "crops", res), exist_ok=True)
+        for i, name in enumerate(store.names):
+            for v in range(per_name):
+                t0 = time.perf_counter()
+                card = renderer.render(name, (region['width'], region['height']))
+                render_time += time.perf_counter() - t0
+                rel = f"{res}/{i:04d}_{v}.png"
+                Image.fromarray(card).save(os.path.join(out_dir, "crops", rel))
+                crop_labels.append({"file": rel, "name": name, "hero": owner.get(name, ""), "resolution": res})
+    with open(os.path.join(out_dir, "crops", "labels.json"), 'w', encoding='utf-8') as f:
+        json.dump({"crops": crop_labels}, f, ensure_ascii=False, indent=1)
+
+    frame_labels = {}
+    if frames:
+        os.makedirs(os.path.join(out_dir, "frames"), exist_ok=True)
+        heroes = [h for h, view in store.heroes.items() if len(view) >= 3]
+        rng = np.random.default_rng(seed + 1)
+        for i in range(frames):
+            W, H = resolutions[i % len(resolutions)]
+            hero = heroes[rng.integers(len(heroes))]
+            names = rng.choice(store.heroes[hero].names, 3, replace=False)
+            regions = compute_regions(W, H)
+            t0 = time.perf_counter()
+            cards = [(r, renderer.render(str(n), (r['width'], r['height'])))
+                     for r, n in zip(regions.values(), names)]
+            frame = renderer.frame((W, H), cards)
+            render_time += time.perf_counter() - t0
+            file = f"{i:04d}_{W}x{H}.png"
+            Image.fromarray(frame).save(os.path.join(out_dir, "frames", file))
+            frame_labels[file] = {"hero": hero, **{k: str(n) for k, n in zip(regions, names)}}
+        with open(os.path.join(out_dir, "frames", "labels.json"), 'w', encoding='utf-8') as f:
+            json.dump(frame_labels, f, ensure_ascii=False, indent=1)
+
+    return {"crops": len(crop_labels), "frames": len(frame_labels), "seconds": render_time}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m scripts.synth_cards", description="合成海克斯卡片 OCR 语料")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="输出目录")
+    parser.add_argument("--resolutions", default="1920x1080,2560x1440,3840x2160")
+    parser.add_argument("--per-name", type=int, default=1, help="每个名称在每种分辨率下的变体数")
+    parser.add_argument("--frames", type=int, default=0, help="额外生成的整屏截图数量 (回放用)")
+    parser.add_argument("--font", help="中文字体路径 (默认自动查找系统字体)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    font = find_cjk_font(args.font)
+    if not font:
+        print("❌ 未找到中文字体, 请用 --font 指定 (如 C:\\Windows\\Fonts\\msyh.ttc)")
+        return
+    print(f"字体: {font}")
+    t0 = time.perf_counter()
+    stats = generate(args.out, font, parse_resolutions(args.resolutions), args.per_name, args.frames, args.seed)
+    elapsed = time.perf_counter() - t0
+    rendered = stats["crops"] + stats["frames"] * 3
+    print(f"✅ 单卡 {stats['crops']} 张, 整屏 {stats['frames']} 张 -> {args.out}")
+    print(f"   渲染吞吐: {rendered / stats['seconds']:.0f} 张/秒 (含写盘 {rendered / elapsed:.0f} 张/秒)")
+
+
+if __name__ == "__main__":
+    main()
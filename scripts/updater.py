@@ -12,7 +12,7 @@ from pypinyin import lazy_pinyin
 # 1. 解决同级导入问题 (兼容直接运行和包导入)
 try:
     from scripts import hero_scraper as crawler
-    from scripts.config import DATA_DIR, CHAMPION_ID_FILE, PINYIN_FILE, CSV_FILE
+    from scripts.config import DATA_DIR, CHAMPION_ID_FILE, CHAMPION_KEY_FILE, PINYIN_FILE, CSV_FILE
 except ImportError:
     current_dir = os.path.dirname(os.path.abspath(__file__))
     parent_dir = os.path.dirname(current_dir)
@@ -21,7 +21,7 @@ except ImportError:
     if current_dir not in sys.path:
         sys.path.insert(0, current_dir)
     import hero_scraper as crawler
-    from config import DATA_DIR, CHAMPION_ID_FILE, PINYIN_FILE, CSV_FILE
+    from config import DATA_DIR, CHAMPION_ID_FILE, CHAMPION_KEY_FILE, PINYIN_FILE, CSV_FILE
 
 # GitHub 仓库地址 (用于在线下载)
 GITHUB_RAW_BASE  = "https://raw.githubusercontent.com/Nyx0ra/lol-aram-mayhem-hextech-helper/main"
@@ -41,10 +41,13 @@ def sync_official_data():
 
         official_en_to_cn = {}
         official_cn_to_en = {}
+        champion_keys = {}  # 数字 ID (LCU 中的 championId) -> 英文名
         for en_id, info in data.items():
             cn_name = info['name']
             official_en_to_cn[en_id] = cn_name
             official_cn_to_en[cn_name] = en_id
+            if info.get('key'):
+                champion_keys[info['key']] = en_id
 
         old_en_to_cn = {}
         if os.path.exists(CHAMPION_ID_FILE):
@@ -54,6 +57,9 @@ def sync_official_data():
 
         with open(CHAMPION_ID_FILE, 'w', encoding='utf-8') as f:
             json.dump(official_cn_to_en, f, indent=4, ensure_ascii=False)
+        # LCU 连接器用它预填英雄 ID 映射 (客户端未应答时也能识别英雄)
+        with open(CHAMPION_KEY_FILE, 'w', encoding='utf-8') as f:
+            json.dump({"version": version, "ids": champion_keys}, f, indent=4, ensure_ascii=False)
         
         new_champs = []
         renamed_champs =[]
@@ -379,6 +385,7 @@ def download_from_github(log_func=None):
         ("data/hero_augments.csv", CSV_FILE, "英雄海克斯数据"),
         ("data/champions.json", CHAMPION_ID_FILE, "英雄名称映射"),
         ("data/pinyin_map.json", PINYIN_FILE, "拼音检索索引"),
+        ("data/champion_keys.json", CHAMPION_KEY_FILE, "英雄数字 ID 映射"),
     ]
     
     success_count = 0